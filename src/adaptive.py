@@ -0,0 +1,201 @@
+import operator
+
+try:
+    from src.rope import concat
+except ImportError:  # running as a script from inside src/
+    from rope import concat
+
+# Generic implementation of each binary operator, used while a site is
+# warming up and after it has given up on specializing.
+GENERIC_OPERATORS = {
+    "+": concat,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Operand type pairs worth specializing, and the function a specialized
+# handler calls once its type guard passes. String + goes through concat
+# so large results still turn into ropes.
+SPECIALIZATIONS = {
+    ("+", int, int): operator.add,
+    ("+", float, float): operator.add,
+    ("+", int, float): operator.add,
+    ("+", float, int): operator.add,
+    ("+", str, str): concat,
+    ("-", int, int): operator.sub,
+    ("-", float, float): operator.sub,
+    ("*", int, int): operator.mul,
+    ("*", float, float): operator.mul,
+    ("/", int, int): operator.truediv,
+    ("/", float, float): operator.truediv,
+    ("==", int, int): operator.eq,
+    ("!=", int, int): operator.ne,
+    ("<", int, int): operator.lt,
+    ("<=", int, int): operator.le,
+    (">", int, int): operator.gt,
+    (">=", int, int): operator.ge,
+    ("<", float, float): operator.lt,
+    (">", float, float): operator.gt,
+    ("==", str, str): operator.eq,
+    ("!=", str, str): operator.ne,
+}
+
+
+def _unknown_operator(op):
+    def handler(left, right):
+        raise ValueError(f"Unknown operator: {op}")
+    return handler
+
+
+class BinarySite:
+    """Adaptive evaluation state for one BinaryExpression node.
+
+    A site starts out "warming": it evaluates generically and records the
+    operand types it sees. After WARMUP evaluations with a single stable
+    type pair it rewrites its `evaluate` attribute to a specialized
+    handler that guards on those types and calls the operator directly.
+    A failed guard deoptimizes the site back to warming; after
+    MAX_RESPECIALIZATIONS the site settles on the generic handler.
+
+    evaluate() takes operand values. An interpreter that dispatches on
+    nodes attach()es the site instead: the site then builds a visitor for
+    its node in each state, which evaluates the operands itself, and
+    installs it in place of the previous one, so evaluating the node costs
+    no more than the visitor.
+    """
+
+    WARMUP = 8
+    MAX_RESPECIALIZATIONS = 4
+
+    __slots__ = ('node', 'operator', 'generic', 'evaluate', 'state', 'types',
+                 'warmup', 'misses', 'specializations', 'operand', 'install')
+
+    def __init__(self, node):
+        self.node = node
+        self.operator = node["operator"]
+        self.generic = GENERIC_OPERATORS.get(self.operator) or _unknown_operator(self.operator)
+        self.misses = 0
+        self.specializations = 0
+        self.operand = None
+        self.install = None
+        self._start_warmup()
+
+    def attach(self, operand, install):
+        """Dispatch the site's node to visitors built by the site.
+
+        operand(node) returns the visitor to evaluate an operand node with;
+        install(visitor) replaces the site node's visitor, and is called
+        now and whenever the state changes.
+        """
+        self.operand = operand
+        self.install = install
+        install(self.visitor())
+
+    def visitor(self):
+        """A visitor for the site's node in its current state"""
+        left_node = self.node["left"]
+        right_node = self.node["right"]
+        visit_left = self.operand(left_node)
+        visit_right = self.operand(right_node)
+        if self.state == "specialized":
+            left_type, right_type = self.types
+            target = SPECIALIZATIONS[(self.operator,) + self.types]
+            miss = self._miss
+
+            def specialized(node):
+                left = visit_left(left_node)
+                right = visit_right(right_node)
+                if type(left) is left_type and type(right) is right_type:
+                    return target(left, right)
+                return miss(left, right)
+            return specialized
+
+        evaluate = self.evaluate  # The generic operator, or warming
+
+        def unspecialized(node):
+            return evaluate(visit_left(left_node), visit_right(right_node))
+        return unspecialized
+
+    def _start_warmup(self):
+        self.state = "warming"
+        self.types = None
+        self.warmup = 0
+        self.evaluate = self._warming
+        if self.install is not None:
+            self.install(self.visitor())
+
+    def _warming(self, left, right):
+        types = (type(left), type(right))
+        if self.types is None:
+            self.types = types
+        elif self.types != types:
+            self.types = False  # polymorphic during this warm-up
+        self.warmup += 1
+        result = self.generic(left, right)
+        if self.warmup >= self.WARMUP:
+            self._specialize()
+        return result
+
+    def _specialize(self):
+        target = SPECIALIZATIONS.get((self.operator,) + self.types) if self.types else None
+        if target is None or self.specializations >= self.MAX_RESPECIALIZATIONS:
+            self.state = "generic"
+            self.evaluate = self.generic
+            if self.install is not None:
+                self.install(self.visitor())
+            return
+
+        left_type, right_type = self.types
+        miss = self._miss
+
+        def specialized(left, right):
+            if type(left) is left_type and type(right) is right_type:
+                return target(left, right)
+            return miss(left, right)
+
+        self.specializations += 1
+        self.state = "specialized"
+        self.evaluate = specialized
+        if self.install is not None:
+            self.install(self.visitor())
+
+    def prime(self, types):
+        """Specialize on operand types observed by an earlier run, skipping warm-up.
+
+        Returns False, leaving the site warming, if there is no
+        specialization for types.
+        """
+        if (self.operator,) + types not in SPECIALIZATIONS:
+            return False
+        self.types = types
+        self._specialize()
+        return True
+
+    def _miss(self, left, right):
+        self.misses += 1
+        self._start_warmup()
+        return self._warming(left, right)
+
+    def describe(self, lines=None):
+        """Return this site's specialization state for profiling.
+
+        lines maps id(node) to source lines (see linetable.program_line_map).
+        """
+        types = None
+        if self.types:
+            types = tuple(t.__name__ for t in self.types)
+        return {
+            "line": lines.get(id(self.node), "unknown") if lines else "unknown",
+            "operator": self.operator,
+            "state": self.state,
+            "types": types,
+            "specializations": self.specializations,
+            "misses": self.misses,
+        }
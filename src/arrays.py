@@ -0,0 +1,146 @@
+import operator
+from array import array
+from itertools import repeat
+
+
+def _typecode(values):
+    """Pick the array.array typecode for a sequence of Holy-D numbers"""
+    typecode = 'q'
+    for value in values:
+        kind = type(value)
+        if kind is float:
+            typecode = 'd'
+        elif kind is not int:
+            raise TypeError(f"Array elements must be numbers, not {kind.__name__}")
+    return typecode
+
+
+class Array:
+    """A compact numeric Holy-D array backed by array.array.
+
+    Integer arrays use 64-bit signed storage ('q') and any float makes the
+    whole array double precision ('d'). Every bulk operation is a single
+    call into a C-level loop (array construction from map/range, slicing,
+    sum/min/max) rather than one interpreter step per element.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_values(cls, values):
+        values = list(values)
+        return cls(array(_typecode(values), values))
+
+    def _elementwise(self, op, other, reflected=False):
+        if isinstance(other, Array):
+            if len(other.data) != len(self.data):
+                raise ValueError(f"Array length mismatch: {len(self.data)} and {len(other.data)}")
+            others = other.data
+            float_result = 'd' in (self.data.typecode, other.data.typecode)
+        elif type(other) in (int, float):
+            others = repeat(other, len(self.data))
+            float_result = self.data.typecode == 'd' or type(other) is float
+        else:
+            return NotImplemented
+        typecode = 'd' if float_result or op is operator.truediv else 'q'
+        if reflected:
+            return Array(array(typecode, map(op, others, self.data)))
+        return Array(array(typecode, map(op, self.data, others)))
+
+    def __add__(self, other):
+        return self._elementwise(operator.add, other)
+
+    def __radd__(self, other):
+        return self._elementwise(operator.add, other, reflected=True)
+
+    def __sub__(self, other):
+        return self._elementwise(operator.sub, other)
+
+    def __rsub__(self, other):
+        return self._elementwise(operator.sub, other, reflected=True)
+
+    def __mul__(self, other):
+        return self._elementwise(operator.mul, other)
+
+    def __rmul__(self, other):
+        return self._elementwise(operator.mul, other, reflected=True)
+
+    def __truediv__(self, other):
+        return self._elementwise(operator.truediv, other)
+
+    def __rtruediv__(self, other):
+        return self._elementwise(operator.truediv, other, reflected=True)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Array(self.data[index])
+        return self.data[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Array):
+            return self.data == other.data
+        return NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        return "[" + ", ".join(map(str, self.data)) + "]"
+
+    def __repr__(self):
+        return f"Array({self.data!r})"
+
+
+def _array_argument(name, value):
+    if not isinstance(value, Array):
+        raise TypeError(f"{name}() expects an array, not {type(value).__name__}")
+    return value.data
+
+
+def _len(value):
+    return len(value)
+
+
+def _sum(values):
+    return sum(_array_argument("sum", values))
+
+
+def _min(values):
+    return min(_array_argument("min", values))
+
+
+def _max(values):
+    return max(_array_argument("max", values))
+
+
+def _range(*args):
+    return Array(array('q', range(*(int(arg) for arg in args))))
+
+
+def _fill(count, value):
+    return Array(array(_typecode([value]), [value]) * int(count))
+
+
+def _slice(values, start, stop=None):
+    data = _array_argument("slice", values)
+    return Array(data[int(start):None if stop is None else int(stop)])
+
+
+def register_array_builtins(registry):
+    """Add the bulk array builtins to a BuiltinRegistry"""
+    registry.register("len", _len, 1, 1)
+    registry.register("sum", _sum, 1, 1)
+    registry.register("min", _min, 1, 1)
+    registry.register("max", _max, 1, 1)
+    registry.register("range", _range, 1, 3)
+    registry.register("fill", _fill, 2, 2)
+    registry.register("slice", _slice, 2, 3)
+    return registry
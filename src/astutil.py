@@ -0,0 +1,24 @@
+import json
+import hashlib
+
+
+def walk(node):
+    """Yield every AST node (dict with a "type" key) under node, parents first.
+
+    Iterative so long right-recursive expression chains cannot hit the
+    recursion limit.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if "type" in current:
+                yield current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def program_digest(ast):
+    """Short content hash of an AST, e.g. to tell whether data recorded for a program still applies"""
+    return hashlib.sha256(json.dumps(ast, separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
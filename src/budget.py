@@ -0,0 +1,74 @@
+import time
+
+# Steps between the checks of the step and wall-clock limits
+CHECK_INTERVAL = 1024
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a script runs past one of its execution budgets"""
+
+    def __init__(self, budget, limit):
+        self.budget = budget
+        self.limit = limit
+        super().__init__(f"Execution budget exceeded: {budget} (limit {limit})")
+
+
+class Budget:
+    """Limits on how much work a single run may do.
+
+    Steps are statements, charged in batches: a block is charged all of
+    its statements when it starts (an entry block, a function call, each
+    loop iteration), so the count can run ahead of the statements that
+    actually executed. The step and time limits are only compared every
+    CHECK_INTERVAL steps. Call depth and output are checked exactly,
+    since they are only touched at calls and writes.
+
+    Any limit left as None is not enforced.
+    """
+
+    __slots__ = ('max_steps', 'max_time', 'max_depth', 'max_output',
+                 'steps', 'next_check', 'deadline', 'depth', 'output')
+
+    def __init__(self, max_steps=None, max_time=None, max_depth=None, max_output=None):
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_depth = max_depth
+        self.max_output = max_output
+        self.start()
+
+    def start(self):
+        """Reset the counters at the beginning of a run"""
+        self.steps = 0
+        self.depth = 0
+        self.output = 0
+        self.deadline = time.monotonic() + self.max_time if self.max_time is not None else None
+        self.next_check = 0
+        self.check()
+
+    def charge(self, steps):
+        self.steps += steps
+        if self.steps >= self.next_check:
+            self.check()
+
+    def check(self):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExceeded("steps", self.max_steps)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("time", self.max_time)
+        self.next_check = self.steps + CHECK_INTERVAL
+        if self.max_steps is not None:
+            self.next_check = min(self.next_check, self.max_steps + 1)
+
+    def enter_call(self):
+        self.depth += 1
+        if self.max_depth is not None and self.depth > self.max_depth:
+            self.depth -= 1
+            raise BudgetExceeded("call depth", self.max_depth)
+
+    def exit_call(self):
+        self.depth -= 1
+
+    def charge_output(self, text):
+        self.output += len(text.encode('utf-8'))
+        if self.max_output is not None and self.output > self.max_output:
+            raise BudgetExceeded("output bytes", self.max_output)
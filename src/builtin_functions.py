@@ -0,0 +1,110 @@
+import sys
+
+try:
+    from src.arrays import register_array_builtins
+    from src.rope import flatten
+except ImportError:  # running as a script from inside src/
+    from arrays import register_array_builtins
+    from rope import flatten
+
+
+def _arity_message(name, min_args, max_args, given):
+    if min_args == max_args:
+        expected = f"exactly {min_args}"
+    elif max_args is None:
+        expected = f"at least {min_args}"
+    elif min_args == 0:
+        expected = f"at most {max_args}"
+    else:
+        expected = f"from {min_args} to {max_args}"
+    plural = "argument" if expected.endswith(" 1") else "arguments"
+    return f"{name}() takes {expected} {plural} ({given} given)"
+
+
+class Builtin:
+    """A native Python function callable from Holy-D.
+
+    Builtins declare their arity up front so the interpreter can check it
+    with two integer comparisons. Context builtins receive the running
+    interpreter as their first argument (for output, clocks, ...); plain
+    builtins only see the evaluated Holy-D arguments, with ropes
+    flattened to str.
+    """
+
+    __slots__ = ('name', 'function', 'min_args', 'max_args', 'context')
+
+    def __init__(self, name, function, min_args=0, max_args=None, context=False):
+        self.name = name
+        self.function = function
+        self.min_args = min_args
+        self.max_args = max_args
+        self.context = context
+
+    def call(self, interpreter, args, node):
+        count = len(args)
+        if count < self.min_args or (self.max_args is not None and count > self.max_args):
+            raise TypeError(_arity_message(self.name, self.min_args, self.max_args, count))
+        if self.context:
+            return self.function(interpreter, *args)
+        return self.function(*[flatten(arg) for arg in args])
+
+
+class BuiltinRegistry:
+    """The single table of builtins an interpreter links call sites against"""
+
+    def __init__(self, builtins=None):
+        self._builtins = dict(builtins or {})
+
+    def register(self, name, function, min_args=0, max_args=None, context=False):
+        """Register a native function under name, replacing any previous one"""
+        builtin = Builtin(name, function, min_args, max_args, context)
+        self._builtins[name] = builtin
+        return builtin
+
+    def unregister(self, name):
+        self._builtins.pop(name, None)
+
+    def get(self, name, default=None):
+        return self._builtins.get(name, default)
+
+    def copy(self):
+        return BuiltinRegistry(self._builtins)
+
+    def __contains__(self, name):
+        return name in self._builtins
+
+    def __iter__(self):
+        return iter(self._builtins)
+
+
+def _print(interpreter, *args):
+    interpreter.write(" ".join(map(str, args)), flush=True)
+
+
+def _println(interpreter, *args):
+    interpreter.write(" ".join(map(str, args)) + "\n")
+
+
+def _sleep(interpreter, seconds):
+    interpreter.clock.sleep(float(seconds))
+
+
+def _time(interpreter):
+    # Seconds since the epoch, as seen by the run's clock (see clock.py)
+    return interpreter.clock.now()
+
+
+def _exit(interpreter, code=0):
+    sys.exit(int(code))
+
+
+def default_builtins():
+    """Return a fresh registry holding the standard Holy-D builtins"""
+    registry = BuiltinRegistry()
+    registry.register("print", _print, context=True)
+    registry.register("println", _println, context=True)
+    registry.register("sleep", _sleep, 1, 1, context=True)
+    registry.register("time", _time, 0, 0, context=True)
+    registry.register("exit", _exit, 0, 1, context=True)
+    register_array_builtins(registry)
+    return registry
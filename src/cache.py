@@ -0,0 +1,358 @@
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import threading
+
+try:
+    from src.hashcons import pool, unpool
+    from src.version import toolchain_version
+except ImportError:  # running as a script from inside src/
+    from hashcons import pool, unpool
+    from version import toolchain_version
+
+# Environment variables choosing the cache store's directory and size cap
+CACHE_DIR_VARIABLE = "HOLY_D_CACHE_DIR"
+CACHE_SIZE_VARIABLE = "HOLY_D_CACHE_SIZE"
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # Bytes
+
+# Eviction removes entries until the store is this fraction of its cap, so
+# a full store is not scanned again on every write
+EVICT_TO = 0.8
+
+# Bumped when the layout of cached ASTs changes. Cached ASTs are also keyed
+# by toolchain_version(), so a parser that changed is never fed old trees.
+AST_FORMAT = 2
+
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def cache_root():
+    """The directory of the shared cache store.
+
+    $HOLY_D_CACHE_DIR if set, else holy-d in $XDG_CACHE_HOME (default
+    ~/.cache).
+    """
+    root = os.environ.get(CACHE_DIR_VARIABLE)
+    if root:
+        return os.path.abspath(root)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "holy-d")
+
+
+def parse_size(text):
+    """Parse a size such as "500000", "64K", "256M" or "1G" into bytes"""
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in _SIZE_UNITS:
+        return int(float(text[:-1]) * _SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def cache_key(kind, *parts):
+    """Content address of an entry: a hash of its kind and what it is derived from"""
+    digest = hashlib.sha256(kind.encode('utf-8'))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CacheStore:
+    """A directory of cached artifacts shared by every script and process.
+
+    Entries are files named by their key (see cache_key), spread over
+    256 subdirectories. Writers write a temporary file and rename it
+    into place, so readers in other processes only ever see whole
+    entries and concurrent writers of the same key cannot corrupt it.
+
+    The store's total size is capped: reading an entry refreshes its
+    modification time, and when a write takes the store over max_size
+    the least recently used entries are removed.
+
+    If the directory cannot be created or written, the store falls back
+    to a directory in the system's temporary directory, and if that
+    fails too it stores nothing: every lookup misses and writes are
+    dropped. Entries already in an unwritable directory are still read.
+
+    stats() reports hits, misses, writes, evictions and write errors.
+    """
+
+    def __init__(self, root=None, max_size=None):
+        self.root = os.path.abspath(root) if root is not None else cache_root()
+        if max_size is None:
+            configured = os.environ.get(CACHE_SIZE_VARIABLE)
+            max_size = parse_size(configured) if configured else DEFAULT_MAX_SIZE
+        self.max_size = max_size
+        self.fallback = os.path.join(tempfile.gettempdir(), f"holy-d-cache-{_user()}")
+        self.write_root = None  # Chosen at the first write
+        self.size = None  # Estimated total size, from a scan at the first write
+        self.counts = {"hits": 0, "misses": 0, "writes": 0, "write_errors": 0, "evictions": 0, "evicted_bytes": 0}
+        self.lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def stats(self):
+        """Counters of this store object, plus where it writes"""
+        with self.lock:
+            stats = dict(self.counts)
+        stats["root"] = self.write_root or self.root
+        stats["max_size"] = self.max_size
+        return stats
+
+    def path(self, key, root=None):
+        return os.path.join(root or self.root, key[:2], key[2:])
+
+    def roots(self):
+        """Directories entries may be read from, in order"""
+        if not self.write_root or self.write_root == self.root:
+            return [self.root]
+        return [self.write_root, self.root]
+
+    def get(self, key):
+        """Return the bytes stored under key, or None"""
+        for root in self.roots():
+            path = self.path(key, root)
+            try:
+                with open(path, 'rb') as entry:
+                    data = entry.read()
+            except OSError:
+                continue
+            try:
+                os.utime(path)  # Recently used
+            except OSError:
+                pass
+            self.count("hits")
+            return data
+        self.count("misses")
+        return None
+
+    def put(self, key, data):
+        """Store data under key; returns the entry's path, or None if it was not stored"""
+        root = self.writable_root()
+        if root is None:
+            self.count("write_errors")
+            return None
+        path = self.path(key, root)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, 'wb') as entry:
+                    entry.write(data)
+                os.chmod(temporary, 0o644)  # mkstemp's 0600 would hide entries from other users of a shared store
+                os.replace(temporary, path)
+            except BaseException:
+                _remove(temporary)
+                raise
+        except OSError:
+            self.count("write_errors")
+            return None
+        self.count("writes")
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self.entries(root))
+            else:
+                self.size += len(data)
+            full = self.size > self.max_size
+        if full:
+            self.evict(root)
+        return path
+
+    def touch(self, key):
+        """Mark an entry as recently used; returns its path, or None if it is not stored"""
+        for root in self.roots():
+            path = self.path(key, root)
+            try:
+                os.utime(path)
+                return path
+            except OSError:
+                continue
+        return None
+
+    def remove(self, key):
+        """Remove the entry under key; returns whether there was one"""
+        removed = False
+        for root in self.roots():
+            path = self.path(key, root)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            if _remove(path):
+                removed = True
+                with self.lock:
+                    if self.size is not None:
+                        self.size = max(0, self.size - size)
+        return removed
+
+    def get_json(self, key):
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def put_json(self, key, value, **options):
+        return self.put(key, json.dumps(value, **options).encode('utf-8'))
+
+    def writable_root(self):
+        if self.write_root is None:
+            for root in (self.root, self.fallback):
+                try:
+                    os.makedirs(root, exist_ok=True)
+                except OSError:
+                    continue
+                if os.access(root, os.W_OK):
+                    self.write_root = root
+                    break
+            else:
+                self.write_root = ""  # Nowhere to write
+        return self.write_root or None
+
+    def entries(self, root=None):
+        """(modification time, size, path) of every entry file"""
+        root = root or self.root
+        found = []
+        try:
+            shards = list(os.scandir(root))
+        except OSError:
+            return found
+        for shard in shards:
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            try:
+                for entry in os.scandir(shard.path):
+                    try:
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue  # Removed by another process meanwhile
+                    found.append((info.st_mtime, info.st_size, entry.path))
+            except OSError:
+                continue
+        return found
+
+    def evict(self, root=None):
+        """Remove least recently used entries until the store is well under max_size"""
+        entries = sorted(self.entries(root))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if _remove(path):
+                self.count("evictions")
+                self.count("evicted_bytes", size)
+            total -= size  # Also if another process removed it first
+        with self.lock:
+            self.size = total
+        return total
+
+    def clear(self):
+        for root in self.roots():
+            for _, _, path in self.entries(root):
+                _remove(path)
+        with self.lock:
+            self.size = 0
+
+
+def _user():
+    try:
+        return os.getuid()
+    except AttributeError:  # not available on Windows
+        return os.environ.get("USERNAME", "user")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """The process's CacheStore for the configured location.
+
+    Recreated if $HOLY_D_CACHE_DIR or $HOLY_D_CACHE_SIZE changed since
+    the last call.
+    """
+    global _default
+    settings = (cache_root(), os.environ.get(CACHE_SIZE_VARIABLE))
+    with _default_lock:
+        if _default is None or _default[0] != settings:
+            _default = (settings, CacheStore())
+        return _default[1]
+
+
+def script_key(file_path):
+    return cache_key("script", AST_FORMAT, toolchain_version(), os.path.abspath(file_path))
+
+
+def module_key(digest):
+    return cache_key("module", AST_FORMAT, toolchain_version(), digest)
+
+
+def save_ast(ast, file_path, store=None):
+    """Cache the AST of a script file.
+
+    The AST is stored under its own content hash, so workers caching the
+    same script share one entry. A small entry keyed by the script's path
+    points at it for load_ast(). Repeated expressions are stored once, in
+    a constant pool (see hashcons.pool).
+    """
+    store = store or default_store()
+    data = json.dumps(pool(ast), indent=2).encode('utf-8')
+    key = cache_key("ast", AST_FORMAT, toolchain_version(), data)
+    # Content-addressed, so an existing entry already holds this AST
+    ast_path = store.touch(key) or store.put(key, data)
+    if ast_path is None or store.put(script_key(file_path), key.encode('ascii')) is None:
+        print("Error saving AST: cache store is not writable", file=sys.stderr)
+        return False
+    print(f"AST saved to {ast_path}", file=sys.stderr)
+    return True
+
+
+def load_ast(file_path, store=None):
+    """Load the cached AST of a script file, or None if there is none"""
+    store = store or default_store()
+    key = store.get(script_key(file_path))
+    if key is None:
+        return None
+    data = store.get_json(key.decode('ascii'))
+    return unpool(data) if data is not None else None
+
+
+def save_module(ast, file_path, digest, store=None):
+    """Cache an imported module's AST under the hash of its source.
+
+    Entries for older contents of a module are left to LRU eviction.
+    """
+    store = store or default_store()
+    return store.put_json(module_key(digest), pool(ast), separators=(',', ':')) is not None
+
+
+def load_module(file_path, digest, store=None):
+    """Load a module's cached AST for the given content hash, or None"""
+    store = store or default_store()
+    data = store.get_json(module_key(digest))
+    return unpool(data) if data is not None else None
+
+
+def format_stats(store=None):
+    """One line describing a store's counters, for --cache-stats"""
+    stats = (store or default_store()).stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = 100.0 * stats["hits"] / lookups if lookups else 0.0
+    return (f"cache {stats['root']}: {stats['hits']} hits, {stats['misses']} misses ({rate:.0f}% hit rate), "
+            f"{stats['writes']} writes, {stats['evictions']} evictions ({stats['evicted_bytes']} bytes), "
+            f"{stats['write_errors']} write errors")
@@ -0,0 +1,42 @@
+import threading
+import time
+
+
+class SystemClock:
+    """Real time: time.time() and time.sleep()"""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Time that only passes when a script sleeps.
+
+    sleep() advances the clock by the requested amount and returns at
+    once, and now() reports the advanced time, so a script sees the same
+    sequence of times and output as with the system clock without any
+    of the waiting. Runs sharing a clock (e.g. threads of one Program)
+    each advance it; their sleeps do not wait for each other.
+    """
+
+    def __init__(self, start=0.0):
+        self.current = float(start)
+        self.slept = 0.0  # Total seconds skipped
+        self.lock = threading.Lock()
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        with self.lock:
+            self.current += seconds
+            self.slept += seconds
+
+
+# The clock of contexts created without one
+SYSTEM_CLOCK = SystemClock()
@@ -1,24 +1,279 @@
+try:
+    from src.peephole import PeepholeOptimizer
+    from src.linetable import UNKNOWN_LINE, encode, decode, line_map
+except ImportError:  # running as a script from inside src/
+    from peephole import PeepholeOptimizer
+    from linetable import UNKNOWN_LINE, encode, decode, line_map
+
+
+class Label:
+    """A jump target inside an instruction list, resolved by assemble()"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"<label {id(self):x}>"
+
+
+class CodeObject:
+    """The compiled instructions of one function or entry block.
+
+    Instructions are (opcode, argument) tuples. Jump arguments are
+    instruction indices once assembled. The source line of each
+    instruction is kept in a delta-encoded linetable (see linetable.py)
+    and only decoded when line_for() is first asked.
+    """
+
+    __slots__ = ('name', 'params', 'instructions', 'linetable', '_lines')
+
+    def __init__(self, name, params, instructions, linetable=None):
+        self.name = name
+        self.params = params
+        self.instructions = instructions
+        self.linetable = linetable
+        self._lines = None
+
+    def line_for(self, pc):
+        """Return the source line of the instruction at pc, or None if unknown"""
+        if self.linetable is None:
+            return None
+        if self._lines is None:
+            self._lines = decode(self.linetable)
+        if 0 <= pc < len(self._lines) and self._lines[pc] != UNKNOWN_LINE:
+            return self._lines[pc]
+        return None
+
+    def disassemble(self):
+        return "\n".join(f"{index:4d} {op:<24} {arg!r}" for index, (op, arg) in enumerate(self.instructions))
+
+
+class Bytecode:
+    """A compiled program: function code by name plus the entry blocks in order"""
+
+    def __init__(self):
+        self.functions = {}
+        self.entry = []
+
+    def code_objects(self):
+        return list(self.functions.values()) + self.entry
+
+
+# Pseudo-instructions that assemble() removes
+PSEUDO_OPS = ('LABEL', 'LINE')
+
+
+def assemble(instructions):
+    """Drop labels from an instruction list and point jumps at indices.
+
+    Returns the instructions and the line of each one; a ('LINE', n)
+    pseudo-instruction sets the line of the instructions after it.
+    """
+    positions = {}
+    index = 0
+    for op, arg in instructions:
+        if op == 'LABEL':
+            positions[arg] = index
+        elif op != 'LINE':
+            index += 1
+    assembled = []
+    lines = []
+    line = UNKNOWN_LINE
+    for op, arg in instructions:
+        if op == 'LINE':
+            line = arg
+            continue
+        if op == 'LABEL':
+            continue
+        if isinstance(arg, Label):
+            arg = positions[arg]
+        elif isinstance(arg, tuple) and arg and isinstance(arg[-1], Label):
+            arg = arg[:-1] + (positions[arg[-1]],)
+        assembled.append((op, arg))
+        lines.append(line)
+    return assembled, lines
+
+
+# Nodes that start a new line in the line table of their code object
+STATEMENT_TYPES = {"PrintStatement", "AssignmentStatement", "CallStatement", "IfStatement",
+                   "WhileStatement", "ForStatement", "ReturnStatement"}
+
+
 class Compiler:
+    """Compile a Program AST into stack-machine bytecode for vm.VM.
+
+    Functions that finish without a return statement return the value
+    of the last statement they ran, as in the interpreter: an
+    assignment's value, a call's result, or None for prints and loops.
+    With optimize=True the peephole pass runs over every code object and
+    its counters are left in self.stats.
+    """
+
     def __init__(self):
         self.bytecode = []
+        self.lines = {}  # id(node) -> line for the declaration being compiled
+        self.stats = None
+
+    def compile(self, ast, optimize=True):
+        self.bytecode = []
+        optimizer = PeepholeOptimizer() if optimize else None
+        program = Bytecode()
+        for node in ast["body"]:
+            if node["type"] == "FunctionDeclaration":
+                self.lines = line_map(node)
+                code = self.compile_code(node["name"], node["params"], node["body"], optimizer, tail=True)
+                program.functions[node["name"]] = code
+            elif node["type"] == "EntryPoint":
+                self.lines = line_map(node)
+                program.entry.append(self.compile_code("<enter>", [], node["body"], optimizer))
+        self.stats = optimizer.stats if optimizer else None
+        return program
 
-    def compile(self, ast):
+    def compile_code(self, name, params, statements, optimizer=None, tail=False):
+        """Compile a statement list; with tail, its last statement's value is returned"""
         self.bytecode = []
-        self.generate_bytecode(ast)
-        return self.bytecode
+        if tail:
+            self.generate_statements(statements, tail=True)
+        else:
+            self.generate_statements(statements)
+            self.emit('LOAD_CONST', None)
+            self.emit('RETURN')
+        instructions = self.bytecode
+        if optimizer is not None:
+            instructions = optimizer.optimize(instructions)
+        instructions, lines = assemble(instructions)
+        return CodeObject(name, list(params), instructions, encode(lines))
+
+    def emit(self, op, arg=None):
+        self.bytecode.append((op, arg))
+
+    def generate_statements(self, statements, tail=False):
+        if not statements:
+            if tail:
+                self.emit('LOAD_CONST', None)
+                self.emit('RETURN')
+            return
+        for statement in statements[:-1]:
+            self.generate_bytecode(statement)
+        if tail:
+            self.generate_tail(statements[-1])
+        else:
+            self.generate_bytecode(statements[-1])
+
+    def generate_tail(self, node):
+        """Generate a function's last statement and return the interpreter's result for it"""
+        kind = node["type"]
+        if kind == "IfStatement":
+            # Each branch ends the function with its own last statement
+            self.emit_line(node)
+            alternate = Label()
+            self.generate_bytecode(node["test"])
+            self.emit('JUMP_IF_FALSE', alternate)
+            self.generate_statements(node["consequent"], tail=True)
+            self.emit('LABEL', alternate)
+            self.generate_statements(node["alternate"] or [], tail=True)
+            return
+        if kind == "ReturnStatement":
+            self.generate_bytecode(node)
+            return
+        if kind == "CallStatement":
+            self.emit_line(node)
+            self.generate_FunctionCall(node)
+        else:
+            self.generate_bytecode(node)
+            if kind == "AssignmentStatement":
+                self.emit('LOAD_NAME', node["name"])
+            else:
+                self.emit('LOAD_CONST', None)
+        self.emit('RETURN')
+
+    def emit_line(self, node):
+        line = self.lines.get(id(node))
+        if line is not None and node["type"] in STATEMENT_TYPES:
+            self.emit('LINE', line)
 
     def generate_bytecode(self, node):
         if node is None:
             return
-        
-        # Example of handling different node types
-        if node.type == 'Literal':
-            self.bytecode.append(f'LOAD_CONST {node.value}')
-        elif node.type == 'BinaryOperation':
-            self.generate_bytecode(node.left)
-            self.generate_bytecode(node.right)
-            self.bytecode.append(f'BINARY_OP {node.operator}')
-        # Add more node types as needed
-
-    # Future expansion can include more methods for different compilation targets
-    # and optimizations as the language evolves.
\ No newline at end of file
+
+        self.emit_line(node)
+        generator = getattr(self, f'generate_{node["type"]}', None)
+        if generator is None:
+            raise NotImplementedError(f"Cannot compile {node['type']} nodes")
+        generator(node)
+
+    def generate_PrintStatement(self, node):
+        self.generate_bytecode(node["expression"])
+        self.emit('PRINT', node["newline"])
+
+    def generate_AssignmentStatement(self, node):
+        self.generate_bytecode(node["value"])
+        self.emit('STORE_NAME', node["name"])
+
+    def generate_CallStatement(self, node):
+        self.generate_FunctionCall(node)
+        self.emit('POP')
+
+    def generate_FunctionCall(self, node):
+        for argument in node["arguments"]:
+            self.generate_bytecode(argument)
+        self.emit('CALL', (node["name"], len(node["arguments"])))
+
+    def generate_IfStatement(self, node):
+        alternate = Label()
+        end = Label()
+        self.generate_bytecode(node["test"])
+        self.emit('JUMP_IF_FALSE', alternate)
+        self.generate_statements(node["consequent"])
+        self.emit('JUMP', end)
+        self.emit('LABEL', alternate)
+        self.generate_statements(node["alternate"] or [])
+        self.emit('LABEL', end)
+
+    def generate_WhileStatement(self, node):
+        top = Label()
+        end = Label()
+        self.emit('LABEL', top)
+        self.generate_bytecode(node["test"])
+        self.emit('JUMP_IF_FALSE', end)
+        self.generate_statements(node["body"])
+        self.emit('JUMP', top)
+        self.emit('LABEL', end)
+
+    def generate_ForStatement(self, node):
+        top = Label()
+        end = Label()
+        self.generate_bytecode(node["init"])
+        self.emit('LABEL', top)
+        if node["test"] is not None:
+            self.generate_bytecode(node["test"])
+            self.emit('JUMP_IF_FALSE', end)
+        self.generate_statements(node["body"])
+        self.generate_bytecode(node["update"])
+        self.emit('JUMP', top)
+        self.emit('LABEL', end)
+
+    def generate_ReturnStatement(self, node):
+        if node["argument"] is None:
+            self.emit('LOAD_CONST', None)
+        else:
+            self.generate_bytecode(node["argument"])
+        self.emit('RETURN')
+
+    def generate_StringLiteral(self, node):
+        self.emit('LOAD_CONST', node["value"])
+
+    generate_NumericLiteral = generate_StringLiteral
+    generate_BooleanLiteral = generate_StringLiteral
+
+    def generate_ArrayLiteral(self, node):
+        for element in node["elements"]:
+            self.generate_bytecode(element)
+        self.emit('BUILD_ARRAY', len(node["elements"]))
+
+    def generate_Identifier(self, node):
+        self.emit('LOAD_NAME', node["name"])
+
+    def generate_BinaryExpression(self, node):
+        self.generate_bytecode(node["left"])
+        self.generate_bytecode(node["right"])
+        self.emit('BINARY_OP', node["operator"])
@@ -0,0 +1,113 @@
+import os
+import re
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from src.lexer import Lexer
+    from src.parser import Parser
+    from src.hashcons import intern_ast
+except ImportError:  # running as a script from inside src/
+    from lexer import Lexer
+    from parser import Parser
+    from hashcons import intern_ast
+
+# Sources smaller than this are lexed and parsed on the calling thread;
+# below it the process pool costs more than it saves.
+PARALLEL_THRESHOLD = 256 * 1024
+
+# Strings and comments are matched whole so braces and keywords inside
+# them are skipped by the pre-scan, exactly as the lexer would skip them.
+_SCAN_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"?|//[^\n]*|[{}]|\b(?:func|enter)\b', re.S)
+
+
+def parse_serial(source_code, hash_cons=False):
+    """Lex and parse source_code on the current thread"""
+    tokens = Lexer(source_code).tokenize()
+    return Parser(tokens, hash_cons).parse()
+
+
+def find_split_points(source_code):
+    """Return the offsets of every top-level `func`/`enter` declaration.
+
+    This is a cheap pre-scan, not a parse: it only tracks brace depth,
+    so a malformed file simply yields split points that fail to parse.
+    """
+    points = []
+    depth = 0
+    for match in _SCAN_PATTERN.finditer(source_code):
+        text = match.group()
+        if text == '{':
+            depth += 1
+        elif text == '}':
+            depth -= 1
+        elif text in ('func', 'enter') and depth == 0:
+            points.append(match.start())
+    return points
+
+
+def split_source(source_code, chunks):
+    """Split source_code into at most `chunks` pieces of roughly equal size.
+
+    Each piece is a tuple (text, line, column, offset) locating it within
+    the original file so tokens and errors keep their real positions.
+    """
+    points = find_split_points(source_code)
+    if not points:
+        return [(source_code, 1, 1, 0)]
+
+    target = max(1, len(source_code) // max(1, chunks))
+    starts = [0]
+    for point in points[1:]:
+        if point - starts[-1] >= target:
+            starts.append(point)
+
+    pieces = []
+    line = 1
+    previous = 0
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(source_code)
+        line += source_code.count('\n', previous, start)
+        column = start - source_code.rfind('\n', 0, start)
+        pieces.append((source_code[start:end], line, column, start))
+        previous = start
+    return pieces
+
+
+def _parse_chunk(piece, hash_cons=False):
+    text, line, column, offset = piece
+    tokens = Lexer(text, line, column, offset).tokenize()
+    return Parser(tokens, hash_cons).parse()["body"]
+
+
+def parse_parallel(source_code, jobs=None, hash_cons=False):
+    """Lex and parse source_code in a process pool, one chunk per worker task.
+
+    The chunk bodies are merged back in source order. If any chunk fails,
+    the whole file is re-parsed serially so the error raised is the same
+    one a serial run would report. With hash_cons, each worker shares
+    expressions within its chunk and the merged program is interned
+    again to share them across chunks.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return parse_serial(source_code, hash_cons)
+    pieces = split_source(source_code, jobs * 4)
+    if len(pieces) == 1:
+        return parse_serial(source_code, hash_cons)
+
+    program = {"type": "Program", "body": []}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for body in executor.map(functools.partial(_parse_chunk, hash_cons=hash_cons), pieces):
+                program["body"].extend(body)
+    except (SyntaxError, ValueError, TypeError, IndexError):
+        return parse_serial(source_code, hash_cons)
+    return intern_ast(program) if hash_cons else program
+
+
+def parse_source(source_code, jobs=None, hash_cons=False):
+    """Parse source_code, using the parallel front end for large inputs"""
+    if jobs == 1 or len(source_code) < PARALLEL_THRESHOLD:
+        return parse_serial(source_code, hash_cons)
+    return parse_parallel(source_code, jobs, hash_cons)
@@ -0,0 +1,154 @@
+from collections import Counter
+
+# Expression nodes: immutable once parsed and free of per-occurrence state,
+# so one object can stand for every identical occurrence. Statements are
+# never shared; coverage, error lines and profiles are attached to them.
+INTERNED_TYPES = frozenset(("StringLiteral", "NumericLiteral", "BooleanLiteral", "Identifier",
+                            "BinaryExpression", "ArrayLiteral", "FunctionCall"))
+
+POOL_REFERENCE = "@"  # Key of a pooled artifact's references, {"@": index}
+
+
+class InternTable:
+    """Hash-consing table mapping expression nodes to one shared copy.
+
+    Nodes are interned bottom-up: a node is looked up by its own fields
+    and the identity of its (already interned) children, so a lookup
+    costs the same for a literal and for a large subtree. A node with a
+    child that was not interned is returned unchanged.
+
+    Shared nodes are one object in several places of the AST. Tables
+    keyed by id(node) (line tables, adaptive sites, call links) then hold
+    one entry for all occurrences, so only nodes whose entries do not
+    depend on the occurrence are interned.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.canonical = set()  # id() of every interned node
+        self.lookups = 0
+
+    def intern(self, node):
+        """Return the shared copy of node, which becomes it if it is new"""
+        if node["type"] not in INTERNED_TYPES:
+            return node
+        key = self.key(node)
+        if key is None:
+            return node
+        self.lookups += 1
+        shared = self.nodes.get(key)
+        if shared is None:
+            shared = self.nodes[key] = node
+            self.canonical.add(id(node))
+        return shared
+
+    def key(self, node):
+        parts = []
+        for field, value in node.items():
+            if isinstance(value, dict):
+                if id(value) not in self.canonical:
+                    return None
+                part = id(value)
+            elif isinstance(value, list):
+                if not all(id(item) in self.canonical for item in value if isinstance(item, dict)):
+                    return None
+                part = tuple(id(item) if isinstance(item, dict) else (type(item), item) for item in value)
+            else:
+                # The type keeps 1, 1.0 and true apart
+                part = (type(value), value)
+            parts.append((field, part))
+        return tuple(parts)
+
+    def stats(self):
+        """Interned lookups, and how many of them found an existing node"""
+        return {"lookups": self.lookups, "distinct": len(self.nodes), "shared": self.lookups - len(self.nodes)}
+
+
+def rebuild(tree, leave):
+    """Copy tree bottom-up, replacing each dict by leave(original, copy).
+
+    Iterative, so long expression chains do not hit the recursion limit.
+    A dict or list that occurs several times in tree is copied once and
+    its copy shared the same way.
+    """
+    done = {}  # id(original) -> copy
+    stack = [(tree, False)]
+    while stack:
+        value, children_done = stack.pop()
+        if id(value) in done:
+            continue
+        children = value.values() if isinstance(value, dict) else value
+        if not children_done:
+            stack.append((value, True))
+            stack.extend((child, False) for child in children
+                         if isinstance(child, (dict, list)) and id(child) not in done)
+            continue
+        if isinstance(value, dict):
+            copy = {field: done[id(child)] if isinstance(child, (dict, list)) else child
+                    for field, child in value.items()}
+            done[id(value)] = leave(value, copy)
+        else:
+            done[id(value)] = [done[id(child)] if isinstance(child, (dict, list)) else child for child in value]
+    return done[id(tree)]
+
+
+def intern_ast(tree, table=None):
+    """A copy of tree (a Program or any node) with identical expressions shared.
+
+    Line tables are positional (see linetable.py), so they stay valid.
+    """
+    table = table if table is not None else InternTable()
+    return rebuild(tree, lambda original, copy: table.intern(copy) if "type" in copy else copy)
+
+
+def pool(tree):
+    """Encode tree for caching with each repeated expression stored once.
+
+    Returns {"pool": [...], "program": ...}, where every expression that
+    is referenced more than once is an entry of the pool and each of its
+    occurrences is {"@": index}. Entries only refer to earlier entries.
+    """
+    table = InternTable()
+    shared = intern_ast(tree, table)
+    references = Counter()
+    seen = set()
+    stack = [shared]
+    while stack:
+        value = stack.pop()
+        for child in (value.values() if isinstance(value, dict) else value):
+            if isinstance(child, dict):
+                references[id(child)] += 1
+                if id(child) in seen:
+                    continue
+                seen.add(id(child))
+            if isinstance(child, (dict, list)):
+                stack.append(child)
+
+    entries = []
+
+    def leave(original, copy):
+        if id(original) in table.canonical and references[id(original)] > 1:
+            entries.append(copy)
+            return {POOL_REFERENCE: len(entries) - 1}
+        return copy
+
+    return {"pool": entries, "program": rebuild(shared, leave)}
+
+
+def unpool(data):
+    """Decode pool() output into a tree whose repeated expressions are shared.
+
+    Data that is not pooled (a plain AST) is returned as it is.
+    """
+    if "pool" not in data:
+        return data
+    entries = []
+
+    def leave(original, copy):
+        if len(copy) == 1 and POOL_REFERENCE in copy:
+            return entries[copy[POOL_REFERENCE]]
+        return copy
+
+    for entry in data["pool"]:
+        entries.append(rebuild(entry, leave))
+    return rebuild(data["program"], leave)
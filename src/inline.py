@@ -0,0 +1,307 @@
+import copy
+
+try:
+    from src.astutil import walk
+    from src.builtin_functions import default_builtins
+    from src.linker import link, CALL_NODES, UserFunction
+    from src.linetable import build_line_table, line_map, UNKNOWN_LINE
+    from src.jit import free_names
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+    from builtin_functions import default_builtins
+    from linker import link, CALL_NODES, UserFunction
+    from linetable import build_line_table, line_map, UNKNOWN_LINE
+    from jit import free_names
+
+DEFAULT_MAX_SIZE = 12  # AST nodes in the body of a function that is inlined
+
+LITERALS = ("StringLiteral", "NumericLiteral", "BooleanLiteral")
+
+# Statements a function called with `call` may consist of to be inlined.
+# Assignments would leak into the caller (a call discards them) and a
+# return would return from the caller.
+INLINE_STATEMENTS = ("PrintStatement", "CallStatement", "IfStatement")
+
+
+def inline_functions(ast, builtins=None, max_size=DEFAULT_MAX_SIZE):
+    """Inline calls to small, non-recursive functions of a Program.
+
+    Two shapes of function are inlined, when their body has at most
+    max_size nodes (after inlining their own calls):
+
+    - `return expression;`, at calls inside expressions: the call is
+      replaced by the expression;
+    - prints, calls and ifs, at `call` statements: the statement is
+      replaced by the body.
+
+    Parameters are replaced by their arguments. Arguments are evaluated
+    once, in order, before the body, so an argument is only substituted
+    if evaluating it has no effects and cannot fail: a literal, or a
+    variable assigned earlier on every path to the call. Functions whose
+    callees read one of their parameters (scoping is dynamic) are not
+    inlined either.
+
+    Returns a new Program, sharing unchanged declarations with ast, and
+    a report: a list of {"function", "caller", "line"} per inlined call.
+    Inlined nodes get the line of the call in their new declaration's
+    line table.
+    """
+    builtins = builtins if builtins is not None else default_builtins()
+    return Inliner(ast, builtins, max_size).run()
+
+
+class Inliner:
+    def __init__(self, ast, builtins, max_size):
+        self.ast = ast
+        self.builtins = builtins
+        self.max_size = max_size
+        self.functions, self.links = link(ast, builtins)
+        self.recursive = self.find_recursive()
+        self.bodies = {}  # function name -> (body with its own calls inlined, its lines)
+        self.report = []
+
+    def run(self):
+        body = []
+        for declaration in self.ast["body"]:
+            if declaration["type"] == "FunctionDeclaration" and self.functions[declaration["name"]] is declaration:
+                new_body, lines = self.expanded(declaration["name"])
+            elif declaration["type"] == "EntryPoint":
+                new_body, lines = self.inline_block(declaration, "<enter>")
+            else:
+                new_body = declaration.get("body")
+            if new_body is not declaration.get("body"):
+                declaration = self.rebuild(declaration, new_body, lines)
+            body.append(declaration)
+        return {"type": "Program", "body": body}, self.report
+
+    def find_recursive(self):
+        """Names of functions that can (directly or not) call themselves"""
+        calls = {}
+        for name, declaration in self.functions.items():
+            calls[name] = {target.name for node in walk(declaration["body"]) if node["type"] in CALL_NODES
+                           for target in [self.links.get(id(node))] if isinstance(target, UserFunction)}
+        recursive = set()
+        for name in calls:
+            seen = set()
+            pending = list(calls[name])
+            while pending:
+                callee = pending.pop()
+                if callee == name:
+                    recursive.add(name)
+                    break
+                if callee not in seen:
+                    seen.add(callee)
+                    pending.extend(calls.get(callee, ()))
+        return recursive
+
+    def expanded(self, name):
+        """The body of function name with the calls in it inlined, and its lines (computed once)"""
+        expanded = self.bodies.get(name)
+        if expanded is None:
+            # Recursive functions are never inlined, so this cannot recurse forever
+            expanded = self.bodies[name] = self.inline_block(self.functions[name], name)
+        return expanded
+
+    def rebuild(self, declaration, body, lines):
+        """A copy of declaration with a new body and a line table covering it"""
+        rebuilt = dict(declaration, body=body)
+        lines[id(rebuilt)] = lines.get(id(declaration), UNKNOWN_LINE)
+        return build_line_table(rebuilt, lines)
+
+    def inline_block(self, declaration, caller):
+        """Inline the calls in one declaration's body.
+
+        Returns the new body and {id(node): line} for its nodes.
+        """
+        self.caller = caller
+        self.lines = line_map(declaration)
+        # A function returns the value of its last statement if it has no return
+        tail = declaration["type"] == "FunctionDeclaration"
+        return self.statements(declaration["body"], set(), tail), self.lines
+
+    def line(self, node):
+        return self.lines.get(id(node), UNKNOWN_LINE)
+
+    def replaced(self, old, new):
+        """Give a rewritten node the line of the node it replaces"""
+        self.lines[id(new)] = self.line(old)
+        return new
+
+    def statements(self, statements, defined, tail=False):
+        """Inline calls in a statement list; returns statements itself if nothing changed.
+
+        defined holds the variables assigned on every path so far; it is
+        extended by the list's own assignments. With tail, the value of
+        the list's last statement is returned by the enclosing function.
+        """
+        result = []
+        changed = False
+        last = len(statements) - 1
+        for index, statement in enumerate(statements):
+            new = self.statement(statement, defined, tail and index == last)
+            if new["type"] == "CallStatement":
+                inlined = self.inline_statement(new, defined, tail and index == last)
+                if inlined is not None:
+                    result.extend(inlined)
+                    changed = True
+                    continue
+            changed = changed or new is not statement
+            result.append(new)
+            if statement["type"] == "AssignmentStatement":
+                defined.add(statement["name"])
+        return result if changed else statements
+
+    def statement(self, node, defined, tail=False):
+        kind = node["type"]
+        if kind == "IfStatement":
+            # An if's value is the value of the branch it ran
+            test = self.expression(node["test"], defined)
+            consequent = self.statements(node["consequent"], set(defined), tail)
+            alternate = node["alternate"]
+            if alternate is not None:
+                alternate = self.statements(alternate, set(defined), tail)
+            if test is node["test"] and consequent is node["consequent"] and alternate is node["alternate"]:
+                return node
+            return self.replaced(node, dict(node, test=test, consequent=consequent, alternate=alternate))
+        if kind == "WhileStatement":
+            test = self.expression(node["test"], defined)
+            body = self.statements(node["body"], set(defined))
+            if test is node["test"] and body is node["body"]:
+                return node
+            return self.replaced(node, dict(node, test=test, body=body))
+        if kind == "ForStatement":
+            # The init clause runs before the test, update and body
+            inner = set(defined)
+            parts = {}
+            for key in ("init", "test", "update"):
+                part = node[key]
+                if part is not None:
+                    parts[key] = self.statement(part, inner) if key != "test" else self.expression(part, inner)
+                    if key == "init":
+                        inner.add(part["name"])
+                else:
+                    parts[key] = None
+            parts["body"] = self.statements(node["body"], inner)
+            if all(parts[key] is node[key] for key in parts):
+                return node
+            return self.replaced(node, dict(node, **parts))
+        for key in ("value", "argument", "expression"):
+            if node.get(key) is not None:
+                value = self.expression(node[key], defined)
+                if value is node[key]:
+                    return node
+                return self.replaced(node, dict(node, **{key: value}))
+        if kind == "CallStatement":
+            return self.call_arguments(node, defined)
+        return node
+
+    def expression(self, node, defined):
+        """Inline calls in an expression; returns node itself if nothing changed"""
+        kind = node["type"]
+        if kind == "BinaryExpression":
+            left = self.expression(node["left"], defined)
+            right = self.expression(node["right"], defined)
+            if left is node["left"] and right is node["right"]:
+                return node
+            return self.replaced(node, dict(node, left=left, right=right))
+        if kind == "ArrayLiteral":
+            elements = [self.expression(element, defined) for element in node["elements"]]
+            if all(new is old for new, old in zip(elements, node["elements"])):
+                return node
+            return self.replaced(node, dict(node, elements=elements))
+        if kind == "FunctionCall":
+            node = self.call_arguments(node, defined)
+            inlined = self.inline_expression(node, defined)
+            if inlined is not None:
+                return inlined
+        return node
+
+    def call_arguments(self, node, defined):
+        arguments = [self.expression(argument, defined) for argument in node["arguments"]]
+        if all(new is old for new, old in zip(arguments, node["arguments"])):
+            return node
+        return self.replaced(node, dict(node, arguments=arguments))
+
+    def callee(self, node, defined):
+        """The declaration and expanded body to inline at call node, or None"""
+        name = node["name"]
+        declaration = self.functions.get(name)
+        if declaration is None or name in self.recursive:
+            return None
+        if len(node["arguments"]) != len(declaration["params"]):
+            return None
+        if not all(argument["type"] in LITERALS or (argument["type"] == "Identifier" and argument["name"] in defined)
+                   for argument in node["arguments"]):
+            return None
+        params = set(declaration["params"])
+        for call in walk(declaration["body"]):
+            if call["type"] in CALL_NODES:
+                target = self.links.get(id(call))
+                if isinstance(target, UserFunction) and free_names(target.declaration, self.links) & params:
+                    return None
+        # Expanding the callee overwrites the state of the block being inlined into
+        state = (self.caller, self.lines)
+        body, _ = self.expanded(name)
+        self.caller, self.lines = state
+        if sum(1 for _ in walk(body)) > self.max_size:
+            return None
+        return declaration, body
+
+    def inline_expression(self, node, defined):
+        found = self.callee(node, defined)
+        if found is None:
+            return None
+        declaration, body = found
+        if len(body) != 1 or body[0]["type"] != "ReturnStatement" or body[0]["argument"] is None:
+            return None
+        return self.substitute(node, declaration, body[0]["argument"])
+
+    def inline_statement(self, node, defined, tail=False):
+        """The statements replacing a `call` statement, or None.
+
+        A `call` in tail position is the value its function returns, so
+        there the callee's final `return` is kept.
+        """
+        found = self.callee(node, defined)
+        if found is None:
+            return None
+        declaration, body = found
+        returns = body and body[-1]["type"] == "ReturnStatement" and (
+            body[-1]["argument"] is None or body[-1]["argument"]["type"] in LITERALS)
+        if returns:
+            # Elsewhere the value of a `call` is discarded
+            body, last = body[:-1], body[-1:]
+        if tail and not (body or returns):
+            # Without the call, the function would return its previous statement's value
+            return None
+        if any(statement["type"] not in INLINE_STATEMENTS for statement in body):
+            return None
+        if any(inner["type"] in ("AssignmentStatement", "ReturnStatement", "WhileStatement", "ForStatement")
+               for statement in body for inner in walk(statement)):
+            return None
+        if tail and returns:
+            body = body + last
+        return self.substitute(node, declaration, body)
+
+    def substitute(self, call, declaration, body):
+        """A copy of body with parameters replaced by call's arguments"""
+        arguments = dict(zip(declaration["params"], call["arguments"]))
+        line = self.line(call)
+        result = copy.deepcopy(body)
+        substituted = set()  # A hash-consed parameter is one node at every use
+        for node in walk(result):
+            if node["type"] == "Identifier" and node["name"] in arguments and id(node) not in substituted:
+                argument = arguments[node["name"]]
+                node.clear()
+                node.update(copy.deepcopy(argument))
+                substituted.add(id(node))
+            self.lines[id(node)] = line
+        self.report.append({"function": declaration["name"], "caller": self.caller, "line": line})
+        return result
+
+
+def format_report(report):
+    """Describe the calls inline_functions() inlined, one per line"""
+    lines = [f"inlined {entry['function']} into {entry['caller']} at line {entry['line']}" for entry in report]
+    lines.append(f"{len(report)} call(s) inlined")
+    return "\n".join(lines)
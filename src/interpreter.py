@@ -1,45 +1,293 @@
-import time
 import sys
+import time
+import threading
 
-class Interpreter:
-    def __init__(self, parser=None):
-        self.parser = parser
-        self.environment = {}  # Global scope
-        self.functions = {}    # Function definitions
+try:
+    from src.rope import concat
+    from src.adaptive import BinarySite, GENERIC_OPERATORS
+    from src.builtin_functions import default_builtins
+    from src.linker import link, resolve
+    from src.arrays import Array
+    from src.linetable import locate_error, annotate_error, program_line_map
+    from src.jit import JIT, DEOPT
+    from src.clock import SYSTEM_CLOCK
+except ImportError:  # running as a script from inside src/
+    from rope import concat
+    from adaptive import BinarySite, GENERIC_OPERATORS
+    from builtin_functions import default_builtins
+    from linker import link, resolve
+    from arrays import Array
+    from linetable import locate_error, annotate_error, program_line_map
+    from jit import JIT, DEOPT
+    from clock import SYSTEM_CLOCK
 
-    def interpret(self, ast=None):
-        if ast is None and self.parser:
-            ast = self.parser.parse()
+# Marks a variable that did not exist before a call assigned it
+_UNBOUND = object()
+
+
+class ExecutionContext:
+    """The mutable state of one run, and the tree-walking evaluator over it.
+
+    The function table, call links and builtins are shared read-only with
+    the Interpreter or Program the context was created from; everything a
+    run changes (variables, return state, adaptive sites, budget, output)
+    lives on the context. Separate contexts can therefore execute the
+    same linked program on different threads at the same time.
+
+    Errors raised while a statement runs are tagged with that statement
+    and resolved to a source line through the line table of the function
+    they escape from (see linetable.py), so nodes carry no positions.
+    """
+
+    def __init__(self, functions, links, builtins, adaptive=False, budget=None, output=None, environment=None, jit=None, profile=None,
+                 coverage=None, frames=None, clock=None, tracer=None):
+        self.environment = environment if environment is not None else {}  # Global scope
+        self.functions = functions # Function definitions
+        self.builtins = builtins
+        self.links = links     # id(call node) -> call target, see linker.link
+        self.adaptive = adaptive   # Specialize binary operations on observed types
+        self.binary_sites = {}     # id(BinaryExpression node) -> BinarySite, which keeps its node alive
+        self.visitors = {}     # node type -> bound visit_ method
+        self.returning = False # Set by a return statement until its function unwinds
+        self.return_value = None
+        self.budget = budget   # Optional budget.Budget limiting each run
+        self.output = output   # File-like object for program output (default: sys.stdout)
+        self.program = None    # The Program AST last run, for line lookups
+        self.saved = None      # Caller values of variables the running function assigned
+        self.jit = jit         # Optional jit.JIT compiling hot functions to Python
+        self.clock = clock if clock is not None else SYSTEM_CLOCK  # What sleep() and time() use
+        self.profile = profile # Optional pgo.ProfileRecorder observing this run
+        if profile is not None:
+            # Overridden per instance, so runs without a profile pay nothing for it
+            self.call_function = self.profile_call_function
+            self.visitors["BinaryExpression"] = self.profile_BinaryExpression
+            self.visitors["IfStatement"] = self.profile_IfStatement
+        elif adaptive:
+            # Dispatch on the node rather than its type, so each binary
+            # operation site can install its specialized visitor in place
+            # of the generic one (see adaptive.BinarySite.attach)
+            self.node_visitors = {}  # id(node) -> visitor
+            self.dispatched = []     # Nodes in node_visitors, kept alive so their ids stay unique
+            self.visit_node = self.adaptive_visit_node
+            self.visitors["BinaryExpression"] = self.adaptive_visit_node
+        self.coverage = coverage  # Optional linecoverage.CoverageRecorder
+        if coverage is not None:
+            self.execute_statements = self.covered_execute_statements
+            self.prepare = self.covered_prepare
+        self.tracer = tracer  # Optional tracing.Tracer recording slow calls
+        if tracer is not None:
+            # Wraps whichever call_function is in place, e.g. the profiling one
+            self.untraced_call_function = self.call_function
+            self.call_function = self.traced_call_function
+        # Optional shadow call stack read by sampling.SamplingProfiler: the
+        # running EntryPoint, then the call node (or declaration) of each
+        # active call. None when not sampled.
+        self.frames = frames
+        self.thread = None  # Ident of the thread running a sampled program
+
+    def execute_program(self, ast):
+        """Run the entry blocks of an already linked Program"""
+        self.program = ast
+        budget = self.budget
+        if budget is not None:
+            budget.start()
+        frames = self.frames
+        if frames is not None:
+            # The sampler finds the running statement in this thread's Python frames
+            self.thread = threading.get_ident()
         
-        if ast["type"] == "Program":
-            # First pass: register all functions
-            for node in ast["body"]:
-                if node["type"] == "FunctionDeclaration":
-                    self.functions[node["name"]] = node
-            
-            # Second pass: execute entry point if exists
-            for node in ast["body"]:
-                if node["type"] == "EntryPoint":
+        for node in ast["body"]:
+            if node["type"] == "EntryPoint":
+                if frames is not None:
+                    depth = len(frames)
+                    frames.append(node)
+                try:
+                    if budget is not None:
+                        budget.charge(len(node["body"]))
                     self.execute_statements(node["body"])
-            
-            return self.environment
-        else:
-            return self.visit_node(ast)
+                except Exception as error:
+                    annotate_error(error, node, "<enter>")
+                    raise
+                finally:
+                    if frames is not None:
+                        # Also drops frames of calls an error unwound
+                        del frames[depth:]
+                self.returning = False
+        
+        return self.environment
 
     def visit_node(self, node):
-        method_name = f'visit_{node["type"]}'
-        visitor = getattr(self, method_name, self.generic_visit)
+        visitor = self.visitors.get(node["type"])
+        if visitor is None:
+            visitor = self.visitor_for(node)
         return visitor(node)
 
+    def adaptive_visit_node(self, node):
+        """visit_node() dispatching on the node itself, in adaptive mode"""
+        visitor = self.node_visitors.get(id(node))
+        if visitor is None:
+            visitor = self.node_visitor(node)
+        return visitor(node)
+
+    def node_visitor(self, node):
+        if node["type"] == "BinaryExpression":
+            site = self.binary_site(node)
+            site.attach(self.operand_visitor, lambda visitor: self.node_visitors.__setitem__(id(node), visitor))
+            return self.node_visitors[id(node)]
+        visitor = self.node_visitors[id(node)] = self.visitor_for(node)
+        self.dispatched.append(node)
+        return visitor
+
+    def operand_visitor(self, node):
+        """The visitor a binary operation site evaluates its operand node with"""
+        if node["type"] == "BinaryExpression":
+            return self.adaptive_visit_node  # Its visitor changes as its own site adapts
+        return self.visitor_for(node)
+
+    def binary_site(self, node):
+        site = self.binary_sites.get(id(node))
+        if site is None:
+            site = self.binary_sites[id(node)] = BinarySite(node)
+        return site
+
+    def prepare(self, statements):
+        """Resolve the visitor of each statement once, ahead of a loop.
+
+        Returns a tuple of (visitor, node) pairs that can be executed on
+        every iteration without any per-pass lookups or allocations.
+        """
+        return tuple((self.visitor_for(statement), statement) for statement in statements)
+
+    def visitor_for(self, node):
+        visitor = self.visitors.get(node["type"])
+        if visitor is None:
+            visitor = self.visitors[node["type"]] = getattr(self, f'visit_{node["type"]}', self.generic_visit)
+        return visitor
+
     def generic_visit(self, node):
         raise Exception(f"No visit_{node['type']} method defined")
 
     def execute_statements(self, statements):
         result = None
-        for statement in statements:
-            result = self.visit_node(statement)
+        try:
+            for statement in statements:
+                result = self.visit_node(statement)
+                if self.returning:
+                    break
+        except Exception as error:
+            locate_error(error, statement)
+            raise
         return result
 
+    def covered_execute_statements(self, statements):
+        """execute_statements() that also marks each statement as run"""
+        ids = self.coverage.ids
+        bitmap = self.coverage.bitmap
+        result = None
+        try:
+            for statement in statements:
+                index = ids.get(id(statement))
+                if index is not None:
+                    bitmap[index] = 1
+                result = self.visit_node(statement)
+                if self.returning:
+                    break
+        except Exception as error:
+            locate_error(error, statement)
+            raise
+        return result
+
+    def covered_prepare(self, statements):
+        """prepare() with each visitor wrapped to mark its statement as run"""
+        ids = self.coverage.ids
+        bitmap = self.coverage.bitmap
+        prepared = []
+        for visitor, statement in ExecutionContext.prepare(self, statements):
+            index = ids.get(id(statement))
+            if index is not None:
+                visitor = self.covered_visitor(visitor, bitmap, index)
+            prepared.append((visitor, statement))
+        return tuple(prepared)
+
+    @staticmethod
+    def covered_visitor(visitor, bitmap, index):
+        def covered(node):
+            bitmap[index] = 1
+            return visitor(node)
+        return covered
+
+    def visit_IfStatement(self, node):
+        if self.visit_node(node["test"]):
+            return self.execute_statements(node["consequent"])
+        elif node["alternate"] is not None:
+            return self.execute_statements(node["alternate"])
+        return None
+
+    def visit_WhileStatement(self, node):
+        test = node["test"]
+        test_visitor = self.visitor_for(test)
+        body = self.prepare(node["body"])
+        budget = self.budget
+        cost = len(body) + 1
+        # statement is also read by sampling.SamplingProfiler; between
+        # iterations it is the loop itself
+        statement = node
+        
+        while test_visitor(test):
+            if budget is not None:
+                budget.steps += cost
+                if budget.steps >= budget.next_check:
+                    budget.check()
+            try:
+                for visitor, statement in body:
+                    visitor(statement)
+                    if self.returning:
+                        return None
+            except Exception as error:
+                locate_error(error, statement)
+                raise
+            statement = node
+        return None
+
+    def visit_ForStatement(self, node):
+        if node["init"] is not None:
+            self.visit_node(node["init"])
+        
+        test = node["test"]
+        test_visitor = self.visitor_for(test) if test is not None else None
+        update = node["update"]
+        update_visitor = self.visitor_for(update) if update is not None else None
+        body = self.prepare(node["body"])
+        budget = self.budget
+        cost = len(body) + 2
+        statement = node  # See visit_WhileStatement
+        
+        while test_visitor is None or test_visitor(test):
+            if budget is not None:
+                budget.steps += cost
+                if budget.steps >= budget.next_check:
+                    budget.check()
+            try:
+                for visitor, statement in body:
+                    visitor(statement)
+                    if self.returning:
+                        return None
+            except Exception as error:
+                locate_error(error, statement)
+                raise
+            statement = node
+            if update_visitor is not None:
+                update_visitor(update)
+        return None
+
+    def visit_ReturnStatement(self, node):
+        # Unwinding is signalled with a flag rather than an exception;
+        # statement lists and loops stop as soon as they see it set
+        argument = node["argument"]
+        self.return_value = self.visit_node(argument) if argument is not None else None
+        self.returning = True
+        return self.return_value
+
     def visit_FunctionDeclaration(self, node):
         # Function declarations are handled in the first pass
         pass
@@ -50,97 +298,137 @@ class Interpreter:
     def visit_PrintStatement(self, node):
         value = self.visit_node(node["expression"])
         if node["newline"]:
-            print(value)
+            self.write(f"{value}\n")
         else:
-            print(value, end="", flush=True)
+            self.write(str(value), flush=True)
         return None
 
+    def write(self, text, flush=False):
+        """Write program output, charging it to the output budget"""
+        if self.budget is not None:
+            self.budget.charge_output(text)
+        output = self.output if self.output is not None else sys.stdout
+        output.write(text)
+        if flush:
+            output.flush()
+
     def visit_CallStatement(self, node):
-        function_name = node["name"]
-        
-        # Handle built-in functions
-        if function_name in ["sleep", "exit"]:
-            # Evaluate arguments
-            args = [self.visit_node(arg) for arg in node["arguments"]] if "arguments" in node else []
-            
-            if function_name == "sleep":
-                if not args:
-                    raise TypeError("sleep() takes exactly 1 argument (0 given)")
-                time.sleep(float(args[0]))
-                return None
-            elif function_name == "exit":
-                exit_code = 0
-                if args:
-                    exit_code = int(args[0])
-                sys.exit(exit_code)
-                return None
-        
-        # Handle user-defined functions
-        if function_name not in self.functions:
-            line = node.get("line", "unknown")
-            raise NameError(f"Function '{function_name}' not defined at line {line}")
-        
-        function_def = self.functions[function_name]
-        
-        # Create a new scope for function execution
-        previous_env = self.environment.copy()
-        
-        # Handle arguments if provided
-        if "arguments" in node and node["arguments"] and len(function_def["params"]) > 0:
-            # Evaluate arguments
-            arg_values = [self.visit_node(arg) for arg in node["arguments"]]
-            
-            # Add arguments to function's environment
-            for i, param_name in enumerate(function_def["params"]):
-                if i < len(arg_values):
-                    self.environment[param_name] = arg_values[i]
-        
-        # Execute function body
-        result = self.execute_statements(function_def["body"])
-        
-        # Restore previous environment
-        self.environment = previous_env
-        
-        return result
+        return self.call(node)
 
     def visit_FunctionCall(self, node):
-        function_name = node["name"]
+        return self.call(node)
+
+    def call(self, node):
+        """Call the target a call site was linked to"""
+        target = self.links.get(id(node))
+        if target is None:
+            # Call sites outside the linked program (e.g. a lone node)
+            target = resolve(node["name"], self.functions, self.builtins)
+        args = [self.visit_node(arg) for arg in node["arguments"]]
+        return target.call(self, args, node)
+
+    def call_function(self, function_def, args, node=None):
+        """Run a user-defined function with already evaluated arguments.
+
+        A function sees its caller's variables and its assignments are
+        discarded when it returns. Rather than copying the environment on
+        every call, the caller's value of each variable the function
+        assigns is saved once and put back afterwards.
+
+        With a JIT (and no budget, since compiled code does not count
+        steps) hot functions run as compiled Python instead.
+
+        node is the call site, if known; it is pushed on the shadow stack
+        of a sampled context.
+        """
+        budget = self.budget
+        frames = self.frames
+        if frames is not None:
+            frames.append(node or function_def)
+        if self.jit is not None and budget is None:
+            native = self.jit.lookup(self, function_def)
+            if native is not None:
+                result = native.call(self, args)
+                if result is not DEOPT:
+                    if frames is not None:
+                        frames.pop()
+                    return result
+        if budget is not None:
+            budget.enter_call()
+            budget.charge(len(function_def["body"]))
+        environment = self.environment
+        caller_saved = self.saved
+        saved = self.saved = {}
         
-        # For built-in functions
-        if function_name in ["print", "println", "sleep", "exit"]:
-            args = [self.visit_node(arg) for arg in node["arguments"]]
-            if function_name == "println":
-                print(*args)
-            elif function_name == "print":
-                print(*args, end="")
-            elif function_name == "sleep":
-                if not args:
-                    raise TypeError("sleep() takes exactly 1 argument (0 given)")
-                time.sleep(float(args[0]))
-            elif function_name == "exit":
-                exit_code = 0
-                if args:
-                    exit_code = int(args[0])
-                sys.exit(exit_code)
-            return None
+        try:
+            # Add arguments to function's environment
+            for param_name, value in zip(function_def["params"], args):
+                if param_name not in saved:
+                    saved[param_name] = environment.get(param_name, _UNBOUND)
+                environment[param_name] = value
             
-        # For user-defined functions
-        if function_name not in self.functions:
-            line = node.get("line", "unknown")
-            raise NameError(f"Function '{function_name}' not defined at line {line}")
-        
-        function_def = self.functions[function_name]
-        
-        # Create a new scope for function execution
-        previous_env = self.environment.copy()
+            # Execute function body
+            result = self.execute_statements(function_def["body"])
+            if self.returning:
+                result = self.return_value
+                self.returning = False
+                self.return_value = None
+        except Exception as error:
+            annotate_error(error, function_def, function_def["name"])
+            raise
+        finally:
+            # Restore the caller's variables
+            for name, value in saved.items():
+                if value is _UNBOUND:
+                    del environment[name]
+                else:
+                    environment[name] = value
+            self.saved = caller_saved
+            if budget is not None:
+                budget.exit_call()
+            if frames is not None:
+                frames.pop()
         
-        # Execute function body
-        result = self.execute_statements(function_def["body"])
+        return result
+
+    def profile_call_function(self, function_def, args, node=None):
+        self.profile.enter(function_def["name"])
+        try:
+            return ExecutionContext.call_function(self, function_def, args, node)
+        finally:
+            self.profile.exit()
+
+    def traced_call_function(self, function_def, args, node=None):
+        """call_function() that records calls taking at least the tracer's threshold"""
+        start = time.perf_counter()
+        try:
+            return self.untraced_call_function(function_def, args, node)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.tracer.call_threshold:
+                self.tracer.add(function_def["name"], "call", start, duration)
+
+    def profile_IfStatement(self, node):
+        test = self.visit_node(node["test"])
+        self.profile.branch(node, test)
+        if test:
+            return self.execute_statements(node["consequent"])
+        elif node["alternate"] is not None:
+            return self.execute_statements(node["alternate"])
+        return None
+
+    def profile_BinaryExpression(self, node):
+        left = self.visit_node(node["left"])
+        right = self.visit_node(node["right"])
+        self.profile.observe(node, left, right)
         
-        # Restore previous environment
-        self.environment = previous_env
+        if self.adaptive:
+            return self.binary_site(node).evaluate(left, right)
         
-        return result
+        operation = GENERIC_OPERATORS.get(node["operator"])
+        if operation is None:
+            raise ValueError(f"Unknown operator: {node['operator']}")
+        return operation(left, right)
 
     def visit_StringLiteral(self, node):
         return node["value"]
@@ -148,6 +436,12 @@ class Interpreter:
     def visit_NumericLiteral(self, node):
         return node["value"]
 
+    def visit_BooleanLiteral(self, node):
+        return node["value"]
+
+    def visit_ArrayLiteral(self, node):
+        return Array.from_values([self.visit_node(element) for element in node["elements"]])
+
     def visit_Identifier(self, node):
         name = node["name"]
         if name in self.environment:
@@ -159,22 +453,104 @@ class Interpreter:
         right = self.visit_node(node["right"])
         
         if node["operator"] == "+":
-            return left + right
+            # Large string results become ropes so repeated appends stay linear
+            return concat(left, right)
         elif node["operator"] == "-":
             return left - right
         elif node["operator"] == "*":
             return left * right
         elif node["operator"] == "/":
             return left / right
+        elif node["operator"] == "==":
+            return left == right
+        elif node["operator"] == "!=":
+            return left != right
+        elif node["operator"] == "<":
+            return left < right
+        elif node["operator"] == "<=":
+            return left <= right
+        elif node["operator"] == ">":
+            return left > right
+        elif node["operator"] == ">=":
+            return left >= right
         else:
             raise ValueError(f"Unknown operator: {node['operator']}")
 
+    def specialization_stats(self):
+        """Describe the adaptive state of every binary operation site seen so far"""
+        lines = program_line_map(self.program) if self.program is not None else None
+        return [site.describe(lines) for site in self.binary_sites.values()]
+
     def visit_AssignmentStatement(self, node):
         """Execute an assignment statement."""
         var_name = node["name"]
         value = self.visit_node(node["value"])
         
+        # Inside a function, remember the caller's value first
+        saved = self.saved
+        if saved is not None and var_name not in saved:
+            saved[var_name] = self.environment.get(var_name, _UNBOUND)
+        
         # Store the value in the environment
         self.environment[var_name] = value
         
-        return value
\ No newline at end of file
+        return value
+
+
+class Interpreter(ExecutionContext):
+    """Runs Holy-D programs.
+
+    interpret() links a program and runs it in the interpreter's own
+    context, so variables and functions persist between calls (the REPL
+    relies on this). For concurrent use, load() a program once and call
+    run() from any number of threads: each run gets a fresh
+    ExecutionContext sharing the loaded function table and links.
+    """
+
+    def __init__(self, parser=None, adaptive=False, builtins=None, budget=None, output=None, jit=False, profile=None,
+                 coverage=None, clock=None, tracer=None):
+        builtins = builtins if builtins is not None else default_builtins()
+        super().__init__({}, {}, builtins, adaptive, budget, output, jit=JIT() if jit else None, profile=profile,
+                         coverage=coverage, clock=clock, tracer=tracer)
+        self.parser = parser
+        self.lock = threading.Lock()  # Serializes load()
+
+    def interpret(self, ast=None):
+        if ast is None and self.parser:
+            ast = self.parser.parse()
+        
+        if ast["type"] == "Program":
+            # First pass: register all functions and bind every call site
+            self.load(ast)
+            
+            # Second pass: execute entry point if exists
+            return self.execute_program(ast)
+        else:
+            return self.visit_node(ast)
+
+    def load(self, ast):
+        """Register the functions of ast and link its call sites"""
+        with self.lock:
+            # Replaced rather than updated, so running contexts keep a consistent table
+            self.functions, self.links = link(ast, self.builtins, self.functions)
+
+    def new_context(self, inputs=None, output=None, budget=None):
+        """Create a fresh ExecutionContext over the loaded program"""
+        return ExecutionContext(self.functions, self.links, self.builtins, self.adaptive,
+                                budget, output, dict(inputs) if inputs else None,
+                                JIT(self.jit.threshold) if self.jit is not None else None, clock=self.clock)
+
+    def run(self, ast, inputs=None, output=None, budget=None):
+        """Run an already loaded program in a fresh context; thread-safe.
+
+        Each concurrent run needs its own budget, if any.
+        """
+        return self.new_context(inputs, output, budget).execute_program(ast)
+
+    def register_builtin(self, name, function, min_args=0, max_args=None, context=False):
+        """Expose a native Python function to scripts run by this interpreter.
+
+        Call sites are bound when a program is loaded, so register
+        builtins before calling interpret() or load().
+        """
+        return self.builtins.register(name, function, min_args, max_args, context)
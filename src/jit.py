@@ -0,0 +1,420 @@
+import math
+
+try:
+    from src.rope import concat, flatten
+    from src.arrays import Array
+    from src.astutil import walk
+    from src.builtin_functions import Builtin
+    from src.linker import UserFunction, CALL_NODES
+    from src.linetable import line_map, set_error_location
+except ImportError:  # running as a script from inside src/
+    from rope import concat, flatten
+    from arrays import Array
+    from astutil import walk
+    from builtin_functions import Builtin
+    from linker import UserFunction, CALL_NODES
+    from linetable import line_map, set_error_location
+
+# Calls to a function before it is compiled to Python
+JIT_THRESHOLD = 10
+
+# Returned by compiled code that cannot handle a call; the interpreter runs it instead
+DEOPT = object()
+
+# Marks a variable that did not exist before a compiled function synced it
+_UNBOUND = object()
+
+# Python operators for Holy-D binary operators; + goes through rope.concat
+OPERATORS = {"-": "-", "*": "*", "/": "/", "==": "==", "!=": "!=",
+             "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _load(environment, name):
+    """Read a variable the compiled function does not assign"""
+    try:
+        return environment[name]
+    except KeyError:
+        raise NameError(f"Variable '{name}' not defined") from None
+
+
+def _restore(environment, saved):
+    for name, value in saved.items():
+        if value is _UNBOUND:
+            del environment[name]
+        else:
+            environment[name] = value
+
+
+def python_identifier(prefix, name):
+    """A Python identifier for a Holy-D name; distinct names get distinct identifiers.
+
+    Holy-D names may use any alphanumeric character, but Python rejects
+    some (such as superscripts) and merges others by NFKC normalization,
+    so names that are not plain ASCII are hex-encoded.
+    """
+    if all(ord(character) < 128 for character in name):
+        return f"{prefix}_{name}"
+    return f"{prefix}x_{name.encode('utf-8').hex()}"
+
+
+def local_names(declaration):
+    """Parameters and assigned variables of a function"""
+    names = set(declaration["params"])
+    for node in walk(declaration["body"]):
+        if node["type"] == "AssignmentStatement":
+            names.add(node["name"])
+    return names
+
+
+def free_names(declaration, links):
+    """Variables a call to declaration may read from its caller's scope.
+
+    Holy-D scoping is dynamic, so this includes the free variables of
+    everything the function calls that it does not assign itself.
+    """
+    # Collect the functions reachable through call links
+    reachable = {}
+    pending = [declaration]
+    while pending:
+        function = pending.pop()
+        if id(function) in reachable:
+            continue
+        callees = []
+        for node in walk(function["body"]):
+            if node["type"] in CALL_NODES:
+                target = links.get(id(node))
+                if isinstance(target, UserFunction):
+                    callees.append(target.declaration)
+        reachable[id(function)] = (function, callees)
+        pending.extend(callees)
+
+    # Propagate free variables up the call graph until nothing changes
+    locals_of = {key: local_names(function) for key, (function, _) in reachable.items()}
+    free = {}
+    for key, (function, _) in reachable.items():
+        reads = {node["name"] for node in walk(function["body"]) if node["type"] == "Identifier"}
+        free[key] = reads - locals_of[key]
+    changed = True
+    while changed:
+        changed = False
+        for key, (function, callees) in reachable.items():
+            for callee in callees:
+                extra = free[id(callee)] - locals_of[key] - free[key]
+                if extra:
+                    free[key] |= extra
+                    changed = True
+    return free[id(declaration)]
+
+
+class NativeFunction:
+    """A Holy-D function compiled to a Python function"""
+
+    __slots__ = ('declaration', 'name', 'source', 'function', 'filename', 'lines', 'links')
+
+    def __init__(self, declaration, source, function, filename, lines, links):
+        self.declaration = declaration
+        self.name = declaration["name"]
+        self.source = source
+        self.function = function
+        self.filename = filename
+        self.lines = lines  # Holy-D line of each generated line
+        self.links = links
+
+    def call(self, context, args):
+        try:
+            return self.function(context, args)
+        except Exception as error:
+            set_error_location(error, self.name, self.line_for(error))
+            raise
+
+    def line_for(self, error):
+        """Return the Holy-D line the innermost frame of this function failed on"""
+        line = None
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == self.filename:
+                index = traceback.tb_lineno - 1
+                line = self.lines[index] if 0 <= index < len(self.lines) else None
+            traceback = traceback.tb_next
+        return line
+
+
+class Translator:
+    """Translate one function declaration into Python source.
+
+    Parameters and assigned variables become Python locals. Other
+    variables are read from the caller's environment, and locals a
+    callee may read are copied into the environment (and restored on
+    return) before the call. Anything the translator cannot express
+    faithfully raises NotImplementedError, and the function stays
+    interpreted.
+    """
+
+    def __init__(self, declaration, links):
+        self.declaration = declaration
+        self.links = links
+        self.locals = local_names(declaration)
+        self.node_lines = line_map(declaration)
+        self.constants = {}
+        self.lines = []
+        self.line_numbers = []
+        self.line = None
+        self.assigned = set()  # Locals definitely assigned at this point
+        self.syncs = False
+
+    def translate(self):
+        declaration = self.declaration
+        params = declaration["params"]
+        self.assigned = set(params)
+        self.line = self.node_lines.get(id(declaration))
+        self.emit(0, f"def {self.python_name()}(context, args):")
+        self.emit(1, f"if len(args) != {len(params)}:")
+        self.emit(2, "return _DEOPT")
+        if params:
+            self.emit(1, f"{', '.join(self.variable(name) for name in params)}, = args")
+        self.emit(1, "environment = context.environment")
+        self.emit(1, "write = context.write")
+        header = len(self.lines)
+        self.emit(1, "try:")
+        self.statements(declaration["body"], 2, tail=True)
+        if self.syncs:
+            self.lines.insert(header, "    saved = {}")
+            self.line_numbers.insert(header, self.line)
+            self.emit(1, "finally:")
+            self.emit(2, "_restore(environment, saved)")
+        else:
+            # Nothing to restore: drop the try and dedent the body
+            del self.lines[header]
+            del self.line_numbers[header]
+            self.lines[header:] = [line[4:] for line in self.lines[header:]]
+        return "\n".join(self.lines) + "\n"
+
+    def python_name(self):
+        return python_identifier("holy_d", self.declaration["name"])
+
+    def emit(self, depth, text):
+        self.lines.append("    " * depth + text)
+        self.line_numbers.append(self.line)
+
+    def constant(self, value):
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def variable(self, name):
+        return python_identifier("v", name)
+
+    def statements(self, statements, depth, tail=False):
+        if not statements:
+            self.emit(depth, "return None" if tail else "pass")
+            return
+        for index, statement in enumerate(statements):
+            self.statement(statement, depth, tail and index == len(statements) - 1)
+
+    def statement(self, node, depth, tail):
+        """Emit a statement; tail statements also return the interpreter's result"""
+        line = self.node_lines.get(id(node))
+        if line is not None:
+            self.line = line
+        generator = getattr(self, f'translate_{node["type"]}', None)
+        if generator is None:
+            raise NotImplementedError(f"Cannot compile {node['type']} nodes")
+        generator(node, depth, tail)
+
+    def translate_AssignmentStatement(self, node, depth, tail):
+        value = self.expression(node["value"])
+        self.assigned.add(node["name"])
+        self.emit(depth, f"{self.variable(node['name'])} = {value}")
+        if tail:
+            self.emit(depth, f"return {self.variable(node['name'])}")
+
+    def translate_PrintStatement(self, node, depth, tail):
+        value = self.expression(node["expression"])
+        if node["newline"]:
+            self.emit(depth, f"write(str({value}) + \"\\n\")")
+        else:
+            self.emit(depth, f"write(str({value}), True)")
+        if tail:
+            self.emit(depth, "return None")
+
+    def translate_CallStatement(self, node, depth, tail):
+        call = self.call(node, depth)
+        self.emit(depth, f"return {call}" if tail else call)
+
+    def translate_ReturnStatement(self, node, depth, tail):
+        argument = node["argument"]
+        self.emit(depth, f"return {self.expression(argument) if argument is not None else 'None'}")
+
+    def translate_IfStatement(self, node, depth, tail):
+        self.emit(depth, f"if {self.expression(node['test'])}:")
+        before = set(self.assigned)
+        self.statements(node["consequent"], depth + 1, tail)
+        consequent = self.assigned
+        self.assigned = set(before)
+        if node["alternate"] is not None or tail:
+            self.emit(depth, "else:")
+            self.statements(node["alternate"] or [], depth + 1, tail)
+        self.assigned &= consequent
+
+    def translate_WhileStatement(self, node, depth, tail):
+        self.emit(depth, f"while {self.expression(node['test'])}:")
+        before = set(self.assigned)
+        self.statements(node["body"], depth + 1)
+        self.assigned = before
+        if tail:
+            self.emit(depth, "return None")
+
+    def translate_ForStatement(self, node, depth, tail):
+        if node["init"] is not None:
+            self.statement(node["init"], depth, False)
+        test = self.expression(node["test"]) if node["test"] is not None else "True"
+        self.emit(depth, f"while {test}:")
+        before = set(self.assigned)
+        self.statements(node["body"], depth + 1)
+        if node["update"] is not None:
+            self.statement(node["update"], depth + 1, False)
+        self.assigned = before
+        if tail:
+            self.emit(depth, "return None")
+
+    def expression(self, node):
+        generator = getattr(self, f'expression_{node["type"]}', None)
+        if generator is None:
+            raise NotImplementedError(f"Cannot compile {node['type']} nodes")
+        return generator(node)
+
+    def expression_StringLiteral(self, node):
+        value = node["value"]
+        if type(value) in (int, bool, str) or (type(value) is float and math.isfinite(value)):
+            return repr(value)
+        return self.constant(value)
+
+    expression_NumericLiteral = expression_StringLiteral
+    expression_BooleanLiteral = expression_StringLiteral
+
+    def expression_ArrayLiteral(self, node):
+        elements = ", ".join(self.expression(element) for element in node["elements"])
+        return f"_array([{elements}])"
+
+    def expression_Identifier(self, node):
+        name = node["name"]
+        if name not in self.locals:
+            return f"_load(environment, {name!r})"
+        if name not in self.assigned:
+            # The interpreter would read the caller's variable here
+            raise NotImplementedError(f"'{name}' may be read before it is assigned")
+        return self.variable(name)
+
+    def expression_BinaryExpression(self, node):
+        left = self.expression(node["left"])
+        right = self.expression(node["right"])
+        if node["operator"] == "+":
+            if "NumericLiteral" not in (node["left"]["type"], node["right"]["type"]):
+                return f"_concat({left}, {right})"
+            # A number on either side rules out string concatenation
+            return f"({left} + {right})"
+        operator = OPERATORS.get(node["operator"])
+        if operator is None:
+            raise NotImplementedError(f"Unknown operator: {node['operator']}")
+        return f"({left} {operator} {right})"
+
+    def expression_FunctionCall(self, node):
+        return self.call(node, None)
+
+    def call(self, node, depth):
+        """Return a call expression, syncing locals the callee may read first"""
+        target = self.links.get(id(node))
+        if target is None:
+            raise NotImplementedError(f"Call to '{node['name']}' is not linked")
+        args = [self.expression(argument) for argument in node["arguments"]]
+        if isinstance(target, UserFunction):
+            shared = self.locals & free_names(target.declaration, self.links)
+            if shared:
+                if depth is None or shared - self.assigned:
+                    # Only statement calls can be preceded by the sync
+                    raise NotImplementedError(f"Cannot share {sorted(shared)} with '{node['name']}'")
+                self.syncs = True
+                for name in sorted(shared):
+                    self.emit(depth, f"if {name!r} not in saved:")
+                    self.emit(depth + 1, f"saved[{name!r}] = environment.get({name!r}, _UNBOUND)")
+                    self.emit(depth, f"environment[{name!r}] = {self.variable(name)}")
+            return f"context.call_function({self.constant(target.declaration)}, [{', '.join(args)}], {self.constant(node)})"
+        if isinstance(target, Builtin) and not target.context and (
+                target.min_args <= len(args) and (target.max_args is None or len(args) <= target.max_args)):
+            # Arity already checked: call the native function directly
+            return f"{self.constant(target.function)}({', '.join(f'_flatten({arg})' for arg in args)})"
+        return f"{self.constant(target)}.call(context, [{', '.join(args)}], {self.constant(node)})"
+
+
+class JIT:
+    """Compile hot functions of one ExecutionContext to Python.
+
+    Every call to a user function is counted; after `threshold` calls the
+    function is translated to Python source and compiled with compile().
+    Functions using constructs the translator does not support, and
+    calls the compiled code cannot handle (such as a wrong number of
+    arguments), deoptimize: they run in the interpreter as before.
+    """
+
+    def __init__(self, threshold=JIT_THRESHOLD):
+        self.threshold = threshold
+        self.counts = {}    # id(declaration) -> calls so far
+        self.compiled = {}  # id(declaration) -> NativeFunction, or None if unsupported
+        self.failures = {}  # function name -> why it was not compiled
+
+    def lookup(self, context, declaration):
+        """Count a call and return the declaration's NativeFunction, if any"""
+        key = id(declaration)
+        native = self.compiled.get(key)
+        if native is not None:
+            if native.declaration is declaration and native.links is context.links:
+                return native
+            # Relinked (e.g. by another load()) or a reused id: start again
+            del self.compiled[key]
+            self.counts[key] = 0
+        elif key in self.compiled:
+            return None
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count < self.threshold:
+            return None
+        native = self.compiled[key] = self.compile(declaration, context.links)
+        return native
+
+    def precompile(self, context, declaration):
+        """Compile a declaration before its first call (e.g. because a profile says it is hot)"""
+        native = self.compiled[id(declaration)] = self.compile(declaration, context.links)
+        return native is not None
+
+    def compile(self, declaration, links):
+        """Translate and compile a declaration, or return None if unsupported"""
+        translator = Translator(declaration, links)
+        try:
+            source = translator.translate()
+        except NotImplementedError as error:
+            self.failures[declaration["name"]] = str(error)
+            return None
+        filename = f"<holy-d jit {declaration['name']}>"
+        namespace = {
+            "_DEOPT": DEOPT,
+            "_UNBOUND": _UNBOUND,
+            "_load": _load,
+            "_restore": _restore,
+            "_concat": concat,
+            "_flatten": flatten,
+            "_array": Array.from_values,
+        }
+        namespace.update(translator.constants)
+        exec(compile(source, filename, "exec"), namespace)
+        function = namespace[translator.python_name()]
+        return NativeFunction(declaration, source, function, filename, translator.line_numbers, links)
+
+    def dump(self):
+        """Return the generated source of every compiled function, for inspection"""
+        parts = []
+        for native in self.compiled.values():
+            if native is not None:
+                parts.append(f"# {native.name}\n{native.source}")
+        for name, reason in self.failures.items():
+            parts.append(f"# {name}: not compiled: {reason}\n")
+        return "\n".join(parts)
@@ -3,5 +3,7 @@ from src.parser import Parser
 from src.interpreter import Interpreter
 from src.compiler import Compiler
 from src.language.syntax import Syntax
+from src.builtin_functions import BuiltinRegistry
+from src.program import Program, compile
 
-__all__ = ['Lexer', 'Parser', 'Interpreter', 'Compiler', 'Syntax']
\ No newline at end of file
+__all__ = ['Lexer', 'Parser', 'Interpreter', 'Compiler', 'Syntax', 'BuiltinRegistry', 'Program', 'compile']
\ No newline at end of file
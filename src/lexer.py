@@ -1,26 +1,37 @@
+from array import array
+
+try:
+    from src.syntax import Syntax
+except ImportError:  # running as a script from inside src/
+    from syntax import Syntax
+
+KEYWORDS = Syntax.keyword_tokens()
+
+
+class TokenList(list):
+    """The tokens of a source file, plus the line each token starts on.
+
+    Behaves exactly like a list of token tuples; `lines` is a parallel
+    compact array the parser reads positions from.
+    """
+
+    def __init__(self, tokens=(), lines=None):
+        super().__init__(tokens)
+        self.lines = lines if lines is not None else array('I')
+
+
 class Lexer:
-    def __init__(self, source_code=""):
+    def __init__(self, source_code="", line=1, column=1, offset=0):
         self.source_code = source_code
         self.position = 0
-        self.line = 1  # Track current line
-        self.column = 1  # Track current column
+        self.line = line  # Track current line
+        self.column = column  # Track current column
+        self.offset = offset  # Position of source_code within the whole file
         self.current_char = self.source_code[self.position] if self.source_code else None
         self.tokens = []
         
-        # Keywords in Holy-D
-        self.keywords = {
-            'func': 'FUNC',
-            'enter': 'ENTER',
-            'call': 'CALL',
-            'print': 'PRINT',
-            'println': 'PRINTLN',
-            'if': 'IF',
-            'else': 'ELSE',
-            'while': 'WHILE',
-            'for': 'FOR',
-            'return': 'RETURN',
-            'assign': 'ASSIGN'
-        }
+        # Keywords in Holy-D, with their token types
+        self.keywords = KEYWORDS
 
     def advance(self):
         if self.current_char == '\n':
@@ -44,48 +55,50 @@ class Lexer:
             self.advance()
 
     def identifier(self):
-        result = ''
+        # Slice the lexeme out of the source rather than growing a string
+        start = self.position
         while self.current_char and (self.current_char.isalnum() or self.current_char == '_'):
-            result += self.current_char
             self.advance()
+        result = self.source_code[start:self.position]
         
         # Check if identifier is a keyword
         token_type = self.keywords.get(result, 'IDENTIFIER')
         return (token_type, result)
 
     def number(self):
-        result = ''
+        start = self.position
         while self.current_char and self.current_char.isdigit():
-            result += self.current_char
             self.advance()
         
         if self.current_char == '.':
-            result += self.current_char
             self.advance()
             while self.current_char and self.current_char.isdigit():
-                result += self.current_char
                 self.advance()
-            return ('FLOAT', float(result))
+            return ('FLOAT', float(self.source_code[start:self.position]))
         
-        return ('NUMBER', int(result))
+        return ('NUMBER', int(self.source_code[start:self.position]))
 
     def string(self):
-        result = ''
+        parts = []
         # Skip the opening quote
         self.advance()
+        start = self.position
         
         while self.current_char and self.current_char != '"':
             if self.current_char == '\\' and self.position + 1 < len(self.source_code):
+                parts.append(self.source_code[start:self.position])
                 self.advance()
                 if self.current_char == 'n':
-                    result += '\n'
+                    parts.append('\n')
                 elif self.current_char == 't':
-                    result += '\t'
+                    parts.append('\t')
                 else:
-                    result += self.current_char
+                    parts.append(self.current_char)
+                self.advance()
+                start = self.position
             else:
-                result += self.current_char
-            self.advance()
+                self.advance()
+        parts.append(self.source_code[start:self.position])
         
         # Skip the closing quote
         if self.current_char == '"':
@@ -93,7 +106,7 @@ class Lexer:
         else:
             raise ValueError("Unclosed string literal")
             
-        return ('STRING', result)
+        return ('STRING', ''.join(parts))
 
     def get_next_token(self):
         if self.position < len(self.tokens):
@@ -106,12 +119,20 @@ class Lexer:
             self.position = 0
             self.line = 1
             self.column = 1
+            self.offset = 0
             self.current_char = self.source_code[self.position] if self.source_code else None
             self.tokens = []
 
-        tokens = []
+        tokens = TokenList()
+        lines = tokens.lines
+        token_line = self.line
         
         while self.current_char:
+            # Every branch appends at most one token, starting on token_line
+            if len(tokens) > len(lines):
+                lines.append(token_line)
+            token_line = self.line
+            
             if self.current_char.isspace():
                 self.skip_whitespace()
                 continue
@@ -145,6 +166,16 @@ class Lexer:
                 self.advance()
                 continue
                 
+            if self.current_char == '[':
+                tokens.append(('LBRACKET', '[', self.line, self.column))
+                self.advance()
+                continue
+                
+            if self.current_char == ']':
+                tokens.append(('RBRACKET', ']', self.line, self.column))
+                self.advance()
+                continue
+                
             if self.current_char == '(':
                 tokens.append(('LPAREN', '(', self.line, self.column))
                 self.advance()
@@ -194,12 +225,38 @@ class Lexer:
                     tokens.append(('ASSIGN', '='))
                 continue
                 
+            if self.current_char == '!' and self.position + 1 < len(self.source_code) and self.source_code[self.position + 1] == '=':
+                tokens.append(('NOT_EQUALS', '!='))
+                self.advance()
+                self.advance()
+                continue
+                
+            if self.current_char == '<':
+                self.advance()
+                if self.current_char == '=':
+                    tokens.append(('LESS_EQUAL', '<='))
+                    self.advance()
+                else:
+                    tokens.append(('LESS', '<'))
+                continue
+                
+            if self.current_char == '>':
+                self.advance()
+                if self.current_char == '=':
+                    tokens.append(('GREATER_EQUAL', '>='))
+                    self.advance()
+                else:
+                    tokens.append(('GREATER', '>'))
+                continue
+                
             if self.current_char == ':':
                 tokens.append(('COLON', ':'))
                 self.advance()
                 continue
             
             # If we get here, character is not recognized
-            raise ValueError(f"Unrecognized character: '{self.current_char}' at position {self.position}, line {self.line}, column {self.column}")
-            
+            raise ValueError(f"Unrecognized character: '{self.current_char}' at position {self.offset + self.position}, line {self.line}, column {self.column}")
+        
+        if len(tokens) > len(lines):
+            lines.append(token_line)
         return tokens
\ No newline at end of file
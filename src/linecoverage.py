@@ -0,0 +1,163 @@
+import os
+import json
+
+try:
+    from src.astutil import walk
+    from src.linetable import line_map, UNKNOWN_LINE
+    from src.compiler import STATEMENT_TYPES
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+    from linetable import line_map, UNKNOWN_LINE
+    from compiler import STATEMENT_TYPES
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; merges are then unlocked
+    fcntl = None
+
+COVERAGE_VERSION = 1
+
+
+def number_statements(ast):
+    """Assign every statement of a Program an ID, in walk order.
+
+    Returns ({id(node): statement ID}, [(function, line)] indexed by
+    statement ID). Entry blocks are named "<enter>". The init and update
+    clauses of a for loop are part of the loop, not statements of their own.
+    """
+    ids = {}
+    statements = []
+    for declaration in ast["body"]:
+        if declaration["type"] == "FunctionDeclaration":
+            name = declaration["name"]
+        elif declaration["type"] == "EntryPoint":
+            name = "<enter>"
+        else:
+            continue
+        lines = line_map(declaration)
+        clauses = set()
+        for node in walk(declaration):
+            if node["type"] == "ForStatement":
+                clauses.update(id(clause) for clause in (node["init"], node["update"]) if clause is not None)
+            if node["type"] in STATEMENT_TYPES and id(node) not in clauses:
+                ids[id(node)] = len(statements)
+                statements.append((name, lines.get(id(node), UNKNOWN_LINE)))
+    return ids, statements
+
+
+class CoverageRecorder:
+    """Records which statements of one Program run.
+
+    Statement IDs are assigned when the recorder is created (see
+    number_statements) and a bytearray with one entry per statement is
+    allocated up front, so recording an executed statement is a single
+    item store. An ExecutionContext created with a recorder does this
+    in its statement loops.
+    """
+
+    def __init__(self, ast):
+        self.ids, self.statements = number_statements(ast)
+        self.bitmap = bytearray(len(self.statements))
+
+    def data(self, digest=None):
+        """This run's coverage in its persisted form"""
+        return {
+            "digest": digest,
+            "runs": 1,
+            "statements": [list(statement) for statement in self.statements],
+            "hits": list(self.bitmap),
+        }
+
+
+def merge(previous, current):
+    """Combine a script's coverage from earlier runs with a new run's.
+
+    hits counts the runs that executed each statement. Coverage of a
+    different version of the script is replaced.
+    """
+    if not previous or previous.get("digest") != current["digest"]:
+        return current
+    merged = dict(current)
+    merged["runs"] = previous["runs"] + current["runs"]
+    merged["hits"] = [old + new for old, new in zip(previous["hits"], current["hits"])]
+    return merged
+
+
+def load_coverage(path):
+    """Read a coverage file: {"version": 1, "scripts": {script path: coverage}}"""
+    try:
+        with open(path) as coverage_file:
+            coverage = json.load(coverage_file)
+    except (OSError, ValueError):
+        return {"version": COVERAGE_VERSION, "scripts": {}}
+    if coverage.get("version") != COVERAGE_VERSION:
+        return {"version": COVERAGE_VERSION, "scripts": {}}
+    return coverage
+
+
+def save_coverage(path, script_path, data):
+    """Merge one run's coverage of script_path into the coverage file at path.
+
+    Processes merging into the same file are serialized with a lock file
+    where fcntl is available, and the file is replaced atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path + ".lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        coverage = load_coverage(path)
+        key = os.path.abspath(script_path)
+        coverage["scripts"][key] = merge(coverage["scripts"].get(key), data)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as coverage_file:
+            json.dump(coverage, coverage_file, separators=(',', ':'))
+        os.replace(temporary, path)
+    return coverage
+
+
+def _ranges(lines):
+    """Format sorted line numbers as "1, 4-6" """
+    parts = []
+    for line in lines:
+        if parts and parts[-1][1] == line - 1:
+            parts[-1][1] = line
+        else:
+            parts.append([line, line])
+    return ", ".join(str(start) if start == end else f"{start}-{end}" for start, end in parts)
+
+
+def format_report(coverage, lines=False):
+    """Describe a coverage file per function, and optionally per line"""
+    output = []
+    for script, data in sorted(coverage["scripts"].items()):
+        statements = data["statements"]
+        hits = data["hits"]
+        executed = sum(1 for count in hits if count)
+        percent = 100.0 * executed / len(statements) if statements else 100.0
+        output.append(f"{script}: {executed}/{len(statements)} statements ({percent:.1f}%) in {data['runs']} run(s)")
+
+        functions = {}
+        for (function, line), count in zip(statements, hits):
+            entry = functions.setdefault(function, [0, 0, set()])  # statements, executed, missed lines
+            entry[0] += 1
+            if count:
+                entry[1] += 1
+            else:
+                entry[2].add(line)
+        width = max(len(name) for name in functions) if functions else 8
+        for function, (total, covered, missed) in functions.items():
+            row = f"  {function:<{width}} {covered:>5}/{total:<5} {100.0 * covered / total:6.1f}%"
+            if missed:
+                row += f"  missed lines {_ranges(sorted(missed))}"
+            output.append(row)
+
+        if lines:
+            # A line counts as run as often as its most executed statement
+            by_line = {}
+            for (function, line), count in zip(statements, hits):
+                by_line[(line, function)] = max(count, by_line.get((line, function), 0))
+            output.append(f"  {'line':>6} {'runs':>6}  function")
+            for (line, function), runs in sorted(by_line.items()):
+                output.append(f"  {line:>6} {runs if runs else '#####':>6}  {function}")
+    return "\n".join(output)
@@ -0,0 +1,126 @@
+import base64
+
+try:
+    from src.astutil import walk
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+
+# Line number recorded for nodes and instructions with no known position
+UNKNOWN_LINE = 0
+
+
+def encode(lines):
+    """Delta-encode a sequence of line numbers into a compact ASCII string.
+
+    Each entry is the difference from the previous line, zigzag-encoded
+    (so small negative deltas stay small) and written as a base-128
+    varint. Consecutive nodes are almost always on the same or the next
+    line, so most entries take one byte. The bytes are base64 encoded so
+    the table survives the JSON AST cache.
+    """
+    data = bytearray()
+    previous = 0
+    for line in lines:
+        delta = line - previous
+        previous = line
+        value = (delta << 1) ^ (delta >> 63)
+        while value >= 0x80:
+            data.append((value & 0x7f) | 0x80)
+            value >>= 7
+        data.append(value)
+    return base64.b64encode(bytes(data)).decode('ascii')
+
+
+def decode(table):
+    """Decode a table produced by encode() back into a list of lines"""
+    lines = []
+    previous = 0
+    value = 0
+    shift = 0
+    for byte in base64.b64decode(table):
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += (value >> 1) ^ -(value & 1)
+        lines.append(previous)
+        value = 0
+        shift = 0
+    return lines
+
+
+def build_line_table(declaration, node_lines):
+    """Store the lines of every node in a top-level declaration as its "linetable".
+
+    node_lines maps id(node) to the node's line. The table lists lines in
+    astutil.walk() order, which is how line_map() reads it back.
+    """
+    declaration["linetable"] = encode(node_lines.get(id(node), UNKNOWN_LINE) for node in walk(declaration))
+    return declaration
+
+
+def line_map(declaration):
+    """Decode a declaration's line table into {id(node): line}"""
+    table = declaration.get("linetable")
+    if table is None:
+        return {}
+    return {id(node): line for node, line in zip(walk(declaration), decode(table)) if line != UNKNOWN_LINE}
+
+
+def line_of(declaration, node):
+    """Return the line of node inside declaration, or None if unknown.
+
+    Decodes lazily and stops at the node, so it is meant for cold paths
+    such as error reporting.
+    """
+    table = declaration.get("linetable")
+    if table is None:
+        return None
+    for candidate, line in zip(walk(declaration), decode(table)):
+        if candidate is node:
+            return line if line != UNKNOWN_LINE else None
+    return None
+
+
+def program_line_map(ast):
+    """Decode the line tables of every declaration in a Program"""
+    lines = {}
+    for declaration in ast["body"]:
+        lines.update(line_map(declaration))
+    return lines
+
+
+def locate_error(error, node):
+    """Remember the innermost node that was executing when error was raised"""
+    if getattr(error, "holy_d_node", None) is None:
+        error.holy_d_node = node
+
+
+def annotate_error(error, declaration, name):
+    """Resolve the line of a located error against the declaration it escaped.
+
+    Only the innermost declaration annotates an error; the line and
+    function are also added as an exception note for tracebacks.
+    """
+    node = getattr(error, "holy_d_node", None)
+    if node is None or getattr(error, "holy_d_function", None) is not None:
+        return
+    set_error_location(error, name, line_of(declaration, node))
+
+
+def set_error_location(error, name, line):
+    """Record the function and line an error escaped from, unless already set"""
+    if getattr(error, "holy_d_function", None) is not None:
+        return
+    error.holy_d_function = name
+    error.holy_d_line = line
+    if line is not None and hasattr(error, "add_note"):  # Notes are new in Python 3.11
+        error.add_note(f"Holy-D: line {line}, in {name}")
+
+
+def format_error(error):
+    """Return str(error) followed by its Holy-D location, when known"""
+    line = getattr(error, "holy_d_line", None)
+    if line is None:
+        return str(error)
+    return f"{error} (line {line}, in {error.holy_d_function})"
@@ -0,0 +1,79 @@
+try:
+    from src.astutil import walk
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+
+CALL_NODES = ("CallStatement", "FunctionCall")
+
+
+class UserFunction:
+    """Call target for a Holy-D `func:` declaration"""
+
+    __slots__ = ('name', 'declaration')
+
+    def __init__(self, declaration):
+        self.name = declaration["name"]
+        self.declaration = declaration
+
+    def call(self, interpreter, args, node):
+        return interpreter.call_function(self.declaration, args, node)
+
+
+class UnresolvedFunction:
+    """Call target for a name that is neither declared nor a builtin.
+
+    Calling an undefined function is only an error when the call actually
+    runs, so linking binds such sites to this instead of failing.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def call(self, interpreter, args, node):
+        # The line is added by whoever runs the call, from its line table
+        raise NameError(f"Function '{self.name}' not defined")
+
+
+def resolve(name, functions, builtins):
+    """Return the call target for name.
+
+    Declared functions take precedence, so a script that defines a
+    function keeps calling it when a builtin of the same name is added.
+    """
+    declaration = functions.get(name)
+    if declaration is not None:
+        return UserFunction(declaration)
+    builtin = builtins.get(name)
+    if builtin is not None:
+        return builtin
+    return UnresolvedFunction(name)
+
+
+def link(ast, builtins, functions=None):
+    """Bind every call site in ast to its target.
+
+    Returns (functions, links): the function declarations by name, merged
+    with any already known, and a dict mapping id(call node) to the
+    target it calls. One target object is shared by all sites calling the
+    same name. The links are only valid while ast is alive.
+    """
+    functions = dict(functions or {})
+    previous = list(functions.values())
+    for node in ast["body"]:
+        if node["type"] == "FunctionDeclaration":
+            functions[node["name"]] = node
+
+    # Previously declared functions are relinked too, so their bodies see
+    # functions declared since (the REPL declares them one line at a time)
+    targets = {}
+    links = {}
+    for node in walk([ast] + previous):
+        if node["type"] in CALL_NODES:
+            name = node["name"]
+            target = targets.get(name)
+            if target is None:
+                target = targets[name] = resolve(name, functions, builtins)
+            links[id(node)] = target
+    return functions, links
@@ -3,61 +3,198 @@ import os
 import traceback
 import json
 import pathlib
+import contextlib
 from lexer import Lexer
 from parser import Parser
 from interpreter import Interpreter
+from frontend import parse_source
+from compiler import Compiler
+from vm import VM
+from budget import Budget, BudgetExceeded
+from clock import VirtualClock
+from linetable import format_error
+from cache import save_ast, format_stats, default_store
+from tracing import Tracer, trace_parser, trace_store, DEFAULT_CALL_THRESHOLD
+from memstats import MemoryStats, count_nodes, count_distinct_nodes
+from modules import resolve_imports
+from hashcons import intern_ast
+from pgo import ProfileRecorder, program_digest, load_profile, save_profile, merge, apply_profile
+from linecoverage import CoverageRecorder, save_coverage, load_coverage, format_report
+from sampling import SamplingProfiler, DEFAULT_INTERVAL
+from inline import inline_functions, format_report as format_inline_report, DEFAULT_MAX_SIZE
+from resultcache import nondeterminism, load_result, drop_result, clear_results, replay_result, ResultRecorder
+from version import VERSION
 import argparse
+import signal
 
-def save_ast(ast, file_path):
-    """Save the abstract syntax tree to a cache directory in the same folder as the script file, similar to __pycache__."""
-    # Get the directory where the script file is located
-    script_dir = os.path.dirname(os.path.abspath(file_path))
-    hd_cache_dir = os.path.join(script_dir, "_holy_d_cache")
-    
-    # Create the cache directory if it doesn't exist
-    os.makedirs(hd_cache_dir, exist_ok=True)
-    
-    # Use the base filename without its extension for the AST file
-    base_filename = os.path.splitext(os.path.basename(file_path))[0]
-    ast_file_path = os.path.join(hd_cache_dir, f"{base_filename}.hdast")
-    
-    try:
-        with open(ast_file_path, 'w') as ast_file:
-            json.dump(ast, ast_file, indent=2)
-        print(f"AST saved to {ast_file_path}")
-        return True
-    except Exception as e:
-        print(f"Error saving AST: {str(e)}")
-        return False
+# Options of the tree-walking interpreter that the bytecode VM does not support
+INTERPRETER_ONLY = (("adaptive", "--adaptive"), ("jit", "--jit"), ("jit_dump", "--jit-dump"),
+                    ("profile", "--profile"), ("coverage", "--coverage"),
+                    ("sample", "--sample"))
 
-def run_file(file_path):
+def run_file(file_path, *, jobs=None, adaptive=False, bytecode=False, peephole=True, budget=None, jit=False, jit_dump=False,
+             memstats=False, profile=False, coverage=None, sample=None, sample_interval=None,
+             inline=None, inline_report=False, virtual_clock=None, cache_stats=False, trace=None,
+             trace_threshold=None, result_cache=False, invalidate_result=False, hash_cons=False):
     """Run a Holy-D script file"""
+    stats = MemoryStats() if memstats else None
+    tracer = Tracer(trace_threshold if trace_threshold is not None else DEFAULT_CALL_THRESHOLD) if trace else None
+    
+    def phase(name):
+        phases = contextlib.ExitStack()
+        if stats is not None:
+            phases.enter_context(stats.phase(name))
+        if tracer is not None:
+            phases.enter_context(tracer.span(name))
+        return phases
+    
     try:
-        with open(file_path, 'r') as file:
-            source_code = file.read()
+        if tracer is not None:
+            trace_store(default_store(), tracer)
+        with phase("read"):
+            with open(file_path, 'r') as file:
+                source_code = file.read()
         
-        lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
-
-        parser = Parser(tokens)
-        ast = parser.parse()
+        if invalidate_result:
+            drop_result(file_path, source_code)
+        # Options that need the script to really run bypass the result cache
+        replayable = result_cache and not (budget is not None or profile or coverage or sample or jit_dump or inline_report)
+        if replayable:
+            with phase("result_cache"):
+                cached = load_result(file_path, source_code)
+            if cached is not None:
+                # Same script, imports and toolchain: skip straight to the output
+                replay_result(cached)
+                return None
+        
+        if stats is not None or tracer is not None:
+            # Lex and parse serially so both phases are measured in this process
+            if stats is not None:
+                stats.start()
+            with phase("lex"):
+                tokens = Lexer().tokenize(source_code)
+            if stats is not None:
+                stats.count("tokens", len(tokens))
+            with phase("parse"):
+                parser = Parser(tokens, hash_cons)
+                if tracer is not None:
+                    trace_parser(parser, tracer)
+                ast = parser.parse()
+                del tokens, parser
+        else:
+            # Large files are lexed and parsed in parallel
+            ast = parse_source(source_code, jobs, hash_cons)
+        
+        # Add the functions of imported modules, each cached on its own
+        imported = []
+        with phase("imports"):
+            ast = resolve_imports(ast, file_path, jobs, imported)
+            if hash_cons and imported:
+                # Share expressions between the script and its modules too
+                ast = intern_ast(ast)
+        if stats is not None:
+            stats.count("ast nodes", count_nodes(ast))
+            if hash_cons:
+                stats.count("distinct ast nodes", count_distinct_nodes(ast))
         
         # Save the AST to a file
-        save_ast(ast, file_path)
+        with phase("save_ast"):
+            save_ast(ast, file_path)
+        
+        record = contextlib.ExitStack()  # Does nothing; nullcontext() is new in Python 3.7
+        if replayable:
+            reasons = nondeterminism(ast)
+            if reasons:
+                print(f"Result not cached: {reasons[0]}", file=sys.stderr)
+            else:
+                record = ResultRecorder(file_path, source_code, imported)
+        
+        if inline is not None:
+            # After saving, so the cached AST stays the source's
+            with phase("inline"):
+                ast, inlined = inline_functions(ast, max_size=inline)
+            if inline_report:
+                print(format_inline_report(inlined), file=sys.stderr)
+        
+        # A virtual clock makes sleep() return at once, advancing time()
+        clock = VirtualClock(virtual_clock) if virtual_clock is not None else None
+        
+        if bytecode:
+            # Compile and run on the bytecode VM
+            with phase("compile"):
+                program = Compiler().compile(ast, optimize=peephole)
+            vm = VM(clock=clock, budget=budget)
+            try:
+                with phase("run"), record:
+                    return vm.run(program)
+            finally:
+                if stats is not None:
+                    stats.count("environment entries", len(vm.environment))
+                    stats.count("functions", len(program.functions))
         
         # Run the interpreter
-        interpreter = Interpreter()
-        result = interpreter.interpret(ast)
+        recorder = ProfileRecorder(ast) if profile else None
+        covered = CoverageRecorder(ast) if coverage else None
+        # Compiled functions would bypass coverage recording, so they stay interpreted
+        interpreter = Interpreter(adaptive=adaptive, budget=budget, jit=(jit or jit_dump) and covered is None,
+                                  profile=recorder, coverage=covered, clock=clock, tracer=tracer)
+        digest = program_digest(ast) if recorder is not None or covered is not None else None
+        sampler = None
+        if sample:
+            sampler = SamplingProfiler(sample_interval or DEFAULT_INTERVAL)
+            sampler.attach(interpreter)
+            sampler.start()
+            if hasattr(signal, "SIGUSR1"):
+                # `kill -USR1` writes the samples so far without stopping the script
+                signal.signal(signal.SIGUSR1, lambda signum, frame: sampler.write(sample))
+        try:
+            with phase("interpret"):
+                interpreter.load(ast)
+                if recorder is not None:
+                    # Warm up from earlier runs' profile, then record this one
+                    previous = load_profile(file_path, digest)
+                    if previous is not None:
+                        apply_profile(interpreter, ast, previous)
+                try:
+                    with record:
+                        result = interpreter.execute_program(ast)
+                finally:
+                    if recorder is not None:
+                        save_profile(merge(previous, recorder.data(digest)), file_path)
+                    if covered is not None:
+                        save_coverage(coverage, file_path, covered.data(digest))
+        finally:
+            if sampler is not None:
+                sampler.stop()
+                sampler.write(sample)
+            if jit_dump and interpreter.jit is not None:
+                # Show the Python generated for hot functions
+                print(interpreter.jit.dump(), file=sys.stderr)
+            if stats is not None:
+                stats.count("environment entries", len(interpreter.environment))
+                stats.count("functions", len(interpreter.functions))
+                stats.count("call links", len(interpreter.links))
         
         return result
         
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found")
         return None
+    except BudgetExceeded as e:
+        print(f"Error: {format_error(e)}")
+        return None
     except Exception as e:
-        print(f"Error: {str(e)}")
+        print(f"Error: {format_error(e)}")
         traceback.print_exc()
         return None
+    finally:
+        if tracer is not None:
+            tracer.write(trace, f"holy-d {os.path.basename(file_path)}")
+        if cache_stats:
+            print(format_stats(), file=sys.stderr)
+        if stats is not None and stats.phases:
+            stats.stop()
+            print(stats.report(), file=sys.stderr)
             
 def run_repl():
     """Run the Holy-D REPL (Read-Eval-Print Loop)"""
@@ -86,24 +223,75 @@ def run_repl():
             if result is not None:
                 print(result)
         except Exception as e:
-            print(f"Error: {str(e)}")
+            print(f"Error: {format_error(e)}")
             ast = None
 
 def print_version():
     """Print version information"""
-    print("Holy-D Language Interpreter v0.1.0")
+    print(f"Holy-D Language Interpreter v{VERSION}")
 
 def main():
     """Main entry point for the Holy-D language CLI using argparse"""
     parser = argparse.ArgumentParser(description="Holy-D Language Interpreter")
     parser.add_argument("script", nargs="?", help="Holy-D script file to run")
     parser.add_argument("--version", action="store_true", help="Show version information and exit")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for lexing and parsing large files (default: CPU count)")
+    parser.add_argument("--adaptive", action="store_true", help="Specialize binary operations on the operand types they see")
+    parser.add_argument("--bytecode", action="store_true", help="Compile to bytecode and run it on the VM")
+    parser.add_argument("--no-peephole", action="store_true", help="Skip the peephole optimizer when compiling to bytecode")
+    parser.add_argument("--jit", action="store_true", help="Compile hot functions to Python")
+    parser.add_argument("--jit-dump", action="store_true", help="Compile hot functions to Python and print the generated source to stderr")
+    parser.add_argument("--inline", metavar="SIZE", type=int, nargs="?", const=DEFAULT_MAX_SIZE, default=None,
+                        help=f"Inline calls to non-recursive functions of at most SIZE AST nodes (default: {DEFAULT_MAX_SIZE})")
+    parser.add_argument("--inline-report", action="store_true", help="With --inline, list the inlined calls on stderr")
+    parser.add_argument("--profile", action="store_true", help="Record a profile next to the script's cache and use earlier runs' profile to precompile hot code")
+    parser.add_argument("--coverage", metavar="FILE", default=None, help="Record which statements run and merge them into a coverage file")
+    parser.add_argument("--coverage-report", metavar="FILE", default=None, help="Print a coverage file per function and per line, and exit")
+    parser.add_argument("--sample", metavar="FILE", default=None, help="Sample the Holy-D call stack and write collapsed stacks to FILE at exit (or on SIGUSR1)")
+    parser.add_argument("--sample-interval", type=float, default=None, help="Seconds between samples with --sample (default: 0.01)")
+    parser.add_argument("--virtual-clock", metavar="START", type=float, nargs="?", const=0.0, default=None,
+                        help="Make sleep() return at once and advance a virtual time() instead, starting at START (default: 0)")
+    parser.add_argument("--cache-stats", action="store_true", help="Report cache store hits, misses, writes and evictions to stderr")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Write Chrome trace-event JSON of the phases, parsed declarations, cache lookups and slow calls to FILE")
+    parser.add_argument("--trace-threshold", type=float, default=None,
+                        help=f"Seconds a function call must take to appear in the trace (default: {DEFAULT_CALL_THRESHOLD})")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="Replay the cached output of a deterministic script instead of running it, and cache it after a run")
+    parser.add_argument("--invalidate-result", action="store_true", help="Forget the script's cached result before running it")
+    parser.add_argument("--clear-result-cache", action="store_true", help="Forget every cached result")
+    parser.add_argument("--hash-cons", action="store_true",
+                        help="Parse identical expressions into one shared AST node")
+    parser.add_argument("--memstats", action="store_true", help="Report memory use per phase and object counts to stderr")
+    parser.add_argument("--max-steps", type=int, default=None, help="Stop the script after roughly this many statements")
+    parser.add_argument("--max-time", type=float, default=None, help="Stop the script after this many seconds")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum function call depth")
+    parser.add_argument("--max-output", type=int, default=None, help="Maximum bytes of output")
     args = parser.parse_args()
+    if args.bytecode:
+        unsupported = [flag for name, flag in INTERPRETER_ONLY if getattr(args, name)]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be used with --bytecode")
 
+    if args.clear_result_cache:
+        clear_results()
+        if not args.script:
+            return
     if args.version:
         print_version()
+    elif args.coverage_report:
+        print(format_report(load_coverage(args.coverage_report), lines=True))
     elif args.script:
-        run_file(args.script)
+        budget = None
+        if any(limit is not None for limit in (args.max_steps, args.max_time, args.max_depth, args.max_output)):
+            budget = Budget(args.max_steps, args.max_time, args.max_depth, args.max_output)
+        run_file(args.script, jobs=args.jobs, adaptive=args.adaptive, bytecode=args.bytecode,
+                 peephole=not args.no_peephole, budget=budget, jit=args.jit, jit_dump=args.jit_dump,
+                 memstats=args.memstats, profile=args.profile, coverage=args.coverage, sample=args.sample,
+                 sample_interval=args.sample_interval, inline=args.inline, inline_report=args.inline_report,
+                 virtual_clock=args.virtual_clock, cache_stats=args.cache_stats, trace=args.trace,
+                 trace_threshold=args.trace_threshold, result_cache=args.result_cache,
+                 invalidate_result=args.invalidate_result, hash_cons=args.hash_cons)
     else:
         run_repl()
 
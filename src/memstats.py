@@ -0,0 +1,73 @@
+import contextlib
+import tracemalloc
+
+try:
+    from src.astutil import walk
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def count_nodes(ast):
+    """Number of AST nodes (dicts with a "type") in ast"""
+    return sum(1 for _ in walk(ast))
+
+
+def count_distinct_nodes(ast):
+    """Number of AST node objects in ast; fewer than count_nodes() if nodes are shared"""
+    return len({id(node) for node in walk(ast)})
+
+
+class MemoryStats:
+    """Per-phase memory accounting with tracemalloc.
+
+    Each phase records the memory still allocated when it ends
+    (retained), the change from the phase before, and the highest
+    allocation reached during it (peak; before Python 3.9, which cannot
+    reset it, the highest since start()). Only allocations made by
+    Python since start() are seen.
+    """
+
+    def __init__(self):
+        self.phases = []  # (name, retained, delta, peak)
+        self.counts = {}  # category -> number of objects
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        before, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, "reset_peak"):  # New in Python 3.9
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            retained, peak = tracemalloc.get_traced_memory()
+            self.phases.append((name, retained, retained - before, peak))
+
+    def count(self, category, number):
+        self.counts[category] = number
+
+    def report(self):
+        width = max([len(name) for name, *_ in self.phases] + [len(category) for category in self.counts] + [5])
+        lines = ["Memory by phase (tracemalloc):",
+                 f"  {'phase':<{width}} {'retained':>12} {'change':>12} {'peak':>12}"]
+        for name, retained, delta, peak in self.phases:
+            change = ("+" if delta >= 0 else "-") + format_size(abs(delta))
+            lines.append(f"  {name:<{width}} {format_size(retained):>12} {change:>12} {format_size(peak):>12}")
+        if self.counts:
+            lines.append("Objects:")
+            for category, number in self.counts.items():
+                lines.append(f"  {category:<{width}} {number:>12}")
+        return "\n".join(lines)
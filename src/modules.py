@@ -0,0 +1,149 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from src.frontend import parse_source, parse_serial
+    from src.cache import save_module, load_module
+except ImportError:  # running as a script from inside src/
+    from frontend import parse_source, parse_serial
+    from cache import save_module, load_module
+
+# Modules loaded by this process: real path -> (content hash, Program AST).
+# Shared by every importer, so a module is parsed at most once per content.
+_loaded = {}
+_lock = threading.Lock()
+
+
+def module_path(path, importer=None):
+    """Resolve an import path relative to the importing file (or the working directory)"""
+    if not os.path.isabs(path):
+        base = os.path.dirname(os.path.abspath(importer)) if importer else os.getcwd()
+        path = os.path.join(base, path)
+    return os.path.realpath(path)
+
+
+def imports_of(ast):
+    return [node for node in ast["body"] if node["type"] == "ImportDeclaration"]
+
+
+def _read(path, importer):
+    try:
+        with open(path, 'rb') as module_file:
+            return module_file.read()
+    except OSError as error:
+        where = f" (imported by {importer})" if importer else ""
+        raise ImportError(f"Cannot import '{path}'{where}: {error.strerror}") from None
+
+
+def _parse_module(source_code):
+    return parse_serial(source_code)
+
+
+def load_modules(paths, jobs=None, importers=None):
+    """Return {path: Program AST} for already resolved module paths.
+
+    Modules come from this process's table, then from their entry in the
+    cache store (keyed by content hash), and are only parsed when
+    both miss. Independent modules that need parsing are parsed in
+    parallel.
+    """
+    importers = importers or {}
+    modules = {}
+    sources = {}
+    for path in paths:
+        data = _read(path, importers.get(path))
+        digest = hashlib.sha256(data).hexdigest()
+        with _lock:
+            loaded = _loaded.get(path)
+        if loaded is not None and loaded[0] == digest:
+            modules[path] = loaded[1]
+            continue
+        ast = load_module(path, digest)
+        if ast is None:
+            sources[path] = (digest, data.decode('utf-8'))
+        else:
+            modules[path] = ast
+            with _lock:
+                _loaded[path] = (digest, ast)
+
+    parsed = _parse_all(sources, jobs)
+    for path, ast in parsed.items():
+        digest = sources[path][0]
+        save_module(ast, path, digest)
+        with _lock:
+            _loaded[path] = (digest, ast)
+        modules[path] = ast
+    return modules
+
+
+def _parse_all(sources, jobs):
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(sources) < 2:
+        return {path: _parse_one(path, source, parse_source) for path, (_, source) in sources.items()}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(sources))) as executor:
+        futures = {path: executor.submit(_parse_module, source) for path, (_, source) in sources.items()}
+        return {path: _parse_one(path, future, lambda future: future.result()) for path, future in futures.items()}
+
+
+def _parse_one(path, work, parse):
+    try:
+        return parse(work)
+    except (SyntaxError, ValueError) as error:
+        raise type(error)(f"In module '{path}': {error}") from None
+
+
+def resolve_imports(ast, file_path=None, jobs=None, imported_paths=None):
+    """Return ast with the functions of every (transitively) imported module added.
+
+    Only function declarations are imported; the entry blocks of an
+    imported module do not run. Each module is loaded once, however many
+    files import it. Functions are added dependencies first, followed by
+    the importing file's own declarations, so the importer's definitions
+    take precedence.
+
+    If imported_paths is a list, the paths of the imported modules are
+    appended to it.
+    """
+    if not imports_of(ast):
+        return ast
+
+    root = module_path(file_path) if file_path else None
+    modules = {}
+    graph = {}  # module path -> imported module paths, in order
+
+    def resolve(tree, path):
+        return [module_path(node["path"], path) for node in imports_of(tree)]
+
+    graph[root] = resolve(ast, file_path)
+    level = [path for path in dict.fromkeys(graph[root]) if path != root]
+    importers = {path: file_path for path in level}
+    while level:
+        modules.update(load_modules(level, jobs, importers))
+        following = []
+        for path in level:
+            graph[path] = resolve(modules[path], path)
+            for imported in graph[path]:
+                if imported not in graph and imported not in importers and imported != root:
+                    importers[imported] = path
+                    following.append(imported)
+        level = following
+
+    # Dependencies first; a module imported twice is only added once
+    body = []
+    added = set()
+
+    def add(path):
+        added.add(path)
+        for imported in graph[path]:
+            if imported not in added:
+                add(imported)
+        if path != root:
+            body.extend(node for node in modules[path]["body"] if node["type"] == "FunctionDeclaration")
+
+    add(root)
+    if imported_paths is not None:
+        imported_paths.extend(path for path in graph if path != root)
+    body.extend(node for node in ast["body"] if node["type"] != "ImportDeclaration")
+    return {"type": "Program", "body": body}
@@ -1,6 +1,46 @@
+try:
+    from src.linetable import build_line_table
+    from src.hashcons import InternTable
+    from src.syntax import Syntax
+except ImportError:  # running as a script from inside src/
+    from linetable import build_line_table
+    from hashcons import InternTable
+    from syntax import Syntax
+
+# Binary operator tokens and their (operator, precedence)
+BINARY_OPERATORS = {Syntax.SYMBOL_TOKENS[operator]: (operator, precedence)
+                    for operator, precedence in Syntax.BINARY_PRECEDENCE.items()}
+
+
+def dispatch(nonterminal, methods):
+    """{lookahead token type: Parser method} of a nonterminal of Syntax.GRAMMAR.
+
+    The lookaheads come from Syntax.parse_table(). methods names the
+    method parsing each production, by its action or, for a production
+    passing on the value of its first symbol ('first'), by that symbol.
+    A production without a method raises KeyError on import, so the
+    parser cannot fall behind the grammar.
+    """
+    return {lookahead: getattr(Parser, methods[symbols[0] if action == 'first' else action])
+            for lookahead, (symbols, action) in Syntax.parse_table()[nonterminal].items()}
+
+
 class Parser:
-    def __init__(self, tokens=None):
+    """Recursive-descent parser for Holy-D.
+
+    Declarations, statements and primary expressions are chosen by their
+    first token through tables generated from the parse table of
+    Syntax.GRAMMAR (see the end of this module); each method then parses
+    one production.
+    """
+
+    def __init__(self, tokens=None, hash_cons=False):
         self.tokens = tokens or []
+        # With hash_cons, identical expressions are built once and shared
+        # (see hashcons.InternTable), also across parse() calls
+        self.constants = InternTable() if hash_cons else None
+        self.lines = getattr(tokens, "lines", None)  # Token lines, see lexer.TokenList
+        self.node_lines = {}  # id(node) -> line, until stored in a line table
         self.position = 0
         self.current_token = self.tokens[0] if self.tokens else None
 
@@ -17,35 +57,79 @@ class Parser:
             return self.tokens[self.position + 1]
         return None
 
+    def line_at(self, position):
+        """Return the line of the token at position, or None if it is unknown"""
+        if self.lines is not None and position < len(self.lines):
+            return self.lines[position]
+        if position < len(self.tokens) and len(self.tokens[position]) > 2:
+            return self.tokens[position][2]
+        return None
+
+    def token_line(self):
+        """Return the line of the current token, or None if it is unknown"""
+        return self.line_at(self.position)
+
+    def mark(self, node, line):
+        """Record the line of a new AST node for its declaration's line table.
+
+        Returns the node, or its shared copy when hash-consing. A shared
+        node keeps the line of its first occurrence in the declaration.
+        """
+        if self.constants is not None:
+            node = self.constants.intern(node)
+            if line is not None:
+                self.node_lines.setdefault(id(node), line)
+            return node
+        if line is not None:
+            self.node_lines[id(node)] = line
+        return node
+
     def expect(self, token_type):
         if self.current_token and self.current_token[0] == token_type:
             token = self.current_token
             self.advance()
             return token
-        line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
-        column = self.current_token[3] if len(self.current_token) > 3 else "unknown"
-        raise SyntaxError(f"Expected {token_type}, got {self.current_token[0]} at line {line}, column {column}")
+        raise self.error(f"Expected {token_type}, got {self.describe_token()}")
+
+    def describe_token(self):
+        return self.current_token[0] if self.current_token else "end of input"
+
+    def error(self, message):
+        line = self.token_line() or "unknown"
+        token = self.current_token
+        column = token[3] if token and len(token) > 3 else "unknown"
+        return SyntaxError(f"{message} at line {line}, column {column}")
 
     def parse(self, tokens=None):
         if tokens:
             self.tokens = tokens
+            self.lines = getattr(tokens, "lines", None)
             self.position = 0
             self.current_token = self.tokens[0] if self.tokens else None
         
         program = {"type": "Program", "body": []}
         
         # Process each top-level construct
+        declarations = self.DECLARATIONS
         while self.current_token:
-            if self.current_token[0] == 'FUNC':
-                program["body"].append(self.parse_function_declaration())
-            elif self.current_token[0] == 'ENTER':
-                program["body"].append(self.parse_enter_block())
-            else:
+            method = declarations.get(self.current_token[0])
+            if method is None:
                 raise SyntaxError(f"Unexpected token: {self.current_token}")
+            declaration = method(self)
+            
+            program["body"].append(self.build_declaration(declaration))
                 
         return program
 
+    def build_declaration(self, node):
+        """Store the lines of a declaration's nodes in its line table"""
+        # Positions are kept per declaration in a compact line table
+        declaration = build_line_table(node, self.node_lines)
+        self.node_lines.clear()
+        return declaration
+
     def parse_function_declaration(self):
+        line = self.token_line()
         self.expect('FUNC')
         self.expect('COLON')
         
@@ -70,21 +154,34 @@ class Parser:
         # Parse function body
         body = self.parse_block()
         
-        return {
+        return self.mark({
             "type": "FunctionDeclaration",
             "name": name_token[1],
             "params": params,
             "body": body
-        }
+        }, line)
 
     def parse_enter_block(self):
+        line = self.token_line()
         self.expect('ENTER')
         body = self.parse_block()
         
-        return {
+        return self.mark({
             "type": "EntryPoint",
             "body": body
-        }
+        }, line)
+
+    def parse_import_declaration(self):
+        """Parse import "path.hd"; (resolved later, see modules.resolve_imports)"""
+        line = self.token_line()
+        self.expect('IMPORT')
+        path = self.expect('STRING')[1]
+        self.expect('SEMICOLON')
+        
+        return self.mark({
+            "type": "ImportDeclaration",
+            "path": path
+        }, line)
 
     def parse_block(self):
         self.expect('LBRACE')
@@ -99,33 +196,24 @@ class Parser:
     def parse_statement(self):
         if not self.current_token:
             raise SyntaxError("Unexpected end of input")
-            
-        if self.current_token[0] == 'PRINT':
-            return self.parse_print_statement()
-        elif self.current_token[0] == 'PRINTLN':
-            return self.parse_println_statement()
-        elif self.current_token[0] == 'CALL':
-            return self.parse_call_statement()
-        elif self.current_token[0] == 'IF':
-            return self.parse_if_statement()
-        elif self.current_token[0] == 'WHILE':
-            return self.parse_while_statement()
-        elif self.current_token[0] == 'FOR':
-            return self.parse_for_statement()
-        elif self.current_token[0] == 'RETURN':
-            return self.parse_return_statement()
-        elif self.current_token[0] == 'ASSIGN':
-            return self.parse_assignment_statement()
-        elif self.current_token[0] == 'IDENTIFIER':
-            # Assignment statement
-            return self.parse_assignment()
-        else:
+        method = self.STATEMENTS.get(self.current_token[0])
+        if method is None:
             raise SyntaxError(f"Unexpected token: {self.current_token}")
+        return method(self)
     
     def parse_assignment_statement(self):
-        """Parse an assignment statement: assign x = expression;"""
-        token = self.expect('ASSIGN')
-        line = token[2] if len(token) > 2 else "unknown"
+        """Parse an assignment statement: [assign] x = expression;"""
+        statement = self.parse_assignment_clause()
+        self.expect('SEMICOLON')
+        return statement
+
+    def parse_assignment_clause(self):
+        """Parse `[assign] x = expression` without the trailing semicolon"""
+        line = self.token_line()
+        
+        # The `assign` keyword is optional (it lexes as ASSIGN, like `=`)
+        if self.current_token[0] == 'ASSIGN':
+            self.advance()
         
         # Get the variable name
         var_name = self.expect('IDENTIFIER')[1]
@@ -136,19 +224,103 @@ class Parser:
         # Parse the expression to be assigned
         expression = self.parse_expression()
         
-        # Expect semicolon
-        self.expect('SEMICOLON')
-        
-        return {
+        return self.mark({
             "type": "AssignmentStatement",
             "name": var_name,
-            "value": expression,
-            "line": line
-        }
+            "value": expression
+        }, line)
+
+    def parse_condition(self):
+        """Parse a parenthesized condition: ( expression )"""
+        self.expect('LPAREN')
+        test = self.parse_expression()
+        self.expect('RPAREN')
+        return test
+
+    def parse_if_statement(self):
+        """Parse if (test) { ... } with optional else { ... } or else if ..."""
+        line = self.token_line()
+        self.expect('IF')
+        test = self.parse_condition()
+        consequent = self.parse_block()
+        
+        alternate = None
+        if self.current_token and self.current_token[0] == 'ELSE':
+            self.advance()  # consume 'else'
+            if self.current_token and self.current_token[0] == 'IF':
+                alternate = [self.parse_if_statement()]
+            else:
+                alternate = self.parse_block()
+        
+        return self.mark({
+            "type": "IfStatement",
+            "test": test,
+            "consequent": consequent,
+            "alternate": alternate
+        }, line)
+
+    def parse_while_statement(self):
+        """Parse while (test) { ... }"""
+        line = self.token_line()
+        self.expect('WHILE')
+        test = self.parse_condition()
+        body = self.parse_block()
+        
+        return self.mark({
+            "type": "WhileStatement",
+            "test": test,
+            "body": body
+        }, line)
+
+    def parse_for_statement(self):
+        """Parse for (init; test; update) { ... }; each clause may be empty"""
+        line = self.token_line()
+        self.expect('FOR')
+        self.expect('LPAREN')
+        
+        init = None
+        if self.current_token and self.current_token[0] != 'SEMICOLON':
+            init = self.parse_assignment_clause()
+        self.expect('SEMICOLON')
+        
+        test = None
+        if self.current_token and self.current_token[0] != 'SEMICOLON':
+            test = self.parse_expression()
+        self.expect('SEMICOLON')
+        
+        update = None
+        if self.current_token and self.current_token[0] != 'RPAREN':
+            update = self.parse_assignment_clause()
+        self.expect('RPAREN')
+        
+        body = self.parse_block()
+        
+        return self.mark({
+            "type": "ForStatement",
+            "init": init,
+            "test": test,
+            "update": update,
+            "body": body
+        }, line)
+
+    def parse_return_statement(self):
+        """Parse return; or return expression;"""
+        line = self.token_line()
+        self.expect('RETURN')
+        
+        argument = None
+        if self.current_token and self.current_token[0] != 'SEMICOLON':
+            argument = self.parse_expression()
+        self.expect('SEMICOLON')
+        
+        return self.mark({
+            "type": "ReturnStatement",
+            "argument": argument
+        }, line)
 
     def parse_print_statement(self):
-        token = self.expect('PRINT')
-        line = token[2] if len(token) > 2 else "unknown"
+        line = self.token_line()
+        self.expect('PRINT')
         
         # Handle function calls with parentheses
         if self.current_token and self.current_token[0] == 'LPAREN':
@@ -160,16 +332,15 @@ class Parser:
             
         self.expect('SEMICOLON')
         
-        return {
+        return self.mark({
             "type": "PrintStatement",
             "expression": expr,
-            "newline": False,
-            "line": line
-        }
+            "newline": False
+        }, line)
 
     def parse_println_statement(self):
-        token = self.expect('PRINTLN')
-        line = token[2] if len(token) > 2 else "unknown"
+        line = self.token_line()
+        self.expect('PRINTLN')
         
         # Handle function calls with parentheses
         if self.current_token and self.current_token[0] == 'LPAREN':
@@ -181,14 +352,14 @@ class Parser:
             
         self.expect('SEMICOLON')
         
-        return {
+        return self.mark({
             "type": "PrintStatement",
             "expression": expr,
-            "newline": True,
-            "line": line
-        }
+            "newline": True
+        }, line)
 
     def parse_call_statement(self):
+        line = self.token_line()
         self.expect('CALL')
         func_name = self.expect('IDENTIFIER')[1]
         
@@ -209,87 +380,142 @@ class Parser:
         
         self.expect('SEMICOLON')
         
-        return {
+        return self.mark({
             "type": "CallStatement",
             "name": func_name,
             "arguments": args
-        }
+        }, line)
 
     def parse_expression(self):
         """Parse an expression which could be a primary expression or a binary expression"""
         return self.parse_binary_expression()
     
-    def parse_binary_expression(self):
-        """Parse a binary expression or a single primary expression"""
+    def parse_binary_expression(self, min_precedence=1):
+        """Parse a binary expression or a single primary expression.
+
+        Operators are left-associative; chains of equal precedence are
+        built in a loop, so long `a + b + c + ...` chains do not recurse.
+        """
         left = self.parse_primary_expression()
         
-        # Check if followed by an operator
-        if self.current_token and self.current_token[0] == 'PLUS':
-            operator = '+'
-            line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
+        # Check if followed by an operator that binds at least this tightly
+        while self.current_token and self.current_token[0] in BINARY_OPERATORS:
+            operator, precedence = BINARY_OPERATORS[self.current_token[0]]
+            if precedence < min_precedence:
+                break
+            line = self.token_line()
             self.advance()  # consume operator
-            right = self.parse_binary_expression()  # right side could be another binary expression
-            return {
+            right = self.parse_binary_expression(precedence + 1)
+            left = self.mark({
                 "type": "BinaryExpression",
                 "operator": operator,
                 "left": left,
-                "right": right,
-                "line": line
-            }
+                "right": right
+            }, line)
         
         return left
     
     def parse_primary_expression(self):
         """Parse a primary expression (literal, identifier, or parenthesized expression)"""
-        if self.current_token[0] == 'LPAREN':
-            # Handle parenthesized expressions
-            self.advance()  # consume '('
-            expr = self.parse_expression()
-            self.expect('RPAREN')
-            return expr
-            
-        elif self.current_token[0] == 'STRING':
-            value = self.current_token[1]
-            line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
-            self.advance()
-            return {"type": "StringLiteral", "value": value, "line": line}
-            
-        elif self.current_token[0] == 'NUMBER':
-            value = self.current_token[1]
-            line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
-            self.advance()
-            return {"type": "NumericLiteral", "value": value, "line": line}
+        if not self.current_token:
+            raise self.error("Unexpected end of input in expression")
+        method = self.PRIMARIES.get(self.current_token[0])
+        if method is None:
+            line = self.token_line() or "unknown"
+            column = self.current_token[3] if len(self.current_token) > 3 else "unknown"
+            raise SyntaxError(f"Unexpected token in expression: {self.current_token[0]} at line {line}, column {column}")
+        return method(self)
+
+    def parse_parenthesized_expression(self):
+        self.advance()  # consume '('
+        expr = self.parse_expression()
+        self.expect('RPAREN')
+        return expr
+
+    def parse_string_literal(self):
+        value = self.current_token[1]
+        line = self.token_line()
+        self.advance()
+        return self.mark({"type": "StringLiteral", "value": value}, line)
+
+    def parse_array_literal(self):
+        """Parse an array literal like [1, 2, 3]"""
+        line = self.token_line()
+        self.advance()  # consume '['
+        elements = []
+        
+        if self.current_token and self.current_token[0] != 'RBRACKET':
+            elements.append(self.parse_expression())
             
-        elif self.current_token[0] == 'IDENTIFIER':
-            value = self.current_token[1]
-            line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
-            self.advance()
+            while self.current_token and self.current_token[0] == 'COMMA':
+                self.advance()  # consume ','
+                elements.append(self.parse_expression())
+        
+        self.expect('RBRACKET')
+        return self.mark({"type": "ArrayLiteral", "elements": elements}, line)
+
+    def parse_boolean_literal(self):
+        value = self.current_token[0] == 'TRUE'
+        line = self.token_line()
+        self.advance()
+        return self.mark({"type": "BooleanLiteral", "value": value}, line)
+
+    def parse_numeric_literal(self):
+        value = self.current_token[1]
+        line = self.token_line()
+        self.advance()
+        return self.mark({"type": "NumericLiteral", "value": value}, line)
+
+    def parse_name(self):
+        """Parse a variable, or a function call like identifier(...)"""
+        value = self.current_token[1]
+        line = self.token_line()
+        self.advance()
+        
+        if self.current_token and self.current_token[0] == 'LPAREN':
+            self.advance()  # consume '('
+            args = []
             
-            # Handle function calls like identifier()
-            if self.current_token and self.current_token[0] == 'LPAREN':
-                self.advance()  # consume '('
-                args = []
+            # Parse arguments if any
+            if self.current_token and self.current_token[0] != 'RPAREN':
+                args.append(self.parse_expression())
                 
-                # Parse arguments if any
-                if self.current_token and self.current_token[0] != 'RPAREN':
+                while self.current_token and self.current_token[0] == 'COMMA':
+                    self.advance()  # consume ','
                     args.append(self.parse_expression())
-                    
-                    while self.current_token and self.current_token[0] == 'COMMA':
-                        self.advance()  # consume ','
-                        args.append(self.parse_expression())
-                
-                self.expect('RPAREN')
-                
-                return {
-                    "type": "FunctionCall",
-                    "name": value,
-                    "arguments": args,
-                    "line": line
-                }
             
-            return {"type": "Identifier", "name": value, "line": line}
+            self.expect('RPAREN')
             
-        else:
-            line = self.current_token[2] if len(self.current_token) > 2 else "unknown"
-            column = self.current_token[3] if len(self.current_token) > 3 else "unknown"
-            raise SyntaxError(f"Unexpected token in expression: {self.current_token[0]} at line {line}, column {column}")
\ No newline at end of file
+            return self.mark({
+                "type": "FunctionCall",
+                "name": value,
+                "arguments": args
+            }, line)
+        
+        return self.mark({"type": "Identifier", "name": value}, line)
+
+
+# The first tokens of each kind of construct, from the parse table
+Parser.DECLARATIONS = dispatch('Declaration', {
+    'function_declaration': 'parse_function_declaration',
+    'enter_block': 'parse_enter_block',
+    'import_declaration': 'parse_import_declaration',
+})
+Parser.STATEMENTS = dispatch('Statement', {
+    'print_statement': 'parse_print_statement',
+    'println_statement': 'parse_println_statement',
+    'call_statement': 'parse_call_statement',
+    'IfStatement': 'parse_if_statement',
+    'while_statement': 'parse_while_statement',
+    'for_statement': 'parse_for_statement',
+    'return_statement': 'parse_return_statement',
+    'Assignment': 'parse_assignment_statement',
+})
+Parser.PRIMARIES = dispatch('Primary', {
+    'LPAREN': 'parse_parenthesized_expression',
+    'string_literal': 'parse_string_literal',
+    'array_literal': 'parse_array_literal',
+    'boolean_literal': 'parse_boolean_literal',
+    'numeric_literal': 'parse_numeric_literal',
+    'name': 'parse_name',
+})
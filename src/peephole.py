@@ -0,0 +1,197 @@
+from collections import Counter
+
+try:
+    from src.adaptive import GENERIC_OPERATORS
+except ImportError:  # running as a script from inside src/
+    from adaptive import GENERIC_OPERATORS
+
+# Values the optimizer may fold into or propagate as LOAD_CONST arguments
+CONSTANT_TYPES = (int, float, str, bool, type(None))
+
+# Folded strings longer than this stay as runtime concatenations so the
+# bytecode does not balloon (and large results stay ropes)
+MAX_FOLDED_LENGTH = 256
+
+# Superinstructions, longest patterns first. The set was picked from
+# pair_statistics() and VM(count_pairs=True) over example_scripts/ and our
+# loop benchmarks: loop tests (name <op> const/name + conditional jump),
+# counter updates, constant prints/stores/returns and discarded calls
+# dominate the executed opcode pairs.
+SUPERINSTRUCTIONS = [
+    (('LOAD_NAME', 'LOAD_CONST', 'BINARY_OP', 'JUMP_IF_FALSE'), 'NAME_CONST_JUMP_IF_FALSE'),
+    (('LOAD_NAME', 'LOAD_NAME', 'BINARY_OP', 'JUMP_IF_FALSE'), 'NAME_NAME_JUMP_IF_FALSE'),
+    (('LOAD_NAME', 'LOAD_CONST', 'BINARY_OP'), 'BINARY_OP_NAME_CONST'),
+    (('LOAD_NAME', 'LOAD_NAME', 'BINARY_OP'), 'BINARY_OP_NAME_NAME'),
+    (('BINARY_OP', 'JUMP_IF_FALSE'), 'BINARY_OP_JUMP_IF_FALSE'),
+    (('LOAD_CONST', 'PRINT'), 'PRINT_CONST'),
+    (('LOAD_CONST', 'STORE_NAME'), 'STORE_CONST'),
+    (('LOAD_CONST', 'RETURN'), 'RETURN_CONST'),
+    (('CALL', 'POP'), 'CALL_DISCARD'),
+]
+
+
+def pair_statistics(code_objects):
+    """Count adjacent opcode pairs in compiled code (static frequencies)"""
+    pairs = Counter()
+    for code in code_objects:
+        instructions = code.instructions
+        for (first, _), (second, _) in zip(instructions, instructions[1:]):
+            pairs[(first, second)] += 1
+    return pairs
+
+
+def _is_constant(instruction):
+    return instruction[0] == 'LOAD_CONST' and type(instruction[1]) in CONSTANT_TYPES
+
+
+class PeepholeOptimizer:
+    """Optimize unassembled (labelled) instruction lists.
+
+    The cleanup pass works one basic block at a time (blocks start at
+    labels): it folds constant binary operations and constant branches,
+    propagates constants stored to names into later loads, turns a store
+    followed by a load of the same name into DUP_TOP, and drops dead code,
+    jumps to the next instruction and pushes that are immediately popped.
+    It repeats until nothing changes; then frequent opcode sequences are
+    fused into the SUPERINSTRUCTIONS. ('LINE', n) markers at statement
+    starts are carried through unchanged.
+
+    Calls never change the caller's variables (a callee's assignments are
+    undone when it returns), but builtins may, so propagated constants are
+    forgotten at every call.
+    """
+
+    def __init__(self, superinstructions=True):
+        self.superinstructions = superinstructions
+        self.stats = {
+            "instructions_before": 0,
+            "instructions_after": 0,
+            "folded": 0,
+            "propagated": 0,
+            "removed": 0,
+            "fused": Counter(),
+        }
+
+    def optimize(self, instructions):
+        self.stats["instructions_before"] += _count(instructions)
+        while True:
+            optimized = self.cleanup(instructions)
+            if optimized == instructions:
+                break
+            instructions = optimized
+        if self.superinstructions:
+            instructions = self.fuse(instructions)
+        self.stats["instructions_after"] += _count(instructions)
+        return instructions
+
+    def cleanup(self, instructions):
+        out = []
+        known = {}
+        reachable = True
+        for op, arg in instructions:
+            if op == 'LINE':
+                # Line markers take no space; keep only the last of a run
+                if reachable:
+                    if out and out[-1][0] == 'LINE':
+                        out.pop()
+                    out.append((op, arg))
+                continue
+            if op == 'LABEL':
+                if out and out[-1] == ('JUMP', arg):
+                    out.pop()
+                    self.stats["removed"] += 1
+                known.clear()
+                reachable = True
+                out.append((op, arg))
+                continue
+            if not reachable:
+                self.stats["removed"] += 1
+                continue
+
+            if op == 'LOAD_NAME':
+                if arg in known:
+                    op, arg = 'LOAD_CONST', known[arg]
+                    self.stats["propagated"] += 1
+                else:
+                    store = len(out) - 2 if out and out[-1][0] == 'LINE' else len(out) - 1
+                    if store >= 0 and out[store] == ('STORE_NAME', arg):
+                        out.insert(store, ('DUP_TOP', None))
+                        continue
+            elif op == 'BINARY_OP':
+                if len(out) >= 2 and _is_constant(out[-1]) and _is_constant(out[-2]):
+                    folded = self.fold(arg, out[-2][1], out[-1][1])
+                    if folded is not None:
+                        del out[-2:]
+                        out.append(folded)
+                        continue
+            elif op == 'JUMP_IF_FALSE':
+                if out and _is_constant(out[-1]):
+                    value = out.pop()[1]
+                    self.stats["folded"] += 1
+                    if not value:
+                        out.append(('JUMP', arg))
+                        reachable = False
+                    continue
+            elif op == 'STORE_NAME':
+                if out and _is_constant(out[-1]):
+                    known[arg] = out[-1][1]
+                else:
+                    known.pop(arg, None)
+            elif op == 'POP':
+                if out and (_is_constant(out[-1]) or out[-1][0] == 'DUP_TOP'):
+                    out.pop()
+                    self.stats["removed"] += 2
+                    continue
+            elif op in ('CALL', 'CALL_DISCARD'):
+                known.clear()
+            elif op in ('JUMP', 'RETURN'):
+                reachable = False
+
+            out.append((op, arg))
+        return out
+
+    def fold(self, operator, left, right):
+        function = GENERIC_OPERATORS.get(operator)
+        if function is None:
+            return None
+        try:
+            value = function(left, right)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+            return None
+        if type(value) not in CONSTANT_TYPES or (type(value) is str and len(value) > MAX_FOLDED_LENGTH):
+            return None
+        self.stats["folded"] += 1
+        return ('LOAD_CONST', value)
+
+    def fuse(self, instructions):
+        out = []
+        index = 0
+        while index < len(instructions):
+            for pattern, fused in SUPERINSTRUCTIONS:
+                window = instructions[index:index + len(pattern)]
+                if tuple(op for op, _ in window) == pattern:
+                    out.append((fused, _fused_argument(window)))
+                    self.stats["fused"][fused] += 1
+                    index += len(pattern)
+                    break
+            else:
+                out.append(instructions[index])
+                index += 1
+        return out
+
+
+# Opcodes whose argument is always None and is left out when fusing
+NO_ARGUMENT = {'POP', 'RETURN', 'DUP_TOP'}
+
+
+def _fused_argument(window):
+    """Concatenate the arguments of fused instructions into one tuple"""
+    argument = ()
+    for op, arg in window:
+        if op not in NO_ARGUMENT:
+            argument += arg if isinstance(arg, tuple) else (arg,)
+    return argument[0] if len(argument) == 1 else argument
+
+
+def _count(instructions):
+    return sum(1 for op, _ in instructions if op not in ('LABEL', 'LINE'))
@@ -0,0 +1,189 @@
+import os
+from collections import Counter
+
+try:
+    from src.astutil import walk, program_digest
+    from src.adaptive import BinarySite
+    from src.cache import default_store, cache_key
+except ImportError:  # running as a script from inside src/
+    from astutil import walk, program_digest
+    from adaptive import BinarySite
+    from cache import default_store, cache_key
+
+PROFILE_VERSION = 1
+
+# Calls in the previous runs (per run) that make a function hot
+HOT_CALLS = 10
+
+# Operand types a profile can name
+TYPES = {"int": int, "float": float, "str": str, "bool": bool}
+
+# Node types profiled per site
+SITE_TYPES = ("BinaryExpression", "IfStatement")
+
+
+def declaration_key(declaration, index):
+    if declaration["type"] == "FunctionDeclaration":
+        return declaration["name"]
+    return f"<enter {index}>"
+
+
+def site_keys(ast):
+    """Map id(node) to a key that names the same site in later runs.
+
+    Keys are the enclosing declaration plus the site's position among
+    the profiled nodes of that declaration, in walk order.
+    """
+    keys = {}
+    entry = 0
+    for declaration in ast["body"]:
+        if declaration["type"] == "EntryPoint":
+            entry += 1
+        elif declaration["type"] != "FunctionDeclaration":
+            continue
+        prefix = declaration_key(declaration, entry)
+        index = 0
+        for node in walk(declaration):
+            if node["type"] in SITE_TYPES:
+                keys[id(node)] = f"{prefix}:{index}"
+                index += 1
+    return keys
+
+
+class ProfileRecorder:
+    """Collects a run's profile: call counts, the call graph, operand types and branches.
+
+    An ExecutionContext created with a recorder reports to it through
+    enter()/exit() around every user function call and through
+    profiling visitors for binary operations and if statements.
+    """
+
+    def __init__(self, ast):
+        self.keys = site_keys(ast)
+        self.calls = Counter()
+        self.edges = Counter()
+        self.stack = ["<enter>"]
+        self.types = {}     # site key -> (left type, right type), or None once polymorphic
+        self.branches = {}  # site key -> [taken, not taken]
+
+    def enter(self, name):
+        self.calls[name] += 1
+        self.edges[(self.stack[-1], name)] += 1
+        self.stack.append(name)
+
+    def exit(self):
+        self.stack.pop()
+
+    def observe(self, node, left, right):
+        key = self.keys.get(id(node))
+        if key is None:
+            return
+        types = (type(left).__name__, type(right).__name__)
+        previous = self.types.setdefault(key, types)
+        if previous is not None and previous != types:
+            self.types[key] = None
+
+    def branch(self, node, taken):
+        key = self.keys.get(id(node))
+        if key is not None:
+            counts = self.branches.setdefault(key, [0, 0])
+            counts[0 if taken else 1] += 1
+
+    def data(self, digest=None):
+        """This run's profile in its persisted form"""
+        calls = {}
+        for (caller, callee), count in self.edges.items():
+            calls.setdefault(caller, {})[callee] = count
+        return {
+            "version": PROFILE_VERSION,
+            "digest": digest,
+            "runs": 1,
+            "functions": dict(self.calls),
+            "calls": calls,
+            "types": {key: list(types) if types else None for key, types in self.types.items()},
+            "branches": self.branches,
+        }
+
+
+def merge(previous, current):
+    """Combine the profile of earlier runs with this run's"""
+    if not previous or previous.get("version") != PROFILE_VERSION or previous.get("digest") != current.get("digest"):
+        return current
+    merged = dict(current)
+    merged["runs"] = previous["runs"] + current["runs"]
+    merged["functions"] = dict(Counter(previous["functions"]) + Counter(current["functions"]))
+    calls = {caller: dict(callees) for caller, callees in previous["calls"].items()}
+    for caller, callees in current["calls"].items():
+        totals = calls.setdefault(caller, {})
+        for callee, count in callees.items():
+            totals[callee] = totals.get(callee, 0) + count
+    merged["calls"] = calls
+    types = dict(previous["types"])
+    for key, observed in current["types"].items():
+        types[key] = observed if types.get(key, observed) == observed else None
+    merged["types"] = types
+    branches = {key: list(counts) for key, counts in previous["branches"].items()}
+    for key, (taken, skipped) in current["branches"].items():
+        counts = branches.setdefault(key, [0, 0])
+        counts[0] += taken
+        counts[1] += skipped
+    merged["branches"] = branches
+    return merged
+
+
+def profile_key(file_path, digest):
+    """Cache store key of the profile of a script with the given program digest"""
+    return cache_key("profile", PROFILE_VERSION, os.path.abspath(file_path), digest)
+
+
+def load_profile(file_path, digest=None, store=None):
+    """Load a script's profile, or None if there is none for this source"""
+    profile = (store or default_store()).get_json(profile_key(file_path, digest))
+    if profile is None or profile.get("version") != PROFILE_VERSION or profile.get("digest") != digest:
+        return None
+    return profile
+
+
+def save_profile(profile, file_path, store=None):
+    """Store a script's profile in the cache store (see cache.CacheStore)"""
+    key = profile_key(file_path, profile["digest"])
+    return (store or default_store()).put_json(key, profile, separators=(',', ':')) is not None
+
+
+def hot_functions(profile, threshold=HOT_CALLS):
+    """Names of the functions called at least threshold times per run, hottest first"""
+    runs = max(1, profile["runs"])
+    counts = profile["functions"]
+    return [name for name in sorted(counts, key=counts.get, reverse=True) if counts[name] / runs >= threshold]
+
+
+def apply_profile(context, ast, profile):
+    """Warm a linked context up from a previous profile before it runs.
+
+    Hot functions are compiled by the context's JIT, if it has one, and
+    binary operations that only ever saw one type pair start out
+    specialized in adaptive mode. Everything else (cold functions,
+    polymorphic sites) is left to the usual lazy warm-up. Returns the
+    names of the functions compiled.
+    """
+    compiled = []
+    if context.jit is not None:
+        for name in hot_functions(profile):
+            declaration = context.functions.get(name)
+            if declaration is not None and context.jit.precompile(context, declaration):
+                compiled.append(name)
+
+    if context.adaptive:
+        types = profile["types"]
+        for node, key in _sites(ast, "BinaryExpression"):
+            observed = types.get(key)
+            if observed and all(name in TYPES for name in observed):
+                site = BinarySite(node)
+                if site.prime(tuple(TYPES[name] for name in observed)):
+                    context.binary_sites[id(node)] = site
+    return compiled
+
+
+def _sites(ast, node_type):
+    keys = site_keys(ast)
+    return [(node, keys[id(node)]) for node in walk(ast) if node["type"] == node_type and id(node) in keys]
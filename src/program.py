@@ -0,0 +1,67 @@
+try:
+    from src.frontend import parse_source
+    from src.interpreter import ExecutionContext
+    from src.builtin_functions import default_builtins
+    from src.linker import link
+    from src.jit import JIT
+    from src.modules import resolve_imports
+except ImportError:  # running as a script from inside src/
+    from frontend import parse_source
+    from interpreter import ExecutionContext
+    from builtin_functions import default_builtins
+    from linker import link
+    from jit import JIT
+    from modules import resolve_imports
+
+
+class Program:
+    """A Holy-D script lexed, parsed and linked once, ready to run many times.
+
+    Programs are immutable: every run gets a fresh ExecutionContext with
+    its own variables, while the AST, function table and call links are
+    shared read-only between runs. A program can be run from many
+    threads at once.
+    """
+
+    __slots__ = ('ast', 'functions', 'links', 'builtins')
+
+    def __init__(self, ast, builtins=None):
+        builtins = builtins if builtins is not None else default_builtins()
+        functions, links = link(ast, builtins)
+        object.__setattr__(self, 'ast', ast)
+        object.__setattr__(self, 'builtins', builtins)
+        object.__setattr__(self, 'functions', functions)
+        object.__setattr__(self, 'links', links)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Program objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Program objects are immutable")
+
+    def run(self, inputs=None, output=None, budget=None, adaptive=False, jit=False, clock=None):
+        """Run the program and return its final global variables.
+
+        inputs seeds the global variables, output is a file-like object
+        receiving everything the script prints (default: sys.stdout), and
+        budget is an optional budget.Budget for this run only. With
+        jit=True hot functions are compiled to Python during the run.
+        clock (see clock.py) is what sleep() and time() use; pass a
+        clock.VirtualClock to skip the waiting.
+        exit() raises SystemExit as usual.
+        """
+        context = ExecutionContext(self.functions, self.links, self.builtins, adaptive,
+                                   budget, output, dict(inputs) if inputs else None,
+                                   JIT() if jit else None, clock=clock)
+        return context.execute_program(self.ast)
+
+
+def compile(source_code, builtins=None, jobs=None, path=None):
+    """Compile Holy-D source code into a reusable Program.
+
+    builtins is the BuiltinRegistry call sites are linked against; it
+    must not change while the program is in use. Imports are resolved
+    relative to path, the file the source came from (default: the
+    working directory).
+    """
+    return Program(resolve_imports(parse_source(source_code, jobs), path, jobs), builtins)
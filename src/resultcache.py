@@ -0,0 +1,201 @@
+import os
+import sys
+import uuid
+import hashlib
+import contextlib
+
+try:
+    from src.astutil import walk
+    from src.builtin_functions import default_builtins
+    from src.linker import CALL_NODES
+    from src.linetable import line_map
+    from src.cache import default_store, cache_key
+    from src.version import toolchain_version
+except ImportError:  # running as a script from inside src/
+    from astutil import walk
+    from builtin_functions import default_builtins
+    from linker import CALL_NODES
+    from linetable import line_map
+    from cache import default_store, cache_key
+    from version import toolchain_version
+
+RESULT_FORMAT = 1  # Bumped when the layout of cached results changes
+
+MAX_OUTPUT = 1024 * 1024  # Bytes of output a cached result may hold
+
+LITERALS = ("StringLiteral", "NumericLiteral", "BooleanLiteral")
+
+# Standard builtins whose effect depends only on their arguments
+PURE_BUILTINS = frozenset(("print", "println", "len", "sum", "min", "max", "range", "fill", "slice"))
+
+# The entry holding the current generation of results; clear_results()
+# replaces it, which orphans every cached result at once
+GENERATION_KEY = cache_key("result-generation")
+
+
+def nondeterminism(ast, builtins=None):
+    """Why a Program's output might differ between runs, as a list of reasons.
+
+    An empty list means the program is deterministic: its output and
+    exit code depend only on its source and its imports. Every call in
+    every function counts, whether or not it runs. A call makes the
+    program nondeterministic if it reads the clock (sleep(), time()),
+    exits with a computed code, or calls a builtin other than the
+    standard pure ones (embedders' builtins may read anything). Calls to
+    functions that do not exist only fail, the same way every time.
+    """
+    builtins = builtins if builtins is not None else default_builtins()
+    # Declared functions take precedence over builtins (see linker.resolve)
+    declared = {node["name"] for node in ast["body"] if node["type"] == "FunctionDeclaration"}
+    reasons = []
+    for declaration in ast["body"]:
+        lines = line_map(declaration)
+        for node in walk(declaration):
+            if node["type"] not in CALL_NODES:
+                continue
+            name = node["name"]
+            if name in declared or builtins.get(name) is None or name in PURE_BUILTINS:
+                continue
+            if name == "exit":
+                if all(argument["type"] in LITERALS for argument in node["arguments"]):
+                    continue
+                reason = "exit() with a computed code"
+            elif name in ("sleep", "time"):
+                reason = f"{name}() reads the clock"
+            else:
+                reason = f"{name}() is not a pure builtin"
+            line = lines.get(id(node))
+            reasons.append(f"{reason} at line {line}" if line is not None else reason)
+    return reasons
+
+
+def module_digests(paths):
+    """{path: content hash} of imported modules; a missing module has no hash"""
+    digests = {}
+    for path in paths:
+        try:
+            with open(path, 'rb') as module_file:
+                digests[path] = hashlib.sha256(module_file.read()).hexdigest()
+        except OSError:
+            digests[path] = None
+    return digests
+
+
+def generation(store, create=False):
+    data = store.get(GENERATION_KEY)
+    if data is None and create:
+        data = uuid.uuid4().hex.encode('ascii')
+        store.put(GENERATION_KEY, data)
+    return data.decode('ascii') if data is not None else None
+
+
+def result_key(file_path, source_code, store):
+    """The key of a script's cached result, or None if there is no generation yet"""
+    current = generation(store)
+    if current is None:
+        return None
+    return cache_key("result", RESULT_FORMAT, toolchain_version(), current, os.path.abspath(file_path), source_code)
+
+
+def load_result(file_path, source_code, store=None):
+    """The cached result of running a script, or None.
+
+    A result is {"stdout", "exit_code", "modules"}, where exit_code is
+    None if the script did not call exit(). It is only returned if every
+    module the script imported still has the contents it had.
+    """
+    store = store or default_store()
+    key = result_key(file_path, source_code, store)
+    if key is None:
+        return None
+    result = store.get_json(key)
+    if result is None or module_digests(result["modules"]) != result["modules"]:
+        return None
+    return result
+
+
+def save_result(file_path, source_code, stdout, exit_code=None, modules=(), store=None):
+    """Cache the result of running a script; returns whether it was stored.
+
+    Results whose output exceeds MAX_OUTPUT bytes are not stored.
+    """
+    store = store or default_store()
+    if len(stdout.encode('utf-8')) > MAX_OUTPUT:
+        return False
+    result = {"stdout": stdout, "exit_code": exit_code, "modules": module_digests(modules)}
+    key = cache_key("result", RESULT_FORMAT, toolchain_version(), generation(store, create=True),
+                    os.path.abspath(file_path), source_code)
+    return store.put_json(key, result, separators=(',', ':')) is not None
+
+
+def drop_result(file_path, source_code, store=None):
+    """Forget the cached result of a script; returns whether there was one"""
+    store = store or default_store()
+    key = result_key(file_path, source_code, store)
+    return key is not None and store.remove(key)
+
+
+def clear_results(store=None):
+    """Forget every cached result; the entries are left to LRU eviction"""
+    (store or default_store()).remove(GENERATION_KEY)
+
+
+def replay_result(result, stream=None):
+    """Write a cached result's output, and exit with its code if it had one"""
+    stream = stream or sys.stdout
+    stream.write(result["stdout"])
+    stream.flush()
+    if result["exit_code"] is not None:
+        sys.exit(result["exit_code"])
+
+
+class ResultRecorder:
+    """Captures a run's standard output and exit code, and caches them.
+
+    Used as a context manager around running the script: output still
+    goes to standard output as it is written. If the run completes, or
+    exits through exit(), the result is saved when the block ends; a run
+    that fails is not cached.
+    """
+
+    def __init__(self, file_path, source_code, modules=(), store=None):
+        self.file_path = file_path
+        self.source_code = source_code
+        self.modules = list(modules)
+        self.store = store
+        self.parts = []
+        self.size = 0
+        self.stream = None
+        self.redirect = None
+
+    def write(self, text):
+        self.stream.write(text)
+        if self.size <= MAX_OUTPUT:
+            # Characters never outnumber UTF-8 bytes, so past the cap it cannot be cached
+            self.parts.append(text)
+            self.size += len(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def output(self):
+        return "".join(self.parts)
+
+    def __enter__(self):
+        self.stream = sys.stdout
+        self.redirect = contextlib.redirect_stdout(self)
+        self.redirect.__enter__()
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        self.redirect.__exit__(kind, error, traceback)
+        if kind is None:
+            self.save(None)
+        elif issubclass(kind, SystemExit) and isinstance(error.code, int):
+            self.save(error.code)
+        return False
+
+    def save(self, exit_code):
+        if self.size <= MAX_OUTPUT:
+            save_result(self.file_path, self.source_code, self.output(), exit_code, self.modules, self.store)
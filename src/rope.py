@@ -0,0 +1,113 @@
+# Concatenations whose result is at least this long produce a Rope
+# instead of a new str. Short strings are cheaper to copy than to track.
+ROPE_THRESHOLD = 1024
+
+
+class Rope:
+    """A string value built up by concatenation and flattened lazily.
+
+    `assign s = s + piece;` on a plain str copies all of s every time,
+    which makes building output quadratic. A Rope records the pieces
+    instead and only joins them when the value is observed (printed,
+    compared, converted with str()).
+
+    Ropes are immutable from the language's point of view, but a rope
+    and the rope produced by appending to it share one parts list: each
+    rope remembers how many parts belong to it, and appending only
+    reuses the list when nobody has appended to it yet. Appending to the
+    newest rope is therefore O(1), and older values stay unchanged.
+    """
+
+    __slots__ = ('_parts', '_count', '_length', '_flat')
+
+    def __init__(self, parts, count, length):
+        self._parts = parts
+        self._count = count
+        self._length = length
+        self._flat = None
+
+    @classmethod
+    def from_strings(cls, *strings):
+        parts = [s for s in strings if s]
+        return cls(parts, len(parts), sum(len(s) for s in parts))
+
+    def _extend(self, pieces, length):
+        if self._count == len(self._parts):
+            parts = self._parts
+        else:
+            parts = self._parts[:self._count]
+        parts.extend(pieces)
+        return Rope(parts, len(parts), self._length + length)
+
+    def _pieces(self):
+        if self._flat is not None:
+            return [self._flat]
+        return self._parts[:self._count]
+
+    def __add__(self, other):
+        if isinstance(other, str):
+            return self._extend([other], len(other)) if other else self
+        if isinstance(other, Rope):
+            return self._extend(other._pieces(), other._length)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            pieces = [other] + self._pieces() if other else self._pieces()
+            return Rope(pieces, len(pieces), len(other) + self._length)
+        return NotImplemented
+
+    def __str__(self):
+        if self._flat is None:
+            self._flat = ''.join(self._parts[:self._count])
+        return self._flat
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return self._length
+
+    def __eq__(self, other):
+        if isinstance(other, (str, Rope)):
+            return len(self) == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) < str(other)
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) <= str(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) > str(other)
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) >= str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+def flatten(value):
+    """value, with a Rope turned into the str it stands for"""
+    return str(value) if type(value) is Rope else value
+
+
+def concat(left, right):
+    """Return left + right, producing a Rope once the result is large"""
+    if type(left) is str and type(right) is str and len(left) + len(right) >= ROPE_THRESHOLD:
+        return Rope.from_strings(left, right)
+    return left + right
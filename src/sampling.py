@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+import weakref
+from collections import Counter
+
+try:
+    from src.linetable import program_line_map
+    from src.interpreter import ExecutionContext
+except ImportError:  # running as a script from inside src/
+    from linetable import program_line_map
+    from interpreter import ExecutionContext
+
+DEFAULT_INTERVAL = 0.01  # Seconds between samples
+
+# Interpreter methods that run statements, each holding the one it is
+# running in its local `statement`
+STATEMENT_LOOPS = frozenset(function.__code__ for function in (
+    ExecutionContext.execute_statements, ExecutionContext.covered_execute_statements,
+    ExecutionContext.visit_WhileStatement, ExecutionContext.visit_ForStatement))
+
+CALL = ExecutionContext.call_function.__code__
+
+
+class SamplingProfiler:
+    """Periodically samples the Holy-D call stacks of running contexts.
+
+    attach() gives an ExecutionContext (or Interpreter) a shadow stack,
+    which it maintains with one list append and pop per call. A daemon
+    thread copies the stack of every attached context each interval and
+    counts identical stacks, so the cost of profiling does not depend on
+    how many calls a program makes. Stacks are reported as collapsed
+    stacks ("<enter>:12;fib:3;fib:2 42"), the input format of flame graph
+    tools: each frame is a function and the line it is running. The
+    innermost frame's line is the statement the interpreter is running,
+    which the sampling thread finds in the running thread's Python
+    frames; a JIT-compiled innermost frame has no line.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.contexts = weakref.WeakSet()
+        self.stacks = Counter()  # Collapsed stack -> samples
+        self.samples = 0
+        self.labels = {}  # (id(program), ids of frames) -> collapsed stack
+        self.programs = {}  # id(program) -> (program, its line map), kept alive for labels
+        self.lock = threading.RLock()
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def attach(self, context):
+        """Start maintaining context's shadow stack and sample it"""
+        if context.frames is None:
+            context.frames = []
+        self.contexts.add(context)
+        return context
+
+    def detach(self, context):
+        self.contexts.discard(context)
+        context.frames = None
+
+    def start(self):
+        if self.thread is None:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self.run, name="holy-d-sampler", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Record the current stack of every attached context that is running"""
+        with self.lock:
+            threads = None
+            for context in list(self.contexts):
+                frames = context.frames
+                program = context.program
+                if not frames or program is None:
+                    continue
+                # Copying a list is atomic, so the running thread needs no lock
+                snapshot = tuple(frames)
+                if threads is None:
+                    threads = sys._current_frames()
+                statement = running_statement(context, threads.get(context.thread))
+                key = (id(program), tuple(map(id, snapshot)), id(statement))
+                label = self.labels.get(key)
+                if label is None:
+                    label = self.labels[key] = self.collapse(program, snapshot, statement)
+                self.stacks[label] += 1
+                self.samples += 1
+
+    def collapse(self, program, frames, statement=None):
+        entry = self.programs.get(id(program))
+        if entry is None or entry[0] is not program:
+            entry = self.programs[id(program)] = (program, program_line_map(program))
+        lines = entry[1]
+        parts = []
+        for index, node in enumerate(frames):
+            name = "<enter>" if node["type"] == "EntryPoint" else node["name"]
+            # A frame's line is the line of the call it is making, or of
+            # the statement it is running
+            running = frames[index + 1] if index + 1 < len(frames) else statement
+            line = lines.get(id(running)) if running is not None else None
+            parts.append(f"{name}:{line}" if line is not None else name)
+        return ";".join(parts)
+
+    def collapsed(self):
+        """The samples so far, one "stack count" line per distinct stack"""
+        with self.lock:
+            return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def write(self, path):
+        """Write the collapsed stacks to path, replacing it atomically"""
+        text = self.collapsed()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as samples_file:
+            samples_file.write(text)
+        os.replace(temporary, path)
+        return text
+
+
+def running_statement(context, frame):
+    """The statement context is running in its innermost Holy-D frame, or None.
+
+    frame is the innermost Python frame of the thread running context.
+    The innermost interpreter statement loop of context holds it, unless
+    a call was entered since (the callee is then compiled, or has not
+    started its body).
+    """
+    while frame is not None:
+        code = frame.f_code
+        if code is CALL or code in STATEMENT_LOOPS:
+            local = frame.f_locals
+            if local.get("self") is context:
+                return local.get("statement") if code is not CALL else None
+        frame = frame.f_back
+    return None
@@ -0,0 +1,284 @@
+import functools
+
+
+class Syntax:
+    # Define the syntax rules and grammar for the Holy-D language
+    KEYWORDS = {'func', 'enter', 'call', 'print', 'println', 'if', 'else', 'while', 'for', 'return', 'assign', 'true', 'false', 'import'}
+    OPERATORS = {'+', '-', '*', '/', '=', '==', '!=', '<', '>', '<=', '>='}
+    DELIMITERS = {';', ',', '(', ')', '{', '}', '[', ']', ':'}
+
+    # Token type of each operator and delimiter; a keyword's token type is
+    # the keyword in upper case
+    SYMBOL_TOKENS = {
+        '+': 'PLUS', '-': 'MINUS', '*': 'MULTIPLY', '/': 'DIVIDE', '=': 'ASSIGN',
+        '==': 'EQUALS', '!=': 'NOT_EQUALS', '<': 'LESS', '>': 'GREATER', '<=': 'LESS_EQUAL', '>=': 'GREATER_EQUAL',
+        ';': 'SEMICOLON', ',': 'COMMA', '(': 'LPAREN', ')': 'RPAREN', '{': 'LBRACE', '}': 'RBRACE',
+        '[': 'LBRACKET', ']': 'RBRACKET', ':': 'COLON',
+    }
+    LITERAL_TOKENS = {'IDENTIFIER', 'NUMBER', 'FLOAT', 'STRING'}
+
+    # Binary operators bind tighter the higher their precedence; all are
+    # left-associative
+    BINARY_PRECEDENCE = {
+        '==': 1, '!=': 1, '<': 1, '<=': 1, '>': 1, '>=': 1,
+        '+': 2, '-': 2,
+        '*': 3, '/': 3,
+    }
+
+    START = 'Program'
+    END = '$'  # Lookahead at the end of the tokens
+
+    # The LL(1) grammar. Each nonterminal (CamelCase) has a list of
+    # (symbols, action) productions; other symbols are token types. The
+    # action names what the production builds ('first' passes on the
+    # value of its first symbol); Parser picks its method for a
+    # declaration, statement or primary expression by the action the
+    # parse table selects (see parser.dispatch).
+    # Repetitions are right recursive. An expression is a flat list of
+    # operands and binary operators grouped by BINARY_PRECEDENCE, so
+    # precedence levels need no nonterminals of their own.
+    GRAMMAR = {
+        'Program': [
+            (('Declaration', 'Program'), 'append'),
+            ((), 'empty'),
+        ],
+        'Declaration': [
+            (('FUNC', 'COLON', 'IDENTIFIER', 'Parameters', 'Block'), 'function_declaration'),
+            (('ENTER', 'Block'), 'enter_block'),
+            (('IMPORT', 'STRING', 'SEMICOLON'), 'import_declaration'),
+        ],
+        'Parameters': [
+            (('LPAREN', 'Names', 'RPAREN'), 'first'),
+            ((), 'empty'),
+        ],
+        'Names': [
+            (('IDENTIFIER', 'MoreNames'), 'list'),
+            ((), 'empty'),
+        ],
+        'MoreNames': [
+            (('COMMA', 'IDENTIFIER', 'MoreNames'), 'append'),
+            ((), 'empty'),
+        ],
+        'Block': [
+            (('LBRACE', 'Statements', 'RBRACE'), 'block'),
+        ],
+        'Statements': [
+            (('Statement', 'Statements'), 'append'),
+            ((), 'empty'),
+        ],
+        'Statement': [
+            (('PRINT', 'Expression', 'SEMICOLON'), 'print_statement'),
+            (('PRINTLN', 'Expression', 'SEMICOLON'), 'println_statement'),
+            (('CALL', 'IDENTIFIER', 'CallArguments', 'SEMICOLON'), 'call_statement'),
+            (('IfStatement',), 'first'),
+            (('WHILE', 'Condition', 'Block'), 'while_statement'),
+            (('FOR', 'LPAREN', 'OptionalAssignment', 'SEMICOLON', 'OptionalExpression', 'SEMICOLON',
+              'OptionalAssignment', 'RPAREN', 'Block'), 'for_statement'),
+            (('RETURN', 'OptionalExpression', 'SEMICOLON'), 'return_statement'),
+            (('Assignment', 'SEMICOLON'), 'first'),
+        ],
+        'IfStatement': [
+            (('IF', 'Condition', 'Block', 'Else'), 'if_statement'),
+        ],
+        'Else': [
+            (('ELSE', 'ElseBody'), 'first'),
+            ((), 'none'),
+        ],
+        'ElseBody': [
+            (('IfStatement',), 'wrap'),
+            (('Block',), 'first'),
+        ],
+        'Condition': [
+            (('LPAREN', 'Expression', 'RPAREN'), 'first'),
+        ],
+        'Assignment': [
+            # The `assign` keyword is optional (it lexes as ASSIGN, like `=`)
+            (('ASSIGN', 'IDENTIFIER', 'ASSIGN', 'Expression'), 'assignment'),
+            (('IDENTIFIER', 'ASSIGN', 'Expression'), 'assignment'),
+        ],
+        'OptionalAssignment': [
+            (('Assignment',), 'first'),
+            ((), 'none'),
+        ],
+        'OptionalExpression': [
+            (('Expression',), 'first'),
+            ((), 'none'),
+        ],
+        'Expression': [
+            (('Primary', 'Operations'), 'binary'),
+        ],
+        'Operations': [
+            (('EQUALS', 'Primary', 'Operations'), 'operation'),
+            (('NOT_EQUALS', 'Primary', 'Operations'), 'operation'),
+            (('LESS', 'Primary', 'Operations'), 'operation'),
+            (('LESS_EQUAL', 'Primary', 'Operations'), 'operation'),
+            (('GREATER', 'Primary', 'Operations'), 'operation'),
+            (('GREATER_EQUAL', 'Primary', 'Operations'), 'operation'),
+            (('PLUS', 'Primary', 'Operations'), 'operation'),
+            (('MINUS', 'Primary', 'Operations'), 'operation'),
+            (('MULTIPLY', 'Primary', 'Operations'), 'operation'),
+            (('DIVIDE', 'Primary', 'Operations'), 'operation'),
+            ((), 'empty'),
+        ],
+        'Primary': [
+            (('LPAREN', 'Expression', 'RPAREN'), 'first'),
+            (('STRING',), 'string_literal'),
+            (('LBRACKET', 'Expressions', 'RBRACKET'), 'array_literal'),
+            (('TRUE',), 'boolean_literal'),
+            (('FALSE',), 'boolean_literal'),
+            (('NUMBER',), 'numeric_literal'),
+            (('FLOAT',), 'numeric_literal'),
+            (('IDENTIFIER', 'CallArguments'), 'name'),
+        ],
+        'CallArguments': [
+            (('LPAREN', 'Expressions', 'RPAREN'), 'first'),
+            ((), 'none'),
+        ],
+        'Expressions': [
+            (('Expression', 'MoreExpressions'), 'list'),
+            ((), 'empty'),
+        ],
+        'MoreExpressions': [
+            (('COMMA', 'Expression', 'MoreExpressions'), 'append'),
+            ((), 'empty'),
+        ],
+    }
+
+    @staticmethod
+    def is_keyword(token):
+        return token in Syntax.KEYWORDS
+
+    @staticmethod
+    def is_operator(token):
+        return token in Syntax.OPERATORS
+
+    @staticmethod
+    def is_delimiter(token):
+        return token in Syntax.DELIMITERS
+
+    @staticmethod
+    def is_identifier(token):
+        if not token:
+            return False
+        if token[0].isdigit():
+            return False
+        return all(c.isalnum() or c == '_' for c in token) and not Syntax.is_keyword(token)
+
+    @staticmethod
+    def is_literal(token):
+        # A simple check for literals (numbers and strings)
+        if not token:
+            return False
+        if token.isdigit():
+            return True
+        if len(token) >= 2 and token.startswith('"') and token.endswith('"'):
+            return True
+        return False
+
+    @staticmethod
+    def keyword_tokens():
+        """Map each keyword to its token type"""
+        return {keyword: keyword.upper() for keyword in Syntax.KEYWORDS}
+
+    @staticmethod
+    def token_types():
+        """Every token type the lexer produces, i.e. the grammar's terminals"""
+        return set(Syntax.keyword_tokens().values()) | set(Syntax.SYMBOL_TOKENS.values()) | Syntax.LITERAL_TOKENS
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def parse_table():
+        """Generate the LL(1) parse table of GRAMMAR (once per process).
+
+        Returns {nonterminal: {lookahead token type: (symbols, action)}}.
+        Raises ValueError if the grammar uses an unknown symbol or is not
+        LL(1), i.e. some lookahead selects more than one production.
+        """
+        grammar = Syntax.GRAMMAR
+        terminals = Syntax.token_types()
+        for nonterminal, productions in grammar.items():
+            for symbols, _ in productions:
+                for symbol in symbols:
+                    if symbol not in grammar and symbol not in terminals:
+                        raise ValueError(f"Unknown grammar symbol '{symbol}' in {nonterminal}")
+
+        first = {nonterminal: set() for nonterminal in grammar}
+        nullable = set()
+
+        def first_of(symbols):
+            """FIRST set of a symbol sequence, and whether it can derive nothing"""
+            result = set()
+            for symbol in symbols:
+                if symbol not in grammar:
+                    result.add(symbol)
+                    return result, False
+                result |= first[symbol]
+                if symbol not in nullable:
+                    return result, False
+            return result, True
+
+        changed = True
+        while changed:
+            changed = False
+            for nonterminal, productions in grammar.items():
+                for symbols, _ in productions:
+                    symbols_first, symbols_nullable = first_of(symbols)
+                    if not symbols_first <= first[nonterminal]:
+                        first[nonterminal] |= symbols_first
+                        changed = True
+                    if symbols_nullable and nonterminal not in nullable:
+                        nullable.add(nonterminal)
+                        changed = True
+
+        follow = {nonterminal: set() for nonterminal in grammar}
+        follow[Syntax.START].add(Syntax.END)
+        changed = True
+        while changed:
+            changed = False
+            for nonterminal, productions in grammar.items():
+                for symbols, _ in productions:
+                    for index, symbol in enumerate(symbols):
+                        if symbol not in grammar:
+                            continue
+                        rest_first, rest_nullable = first_of(symbols[index + 1:])
+                        if rest_nullable:
+                            rest_first = rest_first | follow[nonterminal]
+                        if not rest_first <= follow[symbol]:
+                            follow[symbol] |= rest_first
+                            changed = True
+
+        table = {}
+        for nonterminal, productions in grammar.items():
+            row = table[nonterminal] = {}
+            for production in productions:
+                lookaheads, production_nullable = first_of(production[0])
+                if production_nullable:
+                    lookaheads = lookaheads | follow[nonterminal]
+                for lookahead in lookaheads:
+                    if lookahead in row:
+                        raise ValueError(f"Grammar is not LL(1): {nonterminal} has two productions for {lookahead}")
+                    row[lookahead] = production
+        return table
+
+    @staticmethod
+    def validate_syntax(tokens):
+        """Check that tokens form a Holy-D program, using the parse table"""
+        table = Syntax.parse_table()
+        stack = [Syntax.END, Syntax.START]
+        position = 0
+        while True:
+            symbol = stack.pop()
+            if symbol == Syntax.END:
+                break
+            lookahead = tokens[position][0] if position < len(tokens) else Syntax.END
+            row = table.get(symbol)
+            if row is None:
+                if lookahead != symbol:
+                    return False
+                position += 1
+                continue
+            production = row.get(lookahead)
+            if production is None:
+                return False
+            stack.extend(reversed(production[0]))
+        return position == len(tokens)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+try:
+    from src.linetable import line_of
+except ImportError:  # running as a script from inside src/
+    from linetable import line_of
+
+DEFAULT_CALL_THRESHOLD = 0.001  # Seconds; shorter function calls are not recorded
+
+
+class Tracer:
+    """Records nested timing spans as Chrome trace events.
+
+    Spans are "complete" events (a start and a duration, in
+    microseconds), which trace viewers such as chrome://tracing or
+    Perfetto nest by time. Tracing is opt-in per object: the parser,
+    execution contexts and cache stores are instrumented by replacing
+    methods on the instance (see trace_parser, trace_store and
+    ExecutionContext), so code that is not traced runs unchanged.
+    """
+
+    def __init__(self, call_threshold=DEFAULT_CALL_THRESHOLD):
+        self.call_threshold = call_threshold
+        self.events = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def add(self, name, category, start, duration, args=None):
+        """Record a span that started at start (a perf_counter() value)"""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 3),
+            "dur": round(duration * 1e6, 3),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category="phase", args=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.perf_counter() - start, args)
+
+    def trace(self, process_name="holy-d"):
+        """The trace as a Chrome trace-event JSON object"""
+        metadata = {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": process_name}}
+        with self.lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        return {"traceEvents": [metadata] + events, "displayTimeUnit": "ms"}
+
+    def write(self, path, process_name="holy-d"):
+        """Write the trace to path, replacing it atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as trace_file:
+            json.dump(self.trace(process_name), trace_file)
+        os.replace(temporary, path)
+
+
+def trace_parser(parser, tracer):
+    """Record a span for each top-level declaration parser parses.
+
+    The parser reads declarations one after another, so each one's span
+    runs from the end of the previous declaration (or the start of the
+    parse) to the end of its own.
+    """
+    parse = parser.parse
+    build_declaration = parser.build_declaration
+    mark = [0.0]
+
+    def traced_parse(tokens=None):
+        mark[0] = time.perf_counter()
+        return parse(tokens)
+
+    def traced_build_declaration(node):
+        declaration = build_declaration(node)
+        now = time.perf_counter()
+        name = declaration.get("name") or declaration.get("path") or "<enter>"
+        tracer.add(f"{declaration['type']} {name}", "parse", mark[0], now - mark[0],
+                   {"line": line_of(declaration, declaration)})
+        mark[0] = now
+        return declaration
+
+    parser.parse = traced_parse
+    parser.build_declaration = traced_build_declaration
+    return parser
+
+
+def trace_store(store, tracer):
+    """Record a span for each lookup and write of a cache.CacheStore"""
+    get = store.get
+    touch = store.touch
+    put = store.put
+
+    def traced_get(key):
+        start = time.perf_counter()
+        data = get(key)
+        tracer.add("cache get", "cache", start, time.perf_counter() - start,
+                   {"key": key[:16], "hit": data is not None})
+        return data
+
+    def traced_touch(key):
+        start = time.perf_counter()
+        path = touch(key)
+        tracer.add("cache touch", "cache", start, time.perf_counter() - start,
+                   {"key": key[:16], "hit": path is not None})
+        return path
+
+    def traced_put(key, data):
+        start = time.perf_counter()
+        path = put(key, data)
+        tracer.add("cache put", "cache", start, time.perf_counter() - start,
+                   {"key": key[:16], "bytes": len(data), "stored": path is not None})
+        return path
+
+    store.get = traced_get
+    store.touch = traced_touch
+    store.put = traced_put
+    return store
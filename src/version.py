@@ -0,0 +1,29 @@
+import os
+import hashlib
+import threading
+
+VERSION = "0.1.0"
+
+_toolchain = None
+_lock = threading.Lock()
+
+
+def toolchain_version():
+    """VERSION plus a hash of the toolchain's own source files.
+
+    Artifacts that depend on how the toolchain behaves (such as cached
+    results) are keyed by this, so an edited interpreter never reuses
+    them, even if VERSION was not bumped.
+    """
+    global _toolchain
+    with _lock:
+        if _toolchain is None:
+            directory = os.path.dirname(os.path.abspath(__file__))
+            digest = hashlib.sha256()
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".py"):
+                    digest.update(name.encode('utf-8') + b"\0")
+                    with open(os.path.join(directory, name), 'rb') as source_file:
+                        digest.update(source_file.read())
+            _toolchain = f"{VERSION}+{digest.hexdigest()[:16]}"
+        return _toolchain
@@ -0,0 +1,263 @@
+import sys
+from collections import Counter
+
+try:
+    from src.adaptive import GENERIC_OPERATORS
+    from src.arrays import Array
+    from src.builtin_functions import default_builtins
+    from src.linker import UnresolvedFunction
+    from src.linetable import set_error_location
+    from src.clock import SYSTEM_CLOCK
+except ImportError:  # running as a script from inside src/
+    from adaptive import GENERIC_OPERATORS
+    from arrays import Array
+    from builtin_functions import default_builtins
+    from linker import UnresolvedFunction
+    from linetable import set_error_location
+    from clock import SYSTEM_CLOCK
+
+
+# Marks a variable that did not exist before a call assigned it
+_UNBOUND = object()
+
+
+class CompiledFunction:
+    """Call target for a function compiled to bytecode"""
+
+    __slots__ = ('name', 'code')
+
+    def __init__(self, code):
+        self.name = code.name
+        self.code = code
+
+    def call(self, vm, args, node):
+        return vm.call_code(self.code, args)
+
+
+def _operator(op):
+    function = GENERIC_OPERATORS.get(op)
+    if function is None:
+        raise ValueError(f"Unknown operator: {op}")
+    return function
+
+
+class VM:
+    """Execute compiler.Bytecode on a value stack.
+
+    Before a code object first runs its instructions are resolved once:
+    call names become call targets and operator symbols become operator
+    functions, so the dispatch loop does no name lookups. Variables
+    follow the tree-walking interpreter: a call sees the caller's
+    variables, and its assignments are undone when it returns.
+
+    With count_pairs=True every executed opcode pair is tallied in
+    self.pair_counts, for choosing superinstructions.
+
+    An optional budget.Budget is enforced as in the interpreter, except
+    that a step is an instruction: each code object is charged its
+    length when it starts and each backward jump the length of the loop
+    it repeats.
+    """
+
+    def __init__(self, builtins=None, count_pairs=False, clock=None, budget=None):
+        self.builtins = builtins if builtins is not None else default_builtins()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK  # What sleep() and time() use
+        self.budget = budget
+        self.environment = {}
+        self.saved = None  # Caller values of variables the running code assigned
+        self.targets = {}
+        self.resolved = {}
+        self.pair_counts = Counter() if count_pairs else None
+
+    def run(self, bytecode):
+        self.targets = {}
+        for name, code in bytecode.functions.items():
+            # Declared functions take precedence over builtins, see linker.resolve
+            self.targets[name] = CompiledFunction(code)
+        if self.budget is not None:
+            self.budget.start()
+        for code in bytecode.entry:
+            self.execute(code, self.environment)
+        return self.environment
+
+    def write(self, text, flush=False):
+        if self.budget is not None:
+            self.budget.charge_output(text)
+        sys.stdout.write(text)
+        if flush:
+            sys.stdout.flush()
+
+    def call_code(self, code, args):
+        budget = self.budget
+        if budget is not None:
+            budget.enter_call()
+        environment = self.environment
+        caller_saved = self.saved
+        saved = self.saved = {}
+        for param_name, value in zip(code.params, args):
+            if param_name not in saved:
+                saved[param_name] = environment.get(param_name, _UNBOUND)
+            environment[param_name] = value
+        try:
+            return self.execute(code, environment)
+        finally:
+            if budget is not None:
+                budget.exit_call()
+            # Undo the call's assignments, as in ExecutionContext.call_function
+            for name, value in saved.items():
+                if value is _UNBOUND:
+                    del environment[name]
+                else:
+                    environment[name] = value
+            self.saved = caller_saved
+
+    def target(self, name):
+        target = self.targets.get(name)
+        if target is None:
+            target = self.builtins.get(name) or UnresolvedFunction(name)
+            self.targets[name] = target
+        return target
+
+    def resolve(self, code):
+        """Return code's instructions with call targets and operators bound"""
+        entry = self.resolved.get(id(code))
+        if entry is not None:
+            return entry[1]
+        instructions = []
+        for op, arg in code.instructions:
+            if op in ('CALL', 'CALL_DISCARD'):
+                name, argc = arg
+                arg = (self.target(name), argc, {"type": "FunctionCall", "name": name})
+            elif op == 'BINARY_OP':
+                arg = _operator(arg)
+            elif op == 'BINARY_OP_JUMP_IF_FALSE':
+                arg = (_operator(arg[0]), arg[1])
+            elif op in ('BINARY_OP_NAME_CONST', 'BINARY_OP_NAME_NAME',
+                        'NAME_CONST_JUMP_IF_FALSE', 'NAME_NAME_JUMP_IF_FALSE'):
+                arg = (arg[0], arg[1], _operator(arg[2])) + arg[3:]
+            instructions.append((op, arg))
+        # The code object is kept alongside so its id cannot be reused
+        self.resolved[id(code)] = (code, instructions)
+        return instructions
+
+    def execute(self, code, environment):
+        instructions = self.resolve(code)
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pair_counts = self.pair_counts
+        saved = self.saved
+        budget = self.budget
+        previous = None
+        pc = 0
+        try:
+            if budget is not None:
+                budget.charge(len(instructions))
+            while True:
+                op, arg = instructions[pc]
+                pc += 1
+                if pair_counts is not None:
+                    pair_counts[(previous, op)] += 1
+                    previous = op
+
+                if op == 'LOAD_NAME':
+                    try:
+                        push(environment[arg])
+                    except KeyError:
+                        raise NameError(f"Variable '{arg}' not defined") from None
+                elif op == 'LOAD_CONST':
+                    push(arg)
+                elif op == 'STORE_NAME':
+                    if saved is not None and arg not in saved:
+                        saved[arg] = environment.get(arg, _UNBOUND)
+                    environment[arg] = pop()
+                elif op == 'BINARY_OP':
+                    right = pop()
+                    push(arg(pop(), right))
+                elif op == 'JUMP_IF_FALSE':
+                    if not pop():
+                        pc = arg
+                elif op == 'JUMP':
+                    if budget is not None and arg < pc:
+                        # Charge each loop iteration, inlining Budget.charge()
+                        budget.steps += pc - arg
+                        if budget.steps >= budget.next_check:
+                            budget.check()
+                    pc = arg
+                elif op == 'NAME_CONST_JUMP_IF_FALSE':
+                    name, constant, function, target = arg
+                    try:
+                        if not function(environment[name], constant):
+                            pc = target
+                    except KeyError:
+                        raise NameError(f"Variable '{name}' not defined") from None
+                elif op == 'NAME_NAME_JUMP_IF_FALSE':
+                    left, right, function, target = arg
+                    try:
+                        if not function(environment[left], environment[right]):
+                            pc = target
+                    except KeyError as error:
+                        raise NameError(f"Variable '{error.args[0]}' not defined") from None
+                elif op == 'BINARY_OP_NAME_CONST':
+                    name, constant, function = arg
+                    try:
+                        push(function(environment[name], constant))
+                    except KeyError:
+                        raise NameError(f"Variable '{name}' not defined") from None
+                elif op == 'BINARY_OP_NAME_NAME':
+                    left, right, function = arg
+                    try:
+                        push(function(environment[left], environment[right]))
+                    except KeyError as error:
+                        raise NameError(f"Variable '{error.args[0]}' not defined") from None
+                elif op == 'BINARY_OP_JUMP_IF_FALSE':
+                    function, target = arg
+                    right = pop()
+                    if not function(pop(), right):
+                        pc = target
+                elif op == 'STORE_CONST':
+                    if saved is not None and arg[1] not in saved:
+                        saved[arg[1]] = environment.get(arg[1], _UNBOUND)
+                    environment[arg[1]] = arg[0]
+                elif op == 'CALL' or op == 'CALL_DISCARD':
+                    target, argc, node = arg
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    result = target.call(self, args, node)
+                    if op == 'CALL':
+                        push(result)
+                elif op == 'PRINT':
+                    if arg:
+                        self.write(f"{pop()}\n")
+                    else:
+                        self.write(str(pop()), flush=True)
+                elif op == 'PRINT_CONST':
+                    value, newline = arg
+                    if newline:
+                        self.write(f"{value}\n")
+                    else:
+                        self.write(str(value), flush=True)
+                elif op == 'RETURN':
+                    return pop()
+                elif op == 'RETURN_CONST':
+                    return arg
+                elif op == 'POP':
+                    pop()
+                elif op == 'DUP_TOP':
+                    push(stack[-1])
+                elif op == 'BUILD_ARRAY':
+                    if arg:
+                        values = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        values = []
+                    push(Array.from_values(values))
+                else:
+                    raise ValueError(f"Unknown opcode: {op}")
+        except Exception as error:
+            # pc has already moved past the instruction that failed
+            set_error_location(error, code.name, code.line_for(pc - 1))
+            raise
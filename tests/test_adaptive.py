@@ -0,0 +1,95 @@
+import io
+import sys
+import unittest
+from collections import Counter
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.adaptive import BinarySite
+
+class TestAdaptive(unittest.TestCase):
+
+    def site(self, operator="+"):
+        return BinarySite({"type": "BinaryExpression", "operator": operator, "line": 3})
+
+    def warm(self, site, left, right):
+        for _ in range(BinarySite.WARMUP):
+            site.evaluate(left, right)
+
+    def test_specializes_stable_types(self):
+        site = self.site()
+        self.warm(site, 1, 2)
+        self.assertEqual(site.describe()["state"], "specialized")
+        self.assertEqual(site.describe()["types"], ("int", "int"))
+        self.assertEqual(site.evaluate(40, 2), 42)
+
+    def test_guard_failure_deoptimizes(self):
+        site = self.site()
+        self.warm(site, 1, 2)
+        self.assertEqual(site.evaluate("a", "b"), "ab")
+        self.assertEqual(site.describe()["state"], "warming")
+        self.assertEqual(site.describe()["misses"], 1)
+        self.warm(site, "a", "b")
+        self.assertEqual(site.describe()["types"], ("str", "str"))
+
+    def test_polymorphic_site_stays_generic(self):
+        site = self.site()
+        for i in range(BinarySite.WARMUP):
+            site.evaluate(*((1, 2) if i % 2 else ("a", "b")))
+        self.assertEqual(site.describe()["state"], "generic")
+        self.assertEqual(site.evaluate(1, 2), 3)
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            self.site("%").evaluate(1, 2)
+
+    def test_interpreter_records_sites(self):
+        body = "assign x = 1 + 2;" * 2
+        ast = Parser(Lexer().tokenize("func:f { " + body + " } enter { call f; }")).parse()
+        interpreter = Interpreter(adaptive=True)
+        self.assertEqual(interpreter.interpret(ast), {})
+        stats = interpreter.specialization_stats()
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[0]["state"], "warming")
+
+    def run_source(self, source, adaptive):
+        output = io.StringIO()
+        interpreter = Interpreter(adaptive=adaptive, output=output)
+        interpreter.interpret(Parser(Lexer().tokenize(source)).parse())
+        return interpreter, output.getvalue()
+
+    def test_specialized_sites_make_no_more_calls_than_generic(self):
+        source = """func:work(n) {
+            assign total = 0;
+            for (i = 0; i < n; i = i + 1) { assign total = total + i * 2 - 1; }
+            return total;
+        }
+        enter { println(work(200)); }"""
+        counts = []
+        for adaptive in (False, True):
+            calls = Counter()
+            sys.setprofile(lambda frame, event, argument: calls.update(("call",)) if event == "call" else None)
+            try:
+                interpreter, output = self.run_source(source, adaptive)
+            finally:
+                sys.setprofile(None)
+            self.assertEqual(output, "39600\n")
+            counts.append(calls["call"])
+        self.assertEqual({stats["state"] for stats in interpreter.specialization_stats()}, {"specialized"})
+        self.assertLess(counts[1], counts[0])
+
+    def test_guard_failure_in_a_running_program(self):
+        source = """func:add(a, b) { return a + b; }
+        enter {
+            for (i = 0; i < 10; i = i + 1) { assign x = add(i, 1); }
+            println(x);
+            println(add("a", "b"));
+            println(add(1.5, 1));
+        }"""
+        interpreter, output = self.run_source(source, True)
+        self.assertEqual(output, "10\nab\n2.5\n")
+        site = [stats for stats in interpreter.specialization_stats() if stats["operator"] == "+"][0]
+        self.assertEqual((site["state"], site["misses"]), ("warming", 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import io
+import sys
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.arrays import Array
+from src.compiler import Compiler
+from src.vm import VM
+
+class TestArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.captured_output = io.StringIO()
+        sys.stdout = self.captured_output
+
+    def tearDown(self):
+        sys.stdout = sys.__stdout__
+
+    def run_source(self, source_code):
+        Interpreter().interpret(Parser(Lexer().tokenize(source_code)).parse())
+        return self.captured_output.getvalue()
+
+    def test_parse_array_literal(self):
+        ast = Parser(Lexer().tokenize("assign a = [1, 2.5, x];")).parse_statement()
+        literal = ast["value"]
+        self.assertEqual(literal["type"], "ArrayLiteral")
+        self.assertEqual([e["type"] for e in literal["elements"]], ["NumericLiteral", "NumericLiteral", "Identifier"])
+
+    def test_typecodes(self):
+        self.assertEqual(Array.from_values([1, 2]).data.typecode, 'q')
+        self.assertEqual(Array.from_values([1, 2.0]).data.typecode, 'd')
+        with self.assertRaises(TypeError):
+            Array.from_values([1, "2"])
+
+    def test_elementwise_arithmetic(self):
+        output = self.run_source("enter { assign a = [1, 2, 3]; println(a + [10, 20, 30]); println(a * 2 - 1); println(a / 2); }")
+        self.assertEqual(output, "[11, 22, 33]\n[1, 3, 5]\n[0.5, 1.0, 1.5]\n")
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            Array.from_values([1]) + Array.from_values([1, 2])
+
+    def test_bulk_builtins(self):
+        source_code = """enter {
+            assign a = range(1, 101);
+            println(len(a));
+            println(sum(a));
+            println(min(a) + max(a));
+            println(slice(a, 2, 5));
+            println(sum(fill(4, 2.5)));
+        }"""
+        self.assertEqual(self.run_source(source_code), "100\n5050\n101\n[3, 4, 5]\n10.0\n")
+
+    def test_declared_functions_win_over_array_builtins(self):
+        source_code = """func:sum(a, b) { return a + b; }
+        func:max(a, b) { if (a > b) { return a; } return b; }
+        enter {
+            println(sum(1, 2));
+            println(max(3, 7));
+            println(len([1, 2]));
+        }"""
+        self.assertEqual(self.run_source(source_code), "3\n7\n2\n")
+        VM().run(Compiler().compile(Parser(Lexer().tokenize(source_code)).parse()))
+        self.assertEqual(self.captured_output.getvalue(), "3\n7\n2\n" * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import io
+import sys
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.compiler import Compiler
+from src.vm import VM
+from src.budget import Budget, BudgetExceeded
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.captured_output = io.StringIO()
+        sys.stdout = self.captured_output
+
+    def tearDown(self):
+        sys.stdout = sys.__stdout__
+
+    def run_source(self, source_code, budget):
+        ast = Parser(Lexer().tokenize(source_code)).parse()
+        return Interpreter(budget=budget).interpret(ast)
+
+    def test_step_limit_stops_infinite_loop(self):
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_source("enter { while (true) { assign x = 1; } }", Budget(max_steps=10000))
+        self.assertEqual(error.exception.budget, "steps")
+
+    def test_time_limit(self):
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_source("enter { for (i = 0; true; i = i + 1) { } }", Budget(max_time=0.05))
+        self.assertEqual(error.exception.budget, "time")
+
+    def test_output_limit_counts_utf8_bytes(self):
+        budget = Budget(max_output=10)
+        budget.charge_output("\u00e9\u00e9\u00e9\u00e9")
+        self.assertEqual(budget.output, 8)
+        with self.assertRaises(BudgetExceeded):
+            budget.charge_output("\u00e9\n")
+
+    def test_call_depth_limit(self):
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_source("func:f { call f; } enter { call f; }", Budget(max_depth=50))
+        self.assertEqual(error.exception.budget, "call depth")
+
+    def test_output_limit(self):
+        with self.assertRaises(BudgetExceeded):
+            self.run_source("enter { while (true) { println(\"0123456789\"); } }", Budget(max_output=100))
+        self.assertLessEqual(len(self.captured_output.getvalue()), 100)
+
+    def test_within_budget_runs_normally(self):
+        budget = Budget(max_steps=1000, max_time=10, max_depth=5, max_output=100)
+        self.run_source("func:f { println(\"hi\"); } enter { for (i = 0; i < 3; i = i + 1) { call f; } }", budget)
+        self.assertEqual(self.captured_output.getvalue(), "hi\nhi\nhi\n")
+        self.assertEqual(budget.depth, 0)
+
+    def run_bytecode(self, source_code, budget):
+        ast = Parser(Lexer().tokenize(source_code)).parse()
+        return VM(budget=budget).run(Compiler().compile(ast))
+
+    def test_vm_enforces_the_budget(self):
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_bytecode("enter { while (true) { assign x = 1; } }", Budget(max_steps=10000))
+        self.assertEqual(error.exception.budget, "steps")
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_bytecode("enter { for (i = 0; true; i = i + 1) { } }", Budget(max_time=0.05))
+        self.assertEqual(error.exception.budget, "time")
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_bytecode("func:f { call f; } enter { call f; }", Budget(max_depth=50))
+        self.assertEqual(error.exception.budget, "call depth")
+        with self.assertRaises(BudgetExceeded) as error:
+            self.run_bytecode("enter { while (true) { println(\"0123456789\"); } }", Budget(max_output=100))
+        self.assertEqual(error.exception.budget, "output bytes")
+
+    def test_vm_within_budget_runs_normally(self):
+        budget = Budget(max_steps=1000, max_time=10, max_depth=5, max_output=100)
+        self.run_bytecode("func:f { println(\"hi\"); } enter { for (i = 0; i < 3; i = i + 1) { call f; } }", budget)
+        self.assertEqual(self.captured_output.getvalue(), "hi\nhi\nhi\n")
+        self.assertEqual(budget.depth, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import io
+import os
+import stat
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from src.cache import CacheStore, cache_key, cache_root, parse_size, default_store, save_ast, load_ast, format_stats
+from src.cache import save_module, load_module, AST_FORMAT
+
+class TestCacheStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_and_get(self):
+        store = CacheStore(self.root)
+        key = cache_key("test", b"content")
+        self.assertIsNone(store.get(key))
+        path = store.put(key, b"value")
+        self.assertTrue(path.startswith(os.path.join(self.root, key[:2])))
+        self.assertEqual(store.get(key), b"value")
+        self.assertEqual(store.put_json(cache_key("json"), {"a": [1]}) is not None, True)
+        self.assertEqual(store.get_json(cache_key("json")), {"a": [1]})
+        stats = store.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["writes"]), (2, 1, 2))
+
+    def test_keys_depend_on_kind_and_content(self):
+        self.assertEqual(cache_key("ast", b"x"), cache_key("ast", "x"))
+        self.assertNotEqual(cache_key("ast", "x"), cache_key("module", "x"))
+        self.assertNotEqual(cache_key("ast", "ab", "c"), cache_key("ast", "a", "bc"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        store = CacheStore(self.root, max_size=1300)
+        keys = [cache_key("entry", index) for index in range(4)]
+        for age, key in enumerate(keys):
+            path = store.put(key, b"x" * 300)
+            os.utime(path, (1000 + age, 1000 + age))
+        # Reading the oldest entry makes it the most recently used
+        self.assertIsNotNone(store.get(keys[0]))
+        store.put(cache_key("entry", "new"), b"x" * 300)
+        self.assertIsNone(store.get(keys[1]))
+        self.assertIsNone(store.get(keys[2]))
+        self.assertIsNotNone(store.get(keys[0]))
+        self.assertLessEqual(sum(size for _, size, _ in store.entries()), 1300)
+        self.assertEqual(store.stats()["evictions"], 2)
+        self.assertEqual(store.stats()["evicted_bytes"], 600)
+
+    def test_concurrent_writers_of_one_key(self):
+        key = cache_key("shared")
+        data = b"y" * 100000
+
+        def write(_):
+            return CacheStore(self.root).put(key, data)
+
+        with ThreadPoolExecutor(8) as pool:
+            self.assertTrue(all(pool.map(write, range(32))))
+        self.assertEqual(CacheStore(self.root).get(key), data)
+        self.assertEqual([path for _, _, path in CacheStore(self.root).entries()], [CacheStore(self.root).path(key)])
+
+    @unittest.skipIf(hasattr(os, "geteuid") and os.geteuid() == 0, "root can write anywhere")
+    def test_unwritable_location_falls_back(self):
+        os.makedirs(self.root)
+        os.chmod(self.root, stat.S_IRUSR | stat.S_IXUSR)
+        try:
+            store = CacheStore(self.root)
+            store.fallback = os.path.join(self.directory.name, "fallback")
+            self.assertIsNotNone(store.put(cache_key("a"), b"1"))
+            self.assertEqual(store.stats()["root"], store.fallback)
+            self.assertEqual(store.get(cache_key("a")), b"1")
+
+            nowhere = CacheStore(self.root)
+            nowhere.fallback = self.root
+            self.assertIsNone(nowhere.put(cache_key("a"), b"1"))
+            self.assertIsNone(nowhere.get(cache_key("a")))
+            self.assertEqual(nowhere.stats()["write_errors"], 1)
+        finally:
+            os.chmod(self.root, stat.S_IRWXU)
+
+    def test_missing_parent_directory_falls_back(self):
+        blocker = os.path.join(self.directory.name, "file")
+        with open(blocker, "w"):
+            pass
+        store = CacheStore(os.path.join(blocker, "cache"))
+        store.fallback = os.path.join(self.directory.name, "fallback")
+        self.assertIsNotNone(store.put(cache_key("a"), b"1"))
+        self.assertEqual(store.get(cache_key("a")), b"1")
+
+    def test_location_and_size_configuration(self):
+        with mock.patch.dict(os.environ, {"HOLY_D_CACHE_DIR": self.root, "HOLY_D_CACHE_SIZE": "2M"}):
+            self.assertEqual(cache_root(), self.root)
+            self.assertEqual(default_store().root, self.root)
+            self.assertEqual(default_store().max_size, 2 * 1024 * 1024)
+            self.assertIs(default_store(), default_store())
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.root}):
+            os.environ.pop("HOLY_D_CACHE_DIR", None)
+            self.assertEqual(cache_root(), os.path.join(self.root, "holy-d"))
+        self.assertEqual(parse_size("64k"), 65536)
+        self.assertEqual(parse_size("1000"), 1000)
+
+    def test_script_asts_are_shared_by_content(self):
+        store = CacheStore(self.root)
+        ast = {"type": "Program", "body": []}
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            self.assertTrue(save_ast(ast, "a.hd", store))
+            self.assertTrue(save_ast(ast, "b.hd", store))
+        self.assertEqual(stdout.getvalue(), "")  # Standard output is the script's alone
+        self.assertEqual(load_ast("a.hd", store), ast)
+        self.assertEqual(load_ast("b.hd", store), ast)
+        self.assertIsNone(load_ast("c.hd", store))
+        self.assertEqual(len(store.entries()), 3)  # One AST, two script entries pointing at it
+        self.assertIn("4 hits", format_stats(store))
+
+    def test_cached_asts_are_keyed_by_format_and_toolchain(self):
+        store = CacheStore(self.root)
+        ast = {"type": "Program", "body": []}
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertTrue(save_ast(ast, "a.hd", store))
+        self.assertTrue(save_module(ast, "m.hd", "digest", store))
+        with mock.patch("src.cache.AST_FORMAT", AST_FORMAT + 1):
+            self.assertIsNone(load_ast("a.hd", store))
+            self.assertIsNone(load_module("m.hd", "digest", store))
+        with mock.patch("src.cache.toolchain_version", return_value="0.0.0+other"):
+            self.assertIsNone(load_ast("a.hd", store))
+            self.assertIsNone(load_module("m.hd", "digest", store))
+        self.assertEqual(load_ast("a.hd", store), ast)
+        self.assertEqual(load_module("m.hd", "digest", store), ast)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import io
+import time
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.compiler import Compiler
+from src.vm import VM
+from src.program import compile
+from src.clock import VirtualClock, SystemClock
+from src.resultcache import nondeterminism
+
+POLLING = """func:poll(n) {
+    println(n);
+    println(time());
+    call sleep(30);
+}
+enter {
+    for (i = 0; i < 3; i = i + 1) { call poll(i); }
+    println(time());
+}"""
+
+class TestClock(unittest.TestCase):
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def test_virtual_sleep_advances_time_without_waiting(self):
+        clock = VirtualClock(100)
+        output = io.StringIO()
+        start = time.monotonic()
+        Interpreter(output=output, clock=clock).interpret(self.parse(POLLING))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(output.getvalue(), "0\n100.0\n1\n130.0\n2\n160.0\n190.0\n")
+        self.assertEqual(clock.slept, 90)
+
+    def test_jit_and_fresh_contexts_use_the_clock(self):
+        expected = "0\n0.0\n1\n30.0\n2\n60.0\n90.0\n"
+        output = io.StringIO()
+        interpreter = Interpreter(output=output, jit=True, clock=VirtualClock())
+        interpreter.jit.threshold = 1
+        interpreter.interpret(self.parse(POLLING))
+        self.assertEqual(output.getvalue(), expected)
+
+        output = io.StringIO()
+        compile(POLLING).run(output=output, clock=VirtualClock())
+        self.assertEqual(output.getvalue(), expected)
+
+    def test_vm_uses_the_clock(self):
+        clock = VirtualClock()
+        vm = VM(clock=clock)
+        vm.run(Compiler().compile(self.parse("enter { call sleep(5); t = time(); }")))
+        self.assertEqual(vm.environment["t"], 5.0)
+
+    def test_negative_sleep_fails_like_the_system_clock(self):
+        with self.assertRaises(ValueError):
+            VirtualClock().sleep(-1)
+        with self.assertRaises(ValueError):
+            SystemClock().sleep(-1)
+
+    def test_system_clock_is_the_default(self):
+        interpreter = Interpreter(output=io.StringIO())
+        before = time.time()
+        interpreter.interpret(self.parse("enter { call sleep(0.01); t = time(); }"))
+        self.assertGreaterEqual(interpreter.environment["t"], before + 0.01)
+
+    def test_a_declared_time_function_is_not_replaced(self):
+        source_code = 'func:time { return "noon"; } enter { println(time()); }'
+        output = io.StringIO()
+        Interpreter(output=output).interpret(self.parse(source_code))
+        self.assertEqual(output.getvalue(), "noon\n")
+        self.assertEqual(nondeterminism(self.parse(source_code)), [])
+
+if __name__ == '__main__':
+    unittest.main()
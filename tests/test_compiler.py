@@ -1,7 +1,12 @@
 import unittest
+import io
+import sys
 from src.compiler import Compiler
 from src.parser import Parser
 from src.lexer import Lexer
+from src.interpreter import Interpreter
+from src.peephole import pair_statistics
+from src.vm import VM
 
 class TestCompiler(unittest.TestCase):
 
@@ -34,5 +39,80 @@ class TestCompiler(unittest.TestCase):
         expected_bytecode = b'\x03'  # Example expected bytecode for if statement
         self.assertEqual(bytecode, expected_bytecode)
 
+    def run_both(self, source_code, optimize):
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+        try:
+            Interpreter().interpret(ast)
+            expected = captured_output.getvalue()
+            captured_output.seek(0)
+            captured_output.truncate()
+            VM().run(self.compiler.compile(ast, optimize=optimize))
+        finally:
+            sys.stdout = sys.__stdout__
+        return expected, captured_output.getvalue()
+
+    def test_vm_matches_interpreter(self):
+        source_code = """func:total(n) {
+            assign sum = 0;
+            for (i = 0; i < n; i = i + 1) { sum = sum + i * 2; }
+            return sum;
+        }
+        func:describe(n) { if (n > 10) { return "big"; } else { return "small"; } }
+        func:implicit { assign x = 5; }
+        func:branch(n) { if (n > 1) { assign y = n * 2; } else { call total(n); } }
+        func:open(n) { if (n > 1) { assign y = n; } }
+        func:loop { while (false) { } }
+        enter {
+            println(implicit());
+            println(branch(3));
+            println(branch(1));
+            println(open(0));
+            println(loop());
+            assign x = 2 + 3;
+            println(x);
+            println(total(x) + 1);
+            println(describe(total(4)));
+            print("no newline");
+            call total(3);
+            assign i = 7;
+            println(total(2) + i);
+            println([1, 2] + [3, 4]);
+            while (false) { println("never"); }
+        }"""
+        for optimize in (False, True):
+            expected, actual = self.run_both(source_code, optimize)
+            self.assertEqual(actual, expected)
+
+    def test_peephole_folds_and_propagates_constants(self):
+        ast = self.parser.parse(self.lexer.tokenize("enter { assign x = 2 * 3 + 1; println(x); while (false) { println(x); } }"))
+        code = self.compiler.compile(ast).entry[0]
+        self.assertEqual(code.instructions, [
+            ('STORE_CONST', (7, 'x')),
+            ('PRINT_CONST', (7, True)),
+            ('RETURN_CONST', None),
+        ])
+        self.assertEqual(self.compiler.stats["propagated"], 1)
+
+    def test_peephole_is_optional(self):
+        ast = self.parser.parse(self.lexer.tokenize("enter { println(1 + 2); }"))
+        code = self.compiler.compile(ast, optimize=False).entry[0]
+        self.assertIn(('BINARY_OP', '+'), code.instructions)
+        self.assertIsNone(self.compiler.stats)
+
+    def test_superinstructions_fuse_loop_test(self):
+        ast = self.parser.parse(self.lexer.tokenize("func:f(n) { for (i = 0; i < n; i = i + 1) { } } enter { call f(3); }"))
+        program = self.compiler.compile(ast)
+        ops = [op for op, _ in program.functions["f"].instructions]
+        self.assertIn('NAME_NAME_JUMP_IF_FALSE', ops)
+        self.assertIn('BINARY_OP_NAME_CONST', ops)
+        self.assertEqual([op for op, _ in program.entry[0].instructions], ['LOAD_CONST', 'CALL_DISCARD', 'RETURN_CONST'])
+
+    def test_pair_statistics(self):
+        ast = self.parser.parse(self.lexer.tokenize("enter { println(\"a\"); println(\"b\"); }"))
+        pairs = pair_statistics(self.compiler.compile(ast, optimize=False).code_objects())
+        self.assertEqual(pairs[('LOAD_CONST', 'PRINT')], 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+import unittest
+import io
+import os
+import math
+import time
+import tempfile
+import contextlib
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.cache import save_ast, load_ast
+
+# Inputs double in size this many times
+STEPS = 4
+
+# Fitted exponents above this fail: linear stages fit about 1.0, quadratic
+# ones about 2.0, and the margin absorbs timer noise on busy machines
+MAX_EXPONENT = 1.4
+
+# Each size is timed this many times and the fastest run is kept
+REPEAT = 3
+
+
+def fit_exponent(sizes, times):
+    """Least-squares slope of log(time) against log(size): time ~ size ** slope"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def measure(stage, make_input, base):
+    """Time stage on inputs of geometrically increasing size.
+
+    make_input(size) builds the input outside the timed region. Returns
+    the sizes and the best time for each.
+    """
+    sizes = [base * 2 ** step for step in range(STEPS)]
+    times = []
+    for size in sizes:
+        argument = make_input(size)
+        best = float("inf")
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            stage(argument)
+            best = min(best, time.perf_counter() - start)
+        times.append(best)
+    return sizes, times
+
+
+def statements(size):
+    """Source with size assignments to distinct globals"""
+    return "enter {\n" + "".join(f"    value_{i} = {i} + 1;\n" for i in range(size)) + "}\n"
+
+
+def parse(source_code):
+    return Parser(Lexer().tokenize(source_code)).parse()
+
+
+class TestComplexity(unittest.TestCase):
+
+    def assertLinear(self, stage, make_input, base):
+        sizes, times = measure(stage, make_input, base)
+        exponent = fit_exponent(sizes, times)
+        timings = ", ".join(f"{size}: {t * 1000:.2f}ms" for size, t in zip(sizes, times))
+        self.assertLess(exponent, MAX_EXPONENT, f"growth ~ n**{exponent:.2f} ({timings})")
+
+    def test_fit_exponent(self):
+        sizes = [10, 20, 40, 80]
+        self.assertAlmostEqual(fit_exponent(sizes, [s * 3.0 for s in sizes]), 1.0)
+        self.assertAlmostEqual(fit_exponent(sizes, [s * s * 0.5 for s in sizes]), 2.0)
+
+    def test_lexer_statements(self):
+        self.assertLinear(Lexer().tokenize, statements, 500)
+
+    def test_lexer_long_lexemes(self):
+        def long_lexemes(size):
+            return f'x{"_" * size} = "{"a" * size}\\n{"b" * size}" + 0.{"5" * size};'
+        self.assertLinear(Lexer().tokenize, long_lexemes, 20000)
+
+    def test_parser_statements(self):
+        self.assertLinear(lambda tokens: Parser(tokens).parse(), lambda size: Lexer().tokenize(statements(size)), 500)
+
+    def test_parser_operator_chain(self):
+        def chain(size):
+            return Lexer().tokenize("enter { x = 1" + " + 1" * size + "; }")
+        self.assertLinear(lambda tokens: Parser(tokens).parse(), chain, 1000)
+
+    def test_interpreter_calls_with_many_globals(self):
+        # Each call used to copy every global variable
+        def program(size):
+            source_code = statements(size).replace("}\n", "")
+            source_code += f"    i = 0;\n    while (i < {size}) {{\n        call f(i);\n        i = i + 1;\n    }}\n}}\n"
+            return parse("func:f(x) { y = x; }\n" + source_code)
+        self.assertLinear(lambda ast: Interpreter(output=io.StringIO()).interpret(ast), program, 1000)
+
+    def test_cache_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = os.path.join(directory, "script.hd")
+
+            def save_and_load(ast):
+                with contextlib.redirect_stderr(io.StringIO()):
+                    save_ast(ast, script)
+                self.assertEqual(load_ast(script), ast)
+
+            self.assertLinear(save_and_load, lambda size: parse(statements(size)), 250)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import io
+from concurrent.futures import ThreadPoolExecutor
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.language import compile
+
+SOURCE = """func:square(n) { return n * n; }
+func:report(id) {
+    assign total = 0;
+    for (i = 0; i < 200; i = i + 1) { total = total + square(i) + id; }
+    println("run " + label + ": " + digits);
+    return total;
+}
+enter { assign result = report(id); }"""
+
+
+def expected_total(id):
+    return sum(i * i + id for i in range(200))
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def check_runs(self, run):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(run, range(160)))
+        for id, (output, environment) in enumerate(results):
+            self.assertEqual(output, f"run {id}: {'x' * (id % 7)}\n")
+            self.assertEqual(environment["result"], expected_total(id))
+            self.assertEqual(environment["id"], id)
+
+    def test_program_runs_are_isolated(self):
+        program = compile(SOURCE)
+
+        def run(id):
+            output = io.StringIO()
+            environment = program.run(inputs={"id": id, "label": str(id), "digits": "x" * (id % 7)}, output=output, adaptive=True)
+            return output.getvalue(), environment
+
+        self.check_runs(run)
+
+    def test_shared_interpreter_runs_are_isolated(self):
+        interpreter = Interpreter()
+        ast = Parser(Lexer(SOURCE).tokenize()).parse()
+        interpreter.load(ast)
+
+        def run(id):
+            output = io.StringIO()
+            environment = interpreter.run(ast, inputs={"id": id, "label": str(id), "digits": "x" * (id % 7)}, output=output)
+            return output.getvalue(), environment
+
+        self.check_runs(run)
+        self.assertEqual(interpreter.environment, {})
+
+if __name__ == '__main__':
+    unittest.main()
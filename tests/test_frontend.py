@@ -0,0 +1,38 @@
+import unittest
+from src.lexer import Lexer
+from src.parser import Parser
+from src.frontend import find_split_points, split_source, parse_parallel
+
+class TestFrontend(unittest.TestCase):
+
+    def setUp(self):
+        self.source_code = "".join(
+            f"func:f{i}(x) {{\n    println(\"enter {{ func\" + x);\n}}\n// func in a comment\n"
+            for i in range(200)
+        ) + "enter {\n    call f0(\"a\");\n}\n"
+
+    def test_split_points_skip_strings_and_comments(self):
+        points = find_split_points(self.source_code)
+        self.assertEqual(len(points), 201)
+        self.assertTrue(all(self.source_code.startswith(("func", "enter"), p) for p in points))
+
+    def test_split_source_preserves_positions(self):
+        for text, line, column, offset in split_source(self.source_code, 8):
+            self.assertEqual(line, self.source_code.count("\n", 0, offset) + 1)
+            self.assertEqual(column, 1)
+            self.assertEqual(self.source_code[offset:offset + len(text)], text)
+
+    def test_parallel_matches_serial(self):
+        serial = Parser(Lexer(self.source_code).tokenize()).parse()
+        self.assertEqual(parse_parallel(self.source_code, jobs=2), serial)
+
+    def test_parallel_reports_serial_error(self):
+        source_code = self.source_code + "func:broken {\n    println(\"x\")\n}\n"
+        with self.assertRaises(SyntaxError) as serial:
+            Parser(Lexer(source_code).tokenize()).parse()
+        with self.assertRaises(SyntaxError) as parallel:
+            parse_parallel(source_code, jobs=2)
+        self.assertEqual(str(parallel.exception), str(serial.exception))
+
+if __name__ == '__main__':
+    unittest.main()
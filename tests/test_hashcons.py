@@ -0,0 +1,92 @@
+import unittest
+import io
+import json
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.astutil import walk
+from src.linetable import format_error
+from src.memstats import count_nodes, count_distinct_nodes
+from src.inline import inline_functions
+from src.hashcons import InternTable, intern_ast, pool, unpool
+
+SOURCE = """func:greet(name) {
+    println("Hello, " + name + "!");
+    return "Hello, " + name + "!";
+}
+enter {
+    x = greet("Ada");
+    y = greet("Ada");
+    println(x == y);
+    println(1 + 1.0);
+}"""
+
+class TestHashCons(unittest.TestCase):
+
+    def parse(self, source_code, hash_cons=False):
+        return Parser(Lexer().tokenize(source_code), hash_cons).parse()
+
+    def run_program(self, ast):
+        output = io.StringIO()
+        Interpreter(output=output).interpret(ast)
+        return output.getvalue()
+
+    def test_identical_expressions_are_shared(self):
+        plain = self.parse(SOURCE)
+        shared = self.parse(SOURCE, hash_cons=True)
+        self.assertEqual(count_nodes(shared), count_nodes(plain))
+        self.assertEqual(count_distinct_nodes(plain), count_nodes(plain))
+        self.assertLess(count_distinct_nodes(shared), count_distinct_nodes(plain))
+        function, entry = shared["body"]
+        self.assertIs(function["body"][0]["expression"], function["body"][1]["argument"])
+        self.assertIs(entry["body"][0]["value"], entry["body"][1]["value"])
+        # Statements are never shared
+        self.assertIsNot(entry["body"][0], entry["body"][1])
+        self.assertEqual(self.run_program(shared), self.run_program(plain))
+
+    def test_literals_keep_their_types(self):
+        table = InternTable()
+        one = table.intern({"type": "NumericLiteral", "value": 1})
+        self.assertIsNot(table.intern({"type": "NumericLiteral", "value": 1.0}), one)
+        self.assertIsNot(table.intern({"type": "BooleanLiteral", "value": True}), one)
+        self.assertIs(table.intern({"type": "NumericLiteral", "value": 1}), one)
+        self.assertEqual(table.stats(), {"lookups": 4, "distinct": 3, "shared": 1})
+
+    def test_errors_keep_the_line_of_their_statement(self):
+        ast = self.parse('enter {\n    x = 1;\n    println(missing + 1);\n    println(missing + 1);\n}', hash_cons=True)
+        with self.assertRaises(NameError) as raised:
+            Interpreter(output=io.StringIO()).interpret(ast)
+        self.assertIn("line 3, in <enter>", format_error(raised.exception))
+
+    def test_intern_ast_shares_across_declarations(self):
+        ast = intern_ast(self.parse('func:a { return "same" + 1; } func:b { return "same" + 1; }'))
+        self.assertIs(ast["body"][0]["body"][0]["argument"], ast["body"][1]["body"][0]["argument"])
+
+    def test_pool_round_trip(self):
+        ast = self.parse(SOURCE)
+        pooled = json.loads(json.dumps(pool(ast)))
+        self.assertLess(len(json.dumps(pooled)), len(json.dumps(ast)))
+        # Only expressions referenced twice are pooled, not their parts
+        self.assertEqual([entry["type"] for entry in pooled["pool"]], ["FunctionCall", "BinaryExpression"])
+        loaded = unpool(pooled)
+        self.assertEqual(loaded, ast)
+        self.assertLess(count_distinct_nodes(loaded), count_nodes(loaded))
+        self.assertEqual(self.run_program(loaded), self.run_program(ast))
+        self.assertIs(unpool(ast), ast)
+
+    def test_long_chains_do_not_recurse(self):
+        ast = self.parse("enter { x = " + " + ".join(["1"] * 5000) + "; println(x); }", hash_cons=True)
+        self.assertEqual(len({id(node) for node in walk(ast) if node["type"] == "NumericLiteral"}), 1)
+        # Deeper than json or == can nest, so compare by walking
+        loaded = unpool(pool(ast))
+        self.assertEqual([node["type"] for node in walk(loaded)], [node["type"] for node in walk(ast)])
+
+    def test_inlining_a_shared_parameter(self):
+        ast = self.parse('func:diff(a, b) { return a - b + (a - b); }\n'
+                         'enter { a = 5; b = 2; println(diff(b, a)); }', hash_cons=True)
+        inlined, report = inline_functions(ast)
+        self.assertEqual(len(report), 1)
+        self.assertEqual(self.run_program(inlined), "-6\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import io
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.compiler import Compiler
+from src.vm import VM
+from src.astutil import walk
+from src.linetable import format_error
+from src.inline import inline_functions, format_report
+
+class TestInline(unittest.TestCase):
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def run_program(self, ast):
+        output = io.StringIO()
+        Interpreter(output=output).interpret(ast)
+        return output.getvalue()
+
+    def assert_same_output(self, source_code, inlined_calls, **options):
+        ast = self.parse(source_code)
+        inlined, report = inline_functions(ast, **options)
+        self.assertEqual(len(report), inlined_calls)
+        self.assertEqual(self.run_program(inlined), self.run_program(ast))
+        return inlined, report
+
+    def calls(self, declaration):
+        return [node["name"] for node in walk(declaration) if node["type"] in ("CallStatement", "FunctionCall")]
+
+    def test_statement_and_expression_calls(self):
+        inlined, report = self.assert_same_output("""func:greet { println("Hello"); }
+func:welcome(name) {
+    println("Welcome " + name);
+    call greet;
+}
+func:square(x) { return x * x; }
+enter {
+    call welcome("Ada");
+    n = 4;
+    println(square(n) + square(3));
+}""", 4)
+        self.assertEqual(self.calls(inlined["body"][-1]), [])
+        self.assertEqual(format_report(report).splitlines(), [
+            "inlined greet into welcome at line 4",
+            "inlined welcome into <enter> at line 8",
+            "inlined square into <enter> at line 10",
+            "inlined square into <enter> at line 10",
+            "4 call(s) inlined",
+        ])
+
+    def test_the_original_program_is_unchanged(self):
+        source_code = 'func:f(x) { return x + 1; } enter { println(f(1)); }'
+        ast = self.parse(source_code)
+        inline_functions(ast)
+        self.assertEqual(ast, self.parse(source_code))
+
+    def test_recursive_and_large_functions_stay_calls(self):
+        source_code = """func:fact(n) {
+    if (n < 2) { return 1; }
+    return n * fact(n - 1);
+}
+func:ping(n) { if (n > 0) { call pong(n - 1); } }
+func:pong(n) { if (n > 0) { call ping(n - 1); } }
+func:chatty { println(1); println(2); println(3); println(4); }
+enter {
+    println(fact(5));
+    call ping(3);
+    call chatty;
+}"""
+        inlined, _ = self.assert_same_output(source_code, 0, max_size=6)
+        self.assertEqual(self.calls(inlined["body"][-1]), ["fact", "ping", "chatty"])
+        self.assert_same_output(source_code, 1, max_size=8)
+
+    def test_arguments_with_effects_are_not_substituted(self):
+        # Substituting these would evaluate them twice, late or never
+        self.assert_same_output("""func:twice(x) { return x + x; }
+func:ignore(x) { return 0; }
+func:noisy { println("noisy"); return 1; }
+enter {
+    println(twice(noisy()));
+    println(ignore(noisy()));
+    if (false) { println(twice(y)); }
+    y = 2;
+    println(twice(y));
+    println(twice([1]));
+}""", 1)
+
+    def test_assignments_and_returns_are_not_inlined(self):
+        self.assert_same_output("""func:set { x = 1; }
+func:early(x) { if (x) { return 1; } println("late"); }
+func:value { return 1; }
+enter {
+    x = 0;
+    call set;
+    call early(true);
+    call value;
+    println(x);
+}""", 1)
+
+    def test_calls_in_tail_position_keep_the_return_value(self):
+        # A function without a return returns the value of its last statement
+        inlined, _ = self.assert_same_output("""func:g { println("x"); return 5; }
+func:f { call g; }
+func:pick(c) {
+    if (c) { call g; } else { println("no"); }
+}
+func:nothing { }
+func:h { println("h"); call nothing; }
+enter {
+    println(f());
+    println(pick(true));
+    println(pick(false));
+    println(h());
+}""", 2)
+        self.assertEqual(self.run_program(inlined), "x\n5\nx\n5\nno\nNone\nh\nNone\n")
+        self.assertEqual(self.calls(inlined["body"][4]), ["nothing"])
+
+    def test_callees_reading_a_parameter_block_inlining(self):
+        # show() sees x through dynamic scoping only while wrap() runs
+        self.assert_same_output("""func:show { y = x; println(y); }
+func:wrap(x) { call show; }
+enter {
+    x = "outer";
+    call wrap("inner");
+}""", 0)
+
+    def test_errors_report_the_line_of_the_call(self):
+        ast, _ = inline_functions(self.parse('func:show(x) { println(x + missing); }\nenter {\n    call show(1);\n}'))
+        with self.assertRaises(NameError) as raised:
+            Interpreter(output=io.StringIO()).interpret(ast)
+        self.assertIn("line 3, in <enter>", format_error(raised.exception))
+
+    def test_inlined_program_compiles(self):
+        ast, _ = inline_functions(self.parse('func:add(a, b) { return a + b; } enter { x = add(2, 3); }'))
+        self.assertEqual(self.calls(ast["body"][-1]), [])
+        vm = VM()
+        vm.run(Compiler().compile(ast))
+        self.assertEqual(vm.environment["x"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
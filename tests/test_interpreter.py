@@ -119,5 +119,49 @@ class TestInterpreter(unittest.TestCase):
         self.interpreter.interpret(ast)
         self.assertEqual(self.captured_output.getvalue(), "42\n")
 
+    def test_interpret_while_loop(self):
+        source_code = "enter { assign i = 0; while (i < 3) { println(i); assign i = i + 1; } }"
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        self.interpreter.interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "0\n1\n2\n")
+
+    def test_interpret_for_loop(self):
+        source_code = "enter { assign total = 0; for (i = 0; i < 5; i = i + 1) { total = total + i; } println(total); }"
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        self.interpreter.interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "10\n")
+
+    def test_interpret_if_else_chain(self):
+        source_code = """func:sign(n) {
+            if (n < 0) { return "negative"; } else if (n == 0) { return "zero"; } else { return "positive"; }
+        }
+        enter { println(sign(0 - 4)); println(sign(0)); println(sign(7)); }"""
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        self.interpreter.interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "negative\nzero\npositive\n")
+
+    def test_interpret_return_unwinds_loops(self):
+        source_code = """func:first_over(limit) {
+            for (i = 0; true; i = i + 1) {
+                while (true) {
+                    if (i * i > limit) { return i; }
+                    assign i = i + 1;
+                }
+            }
+        }
+        enter { println(first_over(50)); call first_over(1); println("after"); }"""
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        self.interpreter.interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "8\nafter\n")
+
+    def test_interpret_calls_restore_caller_variables(self):
+        source_code = """func:inner(x) { x = x + 1; fresh = 1; return x; }
+        func:outer(x) { y = inner(x); x = y * 10; return x; }
+        enter { x = 1; println(outer(5)); println(x); }"""
+        ast = self.parser.parse(self.lexer.tokenize(source_code))
+        environment = self.interpreter.interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "60\n1\n")
+        self.assertEqual(environment, {"x": 1})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import unittest
+import io
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.budget import Budget
+from src.jit import JIT_THRESHOLD
+
+class TestJIT(unittest.TestCase):
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def run_both(self, source_code):
+        """Run source_code without and with the JIT; return both outputs and the JIT"""
+        outputs = []
+        for jit in (False, True):
+            interpreter = Interpreter(output=io.StringIO(), jit=jit)
+            interpreter.interpret(self.parse(source_code))
+            outputs.append(interpreter.output.getvalue())
+        return outputs[0], outputs[1], interpreter.jit
+
+    def repeat(self, statement, count=JIT_THRESHOLD * 2):
+        return f"j = 0; while (j < {count}) {{ {statement} j = j + 1; }}"
+
+    def test_hot_function_is_compiled(self):
+        source_code = f"""func:sum_to(n) {{
+            s = 0;
+            for (i = 0; i < n; i = i + 1) {{ s = s + i * 2; }}
+            return s;
+        }}
+        enter {{ {self.repeat("t = sum_to(j);")} println(t); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertIn("def holy_d_sum_to(context, args):", jit.dump())
+
+    def test_recursion_and_string_building(self):
+        source_code = f"""func:fib(n) {{ if (n < 2) {{ return n; }} return fib(n - 1) + fib(n - 2); }}
+        func:build(n) {{ s = ""; for (i = 0; i < n; i = i + 1) {{ s = s + "ab"; }} return s; }}
+        enter {{ println(fib(15)); {self.repeat("b = build(j);")} println(len(b)); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertEqual(expected, "610\n38\n")
+
+    def test_callees_see_caller_locals(self):
+        source_code = f"""func:show() {{ println(value + 1); }}
+        func:outer(value) {{ call show(); value = 0; }}
+        func:last(x) {{ if (x > 3) {{ x = x * 2; }} }}
+        enter {{ value = 100; {self.repeat("r = outer(j); l = last(j);")} println(r); println(l); println(value); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertIn("holy_d_outer", jit.dump())
+
+    def test_names_that_are_not_python_identifiers(self):
+        # x² is not a Python identifier, and Python would merge the
+        # fullwidth ｘ with x
+        source_code = f"""func:squaré(x) {{ x² = x * x; ｘ = 1; return x² + ｘ + x; }}
+        enter {{ {self.repeat("s = squaré(j);")} println(s); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertEqual(expected, "381\n")
+        self.assertEqual(jit.failures, {})
+        self.assertIn("def holy_dx_", jit.dump())
+
+    def test_unsupported_functions_stay_interpreted(self):
+        # counter reads the caller's count before assigning its own
+        source_code = f"""func:counter() {{ count = count + 1; return count; }}
+        enter {{ count = 5; {self.repeat("c = counter();")} println(c); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(jit.failures), ["counter"])
+
+    def test_wrong_argument_count_deoptimizes(self):
+        source_code = f"""func:pick(a, b) {{ return a; }}
+        enter {{ b = 7; {self.repeat("p = pick(j, j);")} println(pick(1)); }}"""
+        expected, actual, jit = self.run_both(source_code)
+        self.assertEqual(actual, expected)
+        self.assertEqual(expected, "1\n")
+
+    def test_compiled_error_line(self):
+        source_code = f"""func:divide(x) {{
+            y = x * 2;
+            return y / (x - {JIT_THRESHOLD * 2 - 1});
+        }}
+        enter {{ {self.repeat("d = divide(j);")} }}"""
+        interpreter = Interpreter(output=io.StringIO(), jit=True)
+        with self.assertRaises(ZeroDivisionError) as context:
+            interpreter.interpret(self.parse(source_code))
+        self.assertEqual(context.exception.holy_d_line, 3)
+        self.assertEqual(context.exception.holy_d_function, "divide")
+        self.assertIn("holy_d_divide", interpreter.jit.dump())
+
+    def test_budget_disables_compilation(self):
+        source_code = f"func:f(x) {{ return x; }} enter {{ {self.repeat('y = f(j);')} }}"
+        interpreter = Interpreter(output=io.StringIO(), jit=True, budget=Budget(max_steps=100000))
+        interpreter.interpret(self.parse(source_code))
+        self.assertEqual(interpreter.jit.dump(), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import io
+import os
+import tempfile
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.astutil import program_digest
+from src.linecoverage import CoverageRecorder, number_statements, merge, save_coverage, load_coverage, format_report
+
+SOURCE = """func:unused() {
+    println("never");
+}
+func:half(x) {
+    if (x > 2) {
+        return x / 2;
+    }
+    return x;
+}
+enter {
+    for (i = 0; i < 3; i = i + 1) {
+        println(half(i));
+    }
+}"""
+
+class TestLineCoverage(unittest.TestCase):
+
+    def parse(self, source_code=SOURCE):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def run_covered(self, ast):
+        recorder = CoverageRecorder(ast)
+        Interpreter(output=io.StringIO(), coverage=recorder).interpret(ast)
+        return recorder
+
+    def test_statements_are_numbered_with_lines(self):
+        _, statements = number_statements(self.parse())
+        self.assertEqual(statements, [("unused", 2), ("half", 5), ("half", 6), ("half", 8),
+                                      ("<enter>", 11), ("<enter>", 12)])
+
+    def test_records_executed_statements(self):
+        recorder = self.run_covered(self.parse())
+        self.assertEqual(list(recorder.bitmap), [0, 1, 0, 1, 1, 1])
+
+    def test_output_is_unchanged(self):
+        ast = self.parse()
+        output = io.StringIO()
+        Interpreter(output=output, coverage=CoverageRecorder(ast)).interpret(ast)
+        self.assertEqual(output.getvalue(), "0\n1\n2\n")
+
+    def test_runs_merge_into_one_file(self):
+        first = self.parse()
+        second = self.parse(SOURCE.replace("i < 3", "i < 4"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "coverage.json")
+            save_coverage(path, "script.hd", self.run_covered(first).data(program_digest(first)))
+            save_coverage(path, "script.hd", self.run_covered(first).data(program_digest(first)))
+            data = load_coverage(path)["scripts"][os.path.abspath("script.hd")]
+            self.assertEqual(data["runs"], 2)
+            self.assertEqual(data["hits"], [0, 2, 0, 2, 2, 2])
+
+            # A changed script starts its coverage over
+            save_coverage(path, "script.hd", self.run_covered(second).data(program_digest(second)))
+            data = load_coverage(path)["scripts"][os.path.abspath("script.hd")]
+            self.assertEqual((data["runs"], data["hits"]), (1, [0, 1, 1, 1, 1, 1]))
+
+    def test_merge_different_programs(self):
+        current = {"digest": "b", "runs": 1, "statements": [], "hits": []}
+        self.assertIs(merge({"digest": "a", "runs": 3, "statements": [], "hits": []}, current), current)
+
+    def test_report(self):
+        ast = self.parse()
+        coverage = {"version": 1, "scripts": {"script.hd": self.run_covered(ast).data()}}
+        report = format_report(coverage, lines=True).splitlines()
+        self.assertEqual(report[0], "script.hd: 4/6 statements (66.7%) in 1 run(s)")
+        self.assertIn("missed lines 2", report[1])
+        self.assertIn("missed lines 6", report[2])
+        self.assertEqual(report[5].split(), ["2", "#####", "unused"])
+
+if __name__ == '__main__':
+    unittest.main()
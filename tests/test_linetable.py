@@ -0,0 +1,92 @@
+import unittest
+import io
+import json
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.compiler import Compiler
+from src.vm import VM
+from src.astutil import walk
+from src.linetable import encode, decode, line_map, line_of, format_error
+
+class TestLineTable(unittest.TestCase):
+
+    SOURCE = """func:helper(x) {
+    y = x + 1;
+    z = y / 0;
+    return z;
+}
+
+enter {
+    println("start");
+    a = 2;
+    while (a < 5) {
+        a = a + 1;
+    }
+    r = helper(a);
+}
+"""
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def test_encode_round_trip(self):
+        lines = [1, 1, 2, 7, 3, 0, 300, 300, 1]
+        self.assertEqual(decode(encode(lines)), lines)
+        self.assertEqual(decode(encode([])), [])
+
+    def test_small_deltas_take_one_byte(self):
+        self.assertEqual(len(encode(range(1, 31))), 40)  # 30 bytes, base64
+
+    def test_nodes_carry_no_line_keys(self):
+        ast = self.parse(self.SOURCE)
+        for node in walk(ast):
+            self.assertNotIn("line", node)
+        for declaration in ast["body"]:
+            self.assertIn("linetable", declaration)
+        json.dumps(ast)  # tables survive the AST cache
+
+    def test_every_node_has_a_line(self):
+        ast = self.parse(self.SOURCE)
+        helper, entry = ast["body"]
+        lines = line_map(helper)
+        for node in walk(helper):
+            self.assertIn(id(node), lines)
+        self.assertEqual(lines[id(helper)], 1)
+        self.assertEqual([lines[id(statement)] for statement in helper["body"]], [2, 3, 4])
+        loop = entry["body"][2]
+        self.assertEqual(line_of(entry, loop), 10)
+        self.assertEqual(line_of(entry, loop["body"][0]["value"]["right"]), 11)
+
+    def test_interpreter_error_line(self):
+        interpreter = Interpreter(output=io.StringIO())
+        with self.assertRaises(ZeroDivisionError) as context:
+            interpreter.interpret(self.parse(self.SOURCE))
+        self.assertEqual(context.exception.holy_d_line, 3)
+        self.assertEqual(context.exception.holy_d_function, "helper")
+        self.assertEqual(format_error(context.exception), "division by zero (line 3, in helper)")
+
+    def test_interpreter_error_line_in_loop(self):
+        source = "enter {\n  i = 0;\n  while (i < 3) {\n    i = i + 1;\n    println(missing);\n  }\n}"
+        with self.assertRaises(NameError) as context:
+            Interpreter(output=io.StringIO()).interpret(self.parse(source))
+        self.assertEqual(context.exception.holy_d_line, 5)
+        self.assertEqual(context.exception.holy_d_function, "<enter>")
+
+    def test_vm_error_line(self):
+        bytecode = Compiler().compile(self.parse(self.SOURCE))
+        self.assertEqual(bytecode.functions["helper"].line_for(0), 2)
+        vm = VM()
+        vm.write = lambda text, flush=False: None
+        with self.assertRaises(ZeroDivisionError) as context:
+            vm.run(bytecode)
+        self.assertEqual(context.exception.holy_d_line, 3)
+        self.assertEqual(context.exception.holy_d_function, "helper")
+
+    def test_specialization_stats_lines(self):
+        interpreter = Interpreter(adaptive=True, output=io.StringIO())
+        interpreter.interpret(self.parse("enter {\n  a = 1;\n  b = a + 2;\n}"))
+        self.assertEqual([site["line"] for site in interpreter.specialization_stats()], [3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import io
+import sys
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.builtin_functions import Builtin, BuiltinRegistry, default_builtins
+from src.linker import link, UserFunction, UnresolvedFunction
+
+class TestLinker(unittest.TestCase):
+
+    def setUp(self):
+        self.captured_output = io.StringIO()
+        sys.stdout = self.captured_output
+
+    def tearDown(self):
+        sys.stdout = sys.__stdout__
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def test_link_binds_every_call_site(self):
+        ast = self.parse("func:f(x) { println(x); } enter { call f(\"a\"); call sleep(0); call missing; }")
+        functions, links = link(ast, default_builtins())
+        calls = ast["body"][1]["body"]
+        self.assertEqual(list(functions), ["f"])
+        self.assertIsInstance(links[id(calls[0])], UserFunction)
+        self.assertIsInstance(links[id(calls[1])], Builtin)
+        self.assertEqual(links[id(calls[1])].name, "sleep")
+        self.assertIsInstance(links[id(calls[2])], UnresolvedFunction)
+
+    def test_unresolved_call_fails_only_when_run(self):
+        ast = self.parse("func:unused { call missing; } enter { println(\"ok\"); }")
+        Interpreter().interpret(ast)
+        self.assertEqual(self.captured_output.getvalue(), "ok\n")
+        with self.assertRaises(NameError):
+            Interpreter().interpret(self.parse("enter { call missing; }"))
+
+    def test_registered_builtin(self):
+        interpreter = Interpreter()
+        interpreter.register_builtin("shout", lambda s: s.upper() + "!", 1, 1)
+        interpreter.interpret(self.parse("enter { println(shout(\"hi\")); }"))
+        self.assertEqual(self.captured_output.getvalue(), "HI!\n")
+
+    def test_builtin_arity_is_checked(self):
+        registry = BuiltinRegistry()
+        registry.register("pair", lambda a, b: a + b, 2, 2)
+        interpreter = Interpreter(builtins=registry)
+        with self.assertRaises(TypeError) as error:
+            interpreter.interpret(self.parse("enter { call pair(1); }"))
+        self.assertEqual(str(error.exception), "pair() takes exactly 2 arguments (1 given)")
+
+    def test_function_call_expression_binds_arguments(self):
+        source_code = "func:echo(x) { println(x); } enter { println(echo(\"arg\")); }"
+        Interpreter().interpret(self.parse(source_code))
+        self.assertEqual(self.captured_output.getvalue(), "arg\nNone\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+from src.lexer import Lexer
+from src.parser import Parser
+from src.memstats import MemoryStats, count_nodes, format_size
+
+class TestMemoryStats(unittest.TestCase):
+
+    def test_phases_record_retained_and_peak(self):
+        stats = MemoryStats()
+        stats.start()
+        try:
+            with stats.phase("allocate"):
+                kept = [bytearray(1000) for _ in range(100)]
+                temporary = bytearray(500000)
+                del temporary
+            with stats.phase("release"):
+                del kept
+        finally:
+            stats.stop()
+        (name, retained, delta, peak), (_, _, released, _) = stats.phases
+        self.assertEqual(name, "allocate")
+        self.assertGreater(delta, 100000)
+        self.assertGreater(peak, retained + 400000)
+        self.assertLess(released, -100000)
+
+    def test_phases_work_without_reset_peak(self):
+        # Python before 3.9 has no tracemalloc.reset_peak()
+        untraced = mock.Mock(spec=["start", "stop", "get_traced_memory"])
+        untraced.get_traced_memory.side_effect = [(100, 900), (300, 1000)]
+        with mock.patch("src.memstats.tracemalloc", untraced):
+            stats = MemoryStats()
+            with stats.phase("allocate"):
+                pass
+        self.assertEqual(stats.phases, [("allocate", 300, 200, 1000)])
+
+    def test_report_lists_phases_and_counts(self):
+        stats = MemoryStats()
+        stats.start()
+        try:
+            with stats.phase("lex"):
+                tokens = Lexer().tokenize("enter { x = 1 + 2; println(x); }")
+        finally:
+            stats.stop()
+        ast = Parser(tokens).parse()
+        stats.count("tokens", len(tokens))
+        stats.count("ast nodes", count_nodes(ast))
+        report = stats.report()
+        self.assertIn("lex", report)
+        self.assertRegex(report, r"tokens\s+14")
+        self.assertRegex(report, r"ast nodes\s+8")
+
+    def test_format_size(self):
+        self.assertEqual(format_size(512), "512 B")
+        self.assertEqual(format_size(1536), "1.5 KiB")
+        self.assertEqual(format_size(3 * 1024 * 1024), "3.0 MiB")
+
+if __name__ == '__main__':
+    unittest.main()
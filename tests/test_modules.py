@@ -0,0 +1,118 @@
+import unittest
+import io
+import os
+import tempfile
+from unittest import mock
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.program import compile
+from src import modules
+from src.cache import default_store
+from src.modules import resolve_imports, load_modules, module_path
+
+class TestModules(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.makedirs(os.path.join(self.root, "lib"))
+        self.write("lib/math.hd", 'func:square(x) { return x * x; }\nenter { println("not run"); }\n')
+        self.write("lib/text.hd", 'import "math.hd";\nfunc:shout(s) { return s + "!"; }\nfunc:area(x) { return square(x); }\n')
+        self.write("main.hd", 'import "lib/math.hd";\nimport "lib/text.hd";\n'
+                              'enter { println(shout("hi")); println(area(4) + square(2)); }\n')
+        self.environment = mock.patch.dict(os.environ, {"HOLY_D_CACHE_DIR": os.path.join(self.root, "cache")})
+        self.environment.start()
+        modules._loaded.clear()
+
+    def tearDown(self):
+        modules._loaded.clear()
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def cache_entries(self):
+        return default_store().entries()
+
+    def write(self, name, source_code):
+        with open(os.path.join(self.root, name), 'w') as source_file:
+            source_file.write(source_code)
+
+    def run_main(self):
+        path = os.path.join(self.root, "main.hd")
+        with open(path) as source_file:
+            program = compile(source_file.read(), path=path, jobs=1)
+        output = io.StringIO()
+        program.run(output=output)
+        return output.getvalue()
+
+    def test_parse_import(self):
+        ast = Parser(Lexer().tokenize('import "lib/util.hd";\nenter { }')).parse()
+        self.assertEqual(ast["body"][0]["type"], "ImportDeclaration")
+        self.assertEqual(ast["body"][0]["path"], "lib/util.hd")
+
+    def test_imported_functions_are_callable(self):
+        self.assertEqual(self.run_main(), "hi!\n20\n")
+
+    def test_imported_paths_are_reported(self):
+        path = os.path.join(self.root, "main.hd")
+        with open(path) as source_file:
+            ast = Parser(Lexer().tokenize(source_file.read())).parse()
+        imported = []
+        resolve_imports(ast, path, jobs=1, imported_paths=imported)
+        self.assertEqual(sorted(imported), sorted(module_path(name, path) for name in ("lib/math.hd", "lib/text.hd")))
+
+    def test_modules_are_cached_by_content(self):
+        self.run_main()
+        self.assertEqual(len(self.cache_entries()), 2)
+
+        # A fresh process finds both modules in the cache and parses nothing
+        modules._loaded.clear()
+        with mock.patch.object(modules, "parse_source", side_effect=AssertionError("parsed")):
+            self.assertEqual(self.run_main(), "hi!\n20\n")
+
+    def test_changing_a_module_reparses_only_it(self):
+        self.run_main()
+        modules._loaded.clear()
+        self.write("lib/text.hd", 'func:shout(s) { return s + "?"; }\nfunc:area(x) { return 0; }\n')
+        parsed = []
+        real_parse = modules.parse_source
+        with mock.patch.object(modules, "parse_source", side_effect=lambda source, *args: parsed.append(source) or real_parse(source)):
+            self.assertEqual(self.run_main(), "hi?\n4\n")
+        self.assertEqual(len(parsed), 1)
+        # The old entry stays until it is evicted
+        self.assertEqual(len(self.cache_entries()), 3)
+
+    def test_modules_are_shared_within_a_process(self):
+        math = module_path("lib/math.hd", os.path.join(self.root, "main.hd"))
+        first = load_modules([math])[math]
+        self.assertIs(load_modules([math])[math], first)
+
+    def test_import_cycles_and_duplicates(self):
+        self.write("a.hd", 'import "b.hd";\nfunc:a() { return "a"; }\n')
+        self.write("b.hd", 'import "a.hd";\nimport "lib/math.hd";\nfunc:b() { return "b"; }\n')
+        path = os.path.join(self.root, "main.hd")
+        ast = Parser(Lexer().tokenize('import "a.hd";\nimport "b.hd";\nenter { println(a() + b()); }')).parse()
+        program = resolve_imports(ast, path, jobs=1)
+        names = [node.get("name") for node in program["body"]]
+        self.assertEqual(names, ["square", "b", "a", None])
+
+    def test_parallel_loading(self):
+        path = os.path.join(self.root, "main.hd")
+        ast = Parser(Lexer().tokenize('import "lib/math.hd";\nimport "lib/text.hd";\nenter { println(area(3)); }')).parse()
+        output = io.StringIO()
+        Interpreter(output=output).interpret(resolve_imports(ast, path, jobs=2))
+        self.assertEqual(output.getvalue(), "9\n")
+
+    def test_missing_module(self):
+        ast = Parser(Lexer().tokenize('import "missing.hd";\nenter { }')).parse()
+        with self.assertRaises(ImportError):
+            resolve_imports(ast, os.path.join(self.root, "main.hd"))
+
+    def test_syntax_error_names_the_module(self):
+        self.write("broken.hd", "func:oops( {")
+        ast = Parser(Lexer().tokenize('import "broken.hd";\nenter { }')).parse()
+        with self.assertRaisesRegex(SyntaxError, "broken.hd"):
+            resolve_imports(ast, os.path.join(self.root, "main.hd"), jobs=1)
+
+if __name__ == '__main__':
+    unittest.main()
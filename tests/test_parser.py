@@ -1,6 +1,8 @@
 import unittest
+from unittest import mock
 from src.lexer import Lexer
-from src.parser import Parser
+from src.parser import Parser, dispatch
+from src.syntax import Syntax
 
 class TestParser(unittest.TestCase):
 
@@ -77,5 +79,76 @@ class TestParser(unittest.TestCase):
         self.assertEqual(ast["value"]["type"], "NumericLiteral")
         self.assertEqual(ast["value"]["value"], 10)
 
+    def test_parse_binary_precedence(self):
+        tokens = self.lexer.tokenize("assign x = 1 + 2 * 3 < 10 - 4 - 1;")
+        ast = Parser(tokens).parse_statement()
+        value = ast["value"]
+        self.assertEqual(value["operator"], "<")
+        self.assertEqual(value["left"]["right"]["operator"], "*")
+        self.assertEqual(value["right"]["left"]["operator"], "-")
+        self.assertEqual(value["right"]["right"]["value"], 1)
+
+    def test_parse_control_flow(self):
+        tokens = self.lexer.tokenize("enter { for (i = 0; i < 3; i = i + 1) { if (i == 1) { return; } else { } } while (false) { } }")
+        body = self.parser.parse(tokens)["body"][0]["body"]
+        self.assertEqual([s["type"] for s in body], ["ForStatement", "WhileStatement"])
+        self.assertEqual(body[0]["init"]["name"], "i")
+        self.assertEqual(body[0]["update"]["value"]["operator"], "+")
+        self.assertEqual(body[0]["body"][0]["type"], "IfStatement")
+        self.assertEqual(body[0]["body"][0]["consequent"][0]["type"], "ReturnStatement")
+        self.assertEqual(body[0]["body"][0]["alternate"], [])
+
+    def test_syntax_error_reports_line(self):
+        tokens = self.lexer.tokenize("enter {\n    x = 1\n}")
+        with self.assertRaisesRegex(SyntaxError, "Expected SEMICOLON, got RBRACE at line 3"):
+            Parser(tokens).parse()
+        with self.assertRaisesRegex(SyntaxError, "Expected SEMICOLON, got RBRACE at line 2"):
+            Parser(self.lexer.tokenize("enter {\n    call f() }")).parse()
+        with self.assertRaisesRegex(SyntaxError, "Unexpected end of input in expression"):
+            Parser(self.lexer.tokenize("enter { x = ")).parse()
+
+    def test_grammar_matches_lexer(self):
+        table = Syntax.parse_table()
+        self.assertIs(Syntax.parse_table(), table)  # generated once
+        self.assertEqual(Lexer().keywords, Syntax.keyword_tokens())
+        lookaheads = set().union(*table.values()) - {Syntax.END}
+        self.assertLessEqual(lookaheads, Syntax.token_types())
+
+    def test_conflicting_grammar_is_rejected(self):
+        grammar = dict(Syntax.GRAMMAR, Else=Syntax.GRAMMAR['Else'] + [(('ELSE', 'Block'), 'first')])
+        with mock.patch.object(Syntax, 'GRAMMAR', grammar):
+            with self.assertRaisesRegex(ValueError, "not LL\\(1\\)"):
+                Syntax.parse_table.__wrapped__()
+
+    def test_dispatch_follows_the_parse_table(self):
+        table = Syntax.parse_table()
+        self.assertEqual(set(Parser.DECLARATIONS), set(table['Declaration']))
+        self.assertEqual(set(Parser.STATEMENTS), set(table['Statement']))
+        self.assertEqual(set(Parser.PRIMARIES), set(table['Primary']))
+        self.assertIs(Parser.STATEMENTS['IDENTIFIER'], Parser.parse_assignment_statement)
+        grammar_table = dict(table, Statement=dict(table['Statement'], COLON=(('COLON',), 'label_statement')))
+        with mock.patch.object(Syntax, 'parse_table', return_value=grammar_table):
+            with self.assertRaises(KeyError):
+                dispatch('Statement', {})
+
+    def test_validate_syntax_agrees_with_parser(self):
+        sources = [
+            "",
+            "enter { x = (1 + 2) * 3; }",
+            "func:f(a, b) { if (a < b) { return a; } else if (a == b) { return; } }",
+            "enter { x = (1; }",
+            "enter { println(\"missing\") }",
+            "func:f( { }",
+            "enter { } }",
+        ]
+        for source_code in sources:
+            tokens = self.lexer.tokenize(source_code)
+            try:
+                Parser(tokens).parse()
+                parses = True
+            except SyntaxError:
+                parses = False
+            self.assertEqual(Syntax.validate_syntax(tokens), parses, source_code)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import unittest
+import io
+import os
+import tempfile
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.pgo import (ProfileRecorder, merge, apply_profile, program_digest, load_profile, save_profile,
+                     hot_functions)
+from src.cache import CacheStore
+
+SOURCE = """func:square(x) { return x * x; }
+func:rare(s) { return s + "!"; }
+enter {
+    total = 0;
+    for (i = 0; i < 20; i = i + 1) {
+        if (i < 5) { total = total + square(i); }
+    }
+    println(total);
+    println(rare("once"));
+}"""
+
+class TestPGO(unittest.TestCase):
+
+    def parse(self, source_code=SOURCE):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def record(self, ast, **options):
+        recorder = ProfileRecorder(ast)
+        output = io.StringIO()
+        Interpreter(output=output, profile=recorder, **options).interpret(ast)
+        return recorder.data(program_digest(ast)), output.getvalue()
+
+    def test_profiling_does_not_change_output(self):
+        expected = io.StringIO()
+        Interpreter(output=expected).interpret(self.parse())
+        for options in ({}, {"adaptive": True}, {"jit": True}):
+            self.assertEqual(self.record(self.parse(), **options)[1], expected.getvalue())
+
+    def test_records_calls_types_and_branches(self):
+        profile, _ = self.record(self.parse())
+        self.assertEqual(profile["functions"], {"square": 5, "rare": 1})
+        self.assertEqual(profile["calls"], {"<enter>": {"square": 5, "rare": 1}})
+        self.assertEqual(profile["types"]["square:0"], ["int", "int"])
+        self.assertEqual(profile["types"]["rare:0"], ["str", "str"])
+        self.assertEqual(list(profile["branches"].values()), [[5, 15]])
+
+    def test_polymorphic_sites_and_merging(self):
+        ast = self.parse('func:add(a, b) { return a + b; }\nenter { println(add(1, 2)); println(add("a", "b")); }')
+        profile, _ = self.record(ast)
+        self.assertIsNone(profile["types"]["add:0"])
+
+        twice = merge(profile, profile)
+        self.assertEqual(twice["runs"], 2)
+        self.assertEqual(twice["functions"], {"add": 4})
+        self.assertEqual(twice["calls"]["<enter>"]["add"], 4)
+
+        # A profile of a different program is replaced, not merged
+        other = dict(profile, digest="changed")
+        self.assertEqual(merge(profile, other), other)
+
+    def test_hot_functions_are_compiled_before_they_run(self):
+        ast = self.parse()
+        profile, _ = self.record(ast)
+        self.assertEqual(hot_functions(profile, threshold=5), ["square"])
+
+        interpreter = Interpreter(output=io.StringIO(), jit=True)
+        interpreter.load(ast)
+        self.assertEqual(apply_profile(interpreter, ast, profile), [])  # square is called 5 times, HOT_CALLS is 10
+        profile["functions"]["square"] = 50
+        self.assertEqual(apply_profile(interpreter, ast, profile), ["square"])
+        interpreter.execute_program(ast)
+        self.assertEqual(interpreter.output.getvalue(), "30\nonce!\n")
+        self.assertIn("holy_d_square", interpreter.jit.dump())
+        self.assertNotIn("holy_d_rare", interpreter.jit.dump())
+
+    def test_monomorphic_sites_start_specialized(self):
+        ast = self.parse()
+        profile, _ = self.record(ast)
+        interpreter = Interpreter(output=io.StringIO(), adaptive=True)
+        interpreter.load(ast)
+        apply_profile(interpreter, ast, profile)
+        sites = {site.node["operator"]: site for site in interpreter.binary_sites.values()}
+        self.assertEqual(sites["*"].state, "specialized")
+        interpreter.execute_program(ast)
+        self.assertEqual(interpreter.output.getvalue(), "30\nonce!\n")
+        # Dispatched specialized from its first evaluation, without warming up
+        self.assertEqual((sites["*"].warmup, sites["*"].misses), (0, 0))
+        self.assertIs(interpreter.binary_sites[id(sites["*"].node)], sites["*"])
+
+    def test_profile_is_saved_in_the_cache_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = CacheStore(os.path.join(directory, "cache"))
+            path = os.path.join(directory, "script.hd")
+            ast = self.parse()
+            profile, _ = self.record(ast)
+            self.assertTrue(save_profile(profile, path, store))
+            self.assertEqual(len(store.entries()), 1)
+            self.assertEqual(load_profile(path, profile["digest"], store), profile)
+            self.assertIsNone(load_profile(path, "another program", store))
+            self.assertIsNone(load_profile(os.path.join(directory, "missing.hd"), store=store))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import io
+from src.language import compile, Program
+
+class TestProgram(unittest.TestCase):
+
+    def setUp(self):
+        self.program = compile("""func:greet(name) { println(greeting + ", " + name + "!"); }
+        enter { call greet(who); assign count = 1; }""")
+
+    def test_run_with_inputs_and_output(self):
+        output = io.StringIO()
+        environment = self.program.run(inputs={"greeting": "Hello", "who": "Holy-D"}, output=output)
+        self.assertEqual(output.getvalue(), "Hello, Holy-D!\n")
+        self.assertEqual(environment["count"], 1)
+
+    def test_runs_start_from_fresh_state(self):
+        first = io.StringIO()
+        second = io.StringIO()
+        self.program.run(inputs={"greeting": "Hi", "who": "a"}, output=first)
+        with self.assertRaises(NameError):
+            self.program.run(output=second)
+        self.assertEqual(first.getvalue(), "Hi, a!\n")
+        self.assertEqual(second.getvalue(), "")
+
+    def test_program_is_immutable(self):
+        self.assertIsInstance(self.program, Program)
+        with self.assertRaises(AttributeError):
+            self.program.ast = None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+from unittest import mock
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.cache import CacheStore
+from src.builtin_functions import default_builtins
+from src import resultcache
+from src.resultcache import (nondeterminism, load_result, save_result, drop_result, clear_results,
+                             replay_result, ResultRecorder)
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.store = CacheStore(os.path.join(self.root, "cache"))
+        self.script = os.path.join(self.root, "main.hd")
+        self.module = os.path.join(self.root, "lib.hd")
+        with open(self.module, 'w') as module_file:
+            module_file.write('func:square(x) { return x * x; }\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def parse(self, source_code):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def test_clock_and_computed_exits_are_nondeterministic(self):
+        self.assertEqual(nondeterminism(self.parse(
+            'func:f(x) { return len([x]) + missing(x); } enter { println(f(2)); call exit(1); }')), [])
+        self.assertEqual(nondeterminism(self.parse(
+            'func:wait { call sleep(1); }\nenter {\n    println(time());\n    call exit(len([1]));\n}')), [
+            "sleep() reads the clock at line 1",
+            "time() reads the clock at line 3",
+            "exit() with a computed code at line 4",
+        ])
+
+    def test_native_builtins_are_nondeterministic(self):
+        builtins = default_builtins()
+        builtins.register("read_line", lambda: "", 0, 0)
+        self.assertEqual(nondeterminism(self.parse('enter { x = read_line(); }'), builtins),
+                         ["read_line() is not a pure builtin at line 1"])
+
+    def test_saved_results_are_replayed(self):
+        source_code = 'enter { println(1); }'
+        self.assertIsNone(load_result(self.script, source_code, self.store))
+        self.assertTrue(save_result(self.script, source_code, "1\n", 3, [self.module], self.store))
+        result = load_result(self.script, source_code, self.store)
+        self.assertEqual((result["stdout"], result["exit_code"]), ("1\n", 3))
+        self.assertIsNone(load_result(self.script, source_code + " ", self.store))
+        self.assertIsNone(load_result(os.path.join(self.root, "other.hd"), source_code, self.store))
+
+        output = io.StringIO()
+        with self.assertRaises(SystemExit) as raised:
+            replay_result(result, output)
+        self.assertEqual((output.getvalue(), raised.exception.code), ("1\n", 3))
+
+    def test_editing_an_import_invalidates_the_result(self):
+        save_result(self.script, "", "4\n", None, [self.module], self.store)
+        self.assertIsNotNone(load_result(self.script, "", self.store))
+        with open(self.module, 'a') as module_file:
+            module_file.write('func:cube(x) { return x * x * x; }\n')
+        self.assertIsNone(load_result(self.script, "", self.store))
+
+    def test_explicit_invalidation(self):
+        save_result(self.script, "a", "a\n", store=self.store)
+        save_result(self.script, "b", "b\n", store=self.store)
+        self.assertTrue(drop_result(self.script, "a", self.store))
+        self.assertFalse(drop_result(self.script, "a", self.store))
+        self.assertIsNone(load_result(self.script, "a", self.store))
+        self.assertIsNotNone(load_result(self.script, "b", self.store))
+        clear_results(self.store)
+        self.assertIsNone(load_result(self.script, "b", self.store))
+        save_result(self.script, "b", "b\n", store=self.store)
+        self.assertIsNotNone(load_result(self.script, "b", self.store))
+
+    def test_large_outputs_are_not_cached(self):
+        with mock.patch.object(resultcache, "MAX_OUTPUT", 10):
+            self.assertFalse(save_result(self.script, "", "x" * 11, store=self.store))
+            with mock.patch.object(sys, "stdout", io.StringIO()):
+                with ResultRecorder(self.script, "large", store=self.store) as recorder:
+                    recorder.write("x" * 6)
+                    recorder.write("x" * 6)
+        self.assertIsNone(load_result(self.script, "large", self.store))
+
+    def test_recorder_caches_output_and_exit_code(self):
+        source_code = 'enter { println("hi"); call exit(2); }'
+        output = io.StringIO()
+        with mock.patch.object(sys, "stdout", output):
+            with self.assertRaises(SystemExit):
+                with ResultRecorder(self.script, source_code, store=self.store):
+                    Interpreter().interpret(self.parse(source_code))
+        self.assertEqual(output.getvalue(), "hi\n")
+        result = load_result(self.script, source_code, self.store)
+        self.assertEqual((result["stdout"], result["exit_code"]), ("hi\n", 2))
+
+    def test_failed_runs_are_not_cached(self):
+        source_code = 'enter { println("hi"); println(missing); }'
+        with mock.patch.object(sys, "stdout", io.StringIO()):
+            with self.assertRaises(NameError):
+                with ResultRecorder(self.script, source_code, store=self.store):
+                    Interpreter().interpret(self.parse(source_code))
+        self.assertIsNone(load_result(self.script, source_code, self.store))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import io
+import sys
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.rope import Rope, concat, ROPE_THRESHOLD
+from src.jit import JIT_THRESHOLD
+
+class TestRope(unittest.TestCase):
+
+    def test_small_concat_stays_str(self):
+        self.assertIs(type(concat("a", "b")), str)
+
+    def test_large_concat_builds_rope(self):
+        big = "x" * ROPE_THRESHOLD
+        value = concat(big, "y")
+        self.assertIsInstance(value, Rope)
+        self.assertEqual(value, big + "y")
+        self.assertEqual(len(value), ROPE_THRESHOLD + 1)
+
+    def test_older_values_are_unchanged(self):
+        base = Rope.from_strings("a" * ROPE_THRESHOLD)
+        first = base + "b"
+        second = base + "c"
+        self.assertEqual(str(first), "a" * ROPE_THRESHOLD + "b")
+        self.assertEqual(str(second), "a" * ROPE_THRESHOLD + "c")
+        self.assertEqual(str(base), "a" * ROPE_THRESHOLD)
+
+    def test_prepend_and_rope_operands(self):
+        rope = Rope.from_strings("b" * ROPE_THRESHOLD)
+        self.assertEqual("a" + rope, "a" + "b" * ROPE_THRESHOLD)
+        self.assertEqual(rope + rope, "b" * (2 * ROPE_THRESHOLD))
+        with self.assertRaises(TypeError):
+            rope + 1
+
+    def test_interpreter_prints_flattened_rope(self):
+        body = "".join("assign s = s + \"0123456789\";" for _ in range(200))
+        source_code = "enter { assign s = \"\"; " + body + " println(s); }"
+        ast = Parser(Lexer().tokenize(source_code)).parse()
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+        try:
+            Interpreter().interpret(ast)
+        finally:
+            sys.stdout = sys.__stdout__
+        self.assertEqual(captured_output.getvalue(), "0123456789" * 200 + "\n")
+
+    def test_native_builtins_receive_flattened_strings(self):
+        long = "x" * 1000
+        source_code = f"""func:shouted(s) {{ return shout(s + s); }}
+        enter {{
+            j = 0;
+            while (j < {JIT_THRESHOLD * 2}) {{ t = shouted("{long}"); j = j + 1; }}
+            println(len(t));
+            println(shout("{long}" + "{long}") == t);
+        }}"""
+        for jit in (False, True):
+            interpreter = Interpreter(output=io.StringIO(), jit=jit)
+            interpreter.register_builtin("shout", lambda s: s.upper(), min_args=1, max_args=1)
+            interpreter.interpret(Parser(Lexer().tokenize(source_code)).parse())
+            self.assertEqual(interpreter.output.getvalue(), "2000\nTrue\n")
+            if jit:
+                self.assertIn("_flatten(", interpreter.jit.dump())
+
+if __name__ == '__main__':
+    unittest.main()
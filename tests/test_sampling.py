@@ -0,0 +1,151 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.sampling import SamplingProfiler
+from src.linecoverage import CoverageRecorder
+
+SOURCE = """func:inner() {
+    call sample();
+    return 1;
+}
+func:outer() {
+    x = 0;
+    return inner();
+}
+enter {
+    call sample();
+    println(outer());
+}"""
+
+class TestSampling(unittest.TestCase):
+
+    def parse(self, source_code=SOURCE):
+        return Parser(Lexer().tokenize(source_code)).parse()
+
+    def sampled(self, **options):
+        # The script takes its own samples, so the stacks are deterministic
+        profiler = SamplingProfiler()
+        interpreter = Interpreter(output=io.StringIO(), **options)
+        interpreter.register_builtin("sample", lambda: profiler.sample())
+        profiler.attach(interpreter)
+        return profiler, interpreter
+
+    def test_stacks_have_functions_and_lines(self):
+        profiler, interpreter = self.sampled()
+        interpreter.interpret(self.parse())
+        self.assertEqual(profiler.collapsed(), "<enter>:10 1\n<enter>:11;outer:7;inner:2 1\n")
+        self.assertEqual(interpreter.output.getvalue(), "1\n")
+
+    def test_innermost_frame_has_the_line_of_its_statement(self):
+        source = """func:spin(n) {
+    x = 0;
+    while (probe(n) > 0) {
+        n = n - 1;
+        if (n == 1) {
+            call sample();
+        }
+    }
+    return n;
+}
+enter {
+    call spin(3);
+}"""
+        profiler, interpreter = self.sampled()
+        interpreter.register_builtin("probe", lambda n: profiler.sample() or n, 1, 1)
+        interpreter.interpret(self.parse(source))
+        # Once the loop body has run, the loop's own statement is running again
+        self.assertEqual(profiler.collapsed(), "<enter>:12;spin:3 4\n<enter>:12;spin:6 1\n")
+
+    def test_statements_are_found_with_coverage(self):
+        ast = self.parse()
+        recorder = CoverageRecorder(ast)
+        profiler, interpreter = self.sampled(coverage=recorder)
+        interpreter.interpret(ast)
+        self.assertEqual(profiler.collapsed(), "<enter>:10 1\n<enter>:11;outer:7;inner:2 1\n")
+        self.assertTrue(all(recorder.bitmap))
+
+    def test_sampling_adds_no_calls_per_statement(self):
+        # The shadow stack costs an append and a pop per call; the running
+        # statement is found by the sampler, so sampled and plain runs make
+        # the same Python calls
+        source = """func:spin(n) {
+    while (n > 0) { n = n - 1; x = n * 2; }
+    return n;
+}
+enter {
+    for (i = 0; i < 20; i = i + 1) { call spin(10); }
+}"""
+        ast = self.parse(source)
+        counts = []
+        for sampled in (False, True):
+            interpreter = Interpreter(output=io.StringIO())
+            if sampled:
+                SamplingProfiler().attach(interpreter)
+            calls = Counter()
+            sys.setprofile(lambda frame, event, argument: calls.update((frame.f_code,)) if event == "call" else None)
+            try:
+                interpreter.interpret(ast)
+            finally:
+                sys.setprofile(None)
+            counts.append(calls)
+        self.assertEqual(counts[1], counts[0])
+
+    def test_stack_is_empty_between_runs(self):
+        profiler, interpreter = self.sampled()
+        interpreter.interpret(self.parse())
+        self.assertEqual(interpreter.frames, [])
+        profiler.sample()
+        self.assertEqual(profiler.samples, 2)
+
+    def test_errors_unwind_the_stack(self):
+        profiler, interpreter = self.sampled()
+        with self.assertRaises(NameError):
+            interpreter.interpret(self.parse(SOURCE.replace("return 1;", "return missing;")))
+        self.assertEqual(interpreter.frames, [])
+
+    def test_compiled_functions_keep_the_stack(self):
+        source = SOURCE.replace("println(outer());", "for (i = 0; i < 3; i = i + 1) { println(outer()); }")
+        profiler, interpreter = self.sampled(jit=True)
+        interpreter.jit.threshold = 1
+        interpreter.interpret(self.parse(source))
+        self.assertEqual(profiler.stacks["<enter>:11;outer:7;inner"], 3)
+
+    def test_background_sampling_and_write(self):
+        source = """func:spin(n) {
+    while (n > 0) { n = n - 1; }
+    return n;
+}
+enter {
+    for (i = 0; i < 200; i = i + 1) { call spin(100); }
+}"""
+        profiler = SamplingProfiler(interval=0.001)
+        interpreter = profiler.attach(Interpreter(output=io.StringIO()))
+        profiler.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not profiler.samples and time.monotonic() < deadline:
+                interpreter.interpret(self.parse(source))
+        finally:
+            profiler.stop()
+        self.assertGreater(profiler.samples, 0)
+        self.assertTrue(all(stack.startswith("<enter>") for stack in profiler.stacks))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "samples.txt")
+            profiler.write(path)
+            with open(path) as samples_file:
+                self.assertEqual(samples_file.read(), profiler.collapsed())
+
+    def test_unsampled_context_has_no_stack(self):
+        interpreter = Interpreter(output=io.StringIO())
+        interpreter.interpret(self.parse(SOURCE.replace("call sample();", "")))
+        self.assertIsNone(interpreter.frames)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import io
+import os
+import json
+import tempfile
+import time
+from src.lexer import Lexer
+from src.parser import Parser
+from src.interpreter import Interpreter
+from src.cache import CacheStore, cache_key
+from src.tracing import Tracer, trace_parser, trace_store
+
+SOURCE = """func:slow() {
+    call sleep(0.02);
+    return 1;
+}
+func:fast() { return 2; }
+enter {
+    println(slow() + fast());
+}"""
+
+class TestTracing(unittest.TestCase):
+
+    def events(self, tracer, category):
+        return [event for event in tracer.trace()["traceEvents"] if event.get("cat") == category]
+
+    def test_spans_nest_and_are_written_as_trace_events(self):
+        tracer = Tracer()
+        with tracer.span("outer"):
+            with tracer.span("inner", args={"n": 1}):
+                time.sleep(0.001)
+        outer, inner = self.events(tracer, "phase")
+        self.assertEqual((outer["name"], inner["name"], inner["args"]), ("outer", "inner", {"n": 1}))
+        self.assertEqual(outer["ph"], "X")
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracer.write(path, "holy-d test")
+            with open(path) as trace_file:
+                trace = json.load(trace_file)
+        self.assertEqual(trace["traceEvents"][0]["args"], {"name": "holy-d test"})
+        self.assertEqual(len(trace["traceEvents"]), 3)
+
+    def test_declarations_are_traced_while_parsing(self):
+        tracer = Tracer()
+        ast = trace_parser(Parser(Lexer().tokenize(SOURCE)), tracer).parse()
+        self.assertEqual(len(ast["body"]), 3)
+        spans = self.events(tracer, "parse")
+        self.assertEqual([span["name"] for span in spans],
+                         ["FunctionDeclaration slow", "FunctionDeclaration fast", "EntryPoint <enter>"])
+        self.assertEqual([span["args"]["line"] for span in spans], [1, 5, 6])
+
+    def test_only_calls_above_the_threshold_are_traced(self):
+        tracer = Tracer(call_threshold=0.01)
+        output = io.StringIO()
+        Interpreter(output=output, tracer=tracer).interpret(Parser(Lexer().tokenize(SOURCE)).parse())
+        self.assertEqual(output.getvalue(), "3\n")
+        self.assertEqual([span["name"] for span in self.events(tracer, "call")], ["slow"])
+
+    def test_cache_lookups_are_traced(self):
+        tracer = Tracer()
+        with tempfile.TemporaryDirectory() as directory:
+            store = trace_store(CacheStore(directory), tracer)
+            store.get(cache_key("a"))
+            store.put(cache_key("a"), b"data")
+            store.get_json(cache_key("a"))
+        spans = self.events(tracer, "cache")
+        self.assertEqual([(span["name"], span["args"].get("hit")) for span in spans],
+                         [("cache get", False), ("cache put", None), ("cache get", True)])
+
+    def test_untraced_contexts_are_not_instrumented(self):
+        interpreter = Interpreter(output=io.StringIO())
+        self.assertNotIn("call_function", vars(interpreter))
+
+if __name__ == '__main__':
+    unittest.main()